@@ -2,14 +2,48 @@
 API for scraping movie details and reviews from Letterboxd
 """
 import os
+import json
+import functools
+import math
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
-from src.helpers.scrapers import movie_details_scraper,scrape_reviews
+from src.helpers.scrapers import (
+    movie_details_scraper,
+    scrape_reviews,
+    validate_letterboxd_film_url,
+)
 from src.helpers.letterboxd_analyzers import LetterboxdReviewAnalyzer
-from src.helpers.roast_generator import LetterboxdRoastAnalyzer
-from src.helpers.scrapers_roast import scrape_user_reviews,scrape_user_stats
+from src.helpers.roast_generator import LetterboxdRoastAnalyzer, RoastGenerationError
+from src.helpers.scrapers_roast import ScraperError as UserScraperError
+from src.helpers.streaming import StreamError, StreamTooLong, limit_words
+from src.helpers.hedging import HedgedCaller
+from src.helpers.circuit_breaker import CircuitBreakerRegistry
+from src.helpers.llm_providers import FakeLLMProvider, GeminiProvider
+from src.helpers.review_dedup import dedupe_reviews
+from src.helpers.incremental_refresh import IncrementalRefresher
+from src.helpers.state_store import JsonStateStore
+from src.helpers.taste_profiles import TasteProfiles, own_review
+from src.helpers.user_review_store import UserReviewStore
+from src.helpers.deadlines import (
+    DeadlineExceeded,
+    deadline_expired,
+    deadline_scope,
+    propagate_deadline,
+)
+from src.helpers.jobs import JobQueue, JobQueueFull
+from src.helpers.stages import format_timings, run_stages
+from src.helpers.metrics import registry, start_request_timings
+from src.helpers.profiling import RequestProfiler
+from src.helpers.admission import AdmissionLimit, Overloaded, render_admission
+from src.helpers.cache_backends import CacheError, open_cache
+from src.helpers.review_warehouse import ReviewWarehouse
 
 load_dotenv()
 # Set up Google Gemini API key
@@ -23,15 +57,405 @@ GEMINI_API_KEY_SAI3 = os.getenv("GEMINI_API_KEY_SAI3")
 GEMINI_API_KEY_RIO = [GEMINI_API_KEY_RIO1, GEMINI_API_KEY_RIO2, GEMINI_API_KEY_RIO3]
 GEMINI_API_KEY_SAI = [GEMINI_API_KEY_SAI1, GEMINI_API_KEY_SAI2, GEMINI_API_KEY_SAI3]
 
+# Stream generations so over-length ones are abandoned early (LLM_EARLY_ABORT=1)
+LLM_EARLY_ABORT = os.getenv("LLM_EARLY_ABORT", "0") == "1"
 
-analyze = LetterboxdReviewAnalyzer()
-roaster = LetterboxdRoastAnalyzer()
+# Duplicate Gemini calls slower than this latency percentile on another key
+LLM_HEDGE_PERCENTILE = os.getenv("LLM_HEDGE_PERCENTILE")
+hedger = HedgedCaller(float(LLM_HEDGE_PERCENTILE)) if LLM_HEDGE_PERCENTILE else None
+
+# Skip Gemini models and keys that keep failing, probing them again after a pause
+breakers = CircuitBreakerRegistry(
+    failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "3")),
+    reset_timeout=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+)
+
+# LLM_PROVIDER=fake swaps Gemini for a local deterministic stand-in (offline load tests)
+if os.getenv("LLM_PROVIDER", "gemini") == "fake":
+    provider = FakeLLMProvider(
+        latency=float(os.getenv("FAKE_LLM_LATENCY", "0")),
+        failure_rate=float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+        words=int(os.getenv("FAKE_LLM_WORDS", "120")),
+        token_delay=float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0")),
+    )
+else:
+    provider = GeminiProvider()
+
+# ASPECT_MODE=fallback scores aspects locally when Gemini fails, "local" never asks Gemini.
+# LLM_MAP_REDUCE=1 analyzes long review sets in parallel chunks, so /movie_details can read
+# more than the default 30 REVIEW_PAGES without slowing down or overflowing the prompt
+REVIEW_PAGES = int(os.getenv("REVIEW_PAGES", "30"))
+analyze = LetterboxdReviewAnalyzer(
+    stream_generation=LLM_EARLY_ABORT, hedger=hedger, breakers=breakers, provider=provider,
+    aspect_mode=os.getenv("ASPECT_MODE", "llm"),
+    map_reduce=os.getenv("LLM_MAP_REDUCE", "0") == "1")
+
+# Time budget of a /movie_details, /roast or /taste request, which clients can lower with
+# an X-Request-Deadline header (seconds). Scraping and generation stop when it runs out
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "60"))
+
+# Background workers for the job API (POST /jobs/<endpoint>), with at most
+# JOB_MAX_PENDING jobs waiting to run
+jobs = JobQueue(
+    workers=int(os.getenv("JOB_WORKERS", "4")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "100")),
+)
+
+# PROFILE_DIR saves cProfile reports of /movie_details, /roast and /taste requests sent
+# with an X-Profile header equal to PROFILE_TOKEN, or picked at PROFILE_SAMPLE_RATE
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+profiler = (
+    RequestProfiler(PROFILE_DIR, sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+                    token=os.getenv("PROFILE_TOKEN") or None)
+    if PROFILE_DIR else None
+)
+
+# Requests served at once per endpoint (0 for no limit), including its /stream and
+# /progressive variants. Up to ADMISSION_MAX_WAITING more wait ADMISSION_MAX_WAIT_SECONDS
+# for a slot, the rest are answered 503 with a Retry-After header
+ADMISSION_MAX_WAITING = int(os.getenv("ADMISSION_MAX_WAITING", "8"))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", "5"))
+admission = {
+    name: AdmissionLimit(name, int(os.getenv(variable, default)),
+                         max_waiting=ADMISSION_MAX_WAITING, max_wait=ADMISSION_MAX_WAIT_SECONDS)
+    for name, variable, default in (
+        ('movie_details', 'MOVIE_DETAILS_MAX_CONCURRENT', '8'),
+        ('roast', 'ROAST_MAX_CONCURRENT', '4'),
+        ('taste', 'TASTE_MAX_CONCURRENT', '4'),
+    )
+}
+
+# CACHE_URL shares scraped film reviews and details, film analyses and user scrapes
+# between workers and nodes: memory://, sqlite:///cache.db or redis://host:6379/0
+CACHE_URL = os.getenv("CACHE_URL")
+shared_cache = open_cache(CACHE_URL) if CACHE_URL else None
+CACHE_SCRAPE_TTL = float(os.getenv("CACHE_SCRAPE_TTL", "3600"))
+CACHE_LLM_TTL = float(os.getenv("CACHE_LLM_TTL", "86400"))
+
+# WAREHOUSE_PATH keeps every scraped film and user in a SQLite file that analyses read
+# from. Once WAREHOUSE_REFRESH_SECONDS have passed, only reviews newer than the last
+# crawl are fetched
+WAREHOUSE_PATH = os.getenv("WAREHOUSE_PATH")
+warehouse = (
+    ReviewWarehouse(WAREHOUSE_PATH,
+                    max_age=float(os.getenv("WAREHOUSE_REFRESH_SECONDS", "3600")))
+    if WAREHOUSE_PATH else None
+)
+
+# Scraped user reviews and stats, shared by /roast and /taste for USER_STORE_TTL seconds
+user_store = UserReviewStore(
+    max_users=int(os.getenv("USER_STORE_MAX_USERS", "256")),
+    ttl=float(os.getenv("USER_STORE_TTL", "900")),
+    backend=shared_cache,
+    warehouse=warehouse,
+)
+
+# TASTE_PROFILE_DIR keeps a condensed taste profile per user for /taste, rebuilt after
+# TASTE_PROFILE_TTL seconds or as soon as the user posts a new review
+TASTE_PROFILE_DIR = os.getenv("TASTE_PROFILE_DIR")
+taste_profiles = (
+    TasteProfiles(analyze, JsonStateStore(TASTE_PROFILE_DIR),
+                  ttl=float(os.getenv("TASTE_PROFILE_TTL", "604800")),
+                  fetch_reviews=user_store.reviews)
+    if TASTE_PROFILE_DIR else None
+)
+
+roaster = LetterboxdRoastAnalyzer(
+    stream_generation=LLM_EARLY_ABORT, breakers=breakers, provider=provider)
 
 app = Flask(__name__)
 
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+STREAM_ERRORS = (
+    DeadlineExceeded,
+    KeyError,
+    ValueError,
+    StreamError,
+    RoastGenerationError,
+    UserScraperError,
+    requests.exceptions.RequestException,
+)
+
+
+# Most recent dedup report per film, bounded to DEDUP_REPORTS_MAX films
+DEDUP_REPORTS_MAX = 500
+dedup_reports = OrderedDict()
+# Request threads, run_stages workers and job workers all record reports
+dedup_lock = threading.Lock()
+
+
+@app.before_request
+def start_timing():
+    """Starts timing the request and collecting the time spent in each stage"""
+    g.request_start = time.perf_counter()
+    g.timings = start_request_timings()
+
+
+@app.after_request
+def record_timing(response):
+    """Records the endpoint latency and sends the stage totals as Server-Timing"""
+    seconds = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    registry.observe_endpoint(endpoint, response.status_code, seconds)
+    response.headers['Server-Timing'] = g.timings.server_timing(total=seconds)
+    response.headers['Timing-Allow-Origin'] = '*'
+    return response
+
+
+def deadline_seconds(header):
+    """Returns the request time budget, lowered by an X-Request-Deadline header value.
+    Values that are not a positive finite number are ignored, so a client cannot lift
+    the server deadline with 0, a negative value or nan."""
+    try:
+        seconds = float(header)
+    except (TypeError, ValueError):
+        return REQUEST_DEADLINE_SECONDS
+    if not math.isfinite(seconds) or seconds <= 0:
+        return REQUEST_DEADLINE_SECONDS
+    if REQUEST_DEADLINE_SECONDS <= 0:
+        return seconds
+    return min(REQUEST_DEADLINE_SECONDS, seconds)
+
+
+def with_deadline(view):
+    """Runs a view under the request deadline, answering 504 if it runs out first"""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        with deadline_scope(deadline_seconds(request.headers.get('X-Request-Deadline'))):
+            try:
+                return view(*args, **kwargs)
+            except DeadlineExceeded as error:
+                return jsonify({'error': f'Deadline exceeded: {str(error)}'}), 504
+    return wrapped
+
+
+def with_admission(name):
+    """Runs a view in one of the endpoint's admission slots, answering 503 with a
+    Retry-After header when the endpoint is at capacity. A streamed response holds
+    its slot until it is closed"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            limit = admission[name]
+            try:
+                started = limit.acquire()
+            except Overloaded as error:
+                response = jsonify({'error': str(error)})
+                response.headers['Retry-After'] = str(error.retry_after)
+                return response, 503
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                limit.release(started)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: limit.release(started))
+            else:
+                limit.release(started)
+            return response
+        return wrapped
+    return decorator
+
+
+def with_profiling(view):
+    """Profiles a view when the request asks for it or is sampled, naming the saved
+    profile in an X-Profile-Id header"""
+    @functools.wraps(view)
+    def wrapped(*args, **kwargs):
+        if profiler is None or not profiler.wanted(request.headers.get('X-Profile')):
+            return view(*args, **kwargs)
+        result, profile_id = profiler.run(request.path, lambda: view(*args, **kwargs))
+        response = app.make_response(result)
+        if profile_id is not None:
+            response.headers['X-Profile-Id'] = profile_id
+        return response
+    return wrapped
+
+
+def dedupe_film_reviews(film_url, reviews):
+    """Drops empty and near-duplicate reviews, recording the tokens saved for the film"""
+    kept, report = dedupe_reviews(reviews)
+    with dedup_lock:
+        dedup_reports[film_url] = report
+        dedup_reports.move_to_end(film_url)
+        while len(dedup_reports) > DEDUP_REPORTS_MAX:
+            dedup_reports.popitem(last=False)
+    print(f"Deduplicated {film_url}: kept {report['reviews_kept']} of "
+          f"{report['reviews_in']} reviews, saved ~{report['tokens_saved']} tokens")
+    return kept
+
+
+def cached(key, ttl, compute, keep=bool):
+    """
+    Returns a value from the shared cache, computing and storing it on a miss. A
+    value computed after the request deadline ran out, or rejected by keep, is not
+    stored. Without a shared cache, or when it is unavailable, the value is computed
+    """
+    if shared_cache is None:
+        return compute()
+    try:
+        value = shared_cache.get(key)
+    except CacheError as error:
+        print(f"Shared cache unavailable: {error}")
+        return compute()
+    if value is not None:
+        return value
+    value = compute()
+    if keep(value) and not deadline_expired():
+        try:
+            shared_cache.put(key, value, ttl=ttl)
+        except CacheError as error:
+            print(f"Shared cache unavailable: {error}")
+    return value
+
+
+def film_reviews(film_url, pages=REVIEW_PAGES, progress=None):
+    """
+    Scrapes the reviews of a film, through the shared cache and the warehouse. Only
+    complete crawls are cached, so progress['complete'] is True on a cache hit
+    """
+    progress = {} if progress is None else progress
+
+    def scrape():
+        if warehouse is not None:
+            return warehouse.film_reviews(film_url, pages, progress=progress)
+        return scrape_reviews(film_url, n=pages, progress=progress)
+
+    reviews = cached(f"film_reviews:{pages}:{film_url}", CACHE_SCRAPE_TTL, scrape,
+                     keep=lambda reviews: bool(reviews) and progress.get('complete', True))
+    progress.setdefault('complete', True)
+    return reviews
+
+
+def film_details(film_url):
+    """Scrapes the details of a film, through the shared cache and the warehouse"""
+    if warehouse is not None:
+        return cached(f"movie_details:{film_url}", CACHE_SCRAPE_TTL,
+                      lambda: warehouse.film_details(film_url))
+    return cached(f"movie_details:{film_url}", CACHE_SCRAPE_TTL,
+                  lambda: movie_details_scraper(film_url))
+
+
+def film_analysis(reviews_text):
+    """Summarizes reviews and scores their aspects, cached by the reviews text so
+    workers share the result until the reviews change"""
+    digest = hashlib.sha256(reviews_text.encode()).hexdigest()
+    summary, aspects = cached(
+        f"film_analysis:{digest}", CACHE_LLM_TTL,
+        lambda: analyze.get_results(reviews_text, GEMINI_API_KEY_RIO, GEMINI_API_KEY_SAI),
+        keep=lambda result: bool(result[0] and result[1]))
+    return summary, aspects
+
+
+def read_film_reviews(film_url, pages=REVIEW_PAGES):
+    """Scrapes, deduplicates and formats the reviews of a film"""
+    return analyze.read_reviews(dedupe_film_reviews(film_url, film_reviews(film_url, pages)))
+
+
+# FILM_STATE_DIR keeps each film's last analysis so /movie_details only analyzes new reviews,
+# reading them through the shared cache and the warehouse
+FILM_STATE_DIR = os.getenv("FILM_STATE_DIR")
+refresher = (
+    IncrementalRefresher(analyze, JsonStateStore(FILM_STATE_DIR), pages=REVIEW_PAGES,
+                         reviews=film_reviews)
+    if FILM_STATE_DIR else None
+)
+
+
+def user_taste(username):
+    """
+    Returns the user reviews text for the taste match prompt, and the user's own
+    reviews by lowercase movie name (only known with taste profiles, else empty)
+    """
+    if taste_profiles is None:
+        return analyze.read_user_data(user_store.reviews(username, n_pages=10)), {}
+    return taste_profiles.get(username, GEMINI_API_KEY_RIO)
+
+
+def match_taste(user_reviews, reviews_text, movie_name):
+    """Generates the taste match, skipping the user reviews length check for a taste
+    profile, whose reviews were checked when it was built"""
+    return analyze.get_taste_match_result(
+        user_reviews, reviews_text, movie_name, GEMINI_API_KEY_RIO,
+        profile=taste_profiles is not None)
+
+
+def taste_stages(film_url, username):
+    """
+    Scrapes the film's reviews, its details and the user's reviews concurrently,
+    logging how long each stage took
+
+    Returns:
+        tuple: The film reviews text, the movie name, the user reviews text and the
+            user's own review of the movie (None if they have not reviewed it).
+    """
+    results, timings = run_stages({
+        'film_reviews': lambda: read_film_reviews(film_url, pages=30),
+        'movie_details': lambda: film_details(film_url),
+        'user_reviews': lambda: user_taste(username),
+    })
+    print(f"Taste stages for {username}: {format_timings(timings)}")
+    movie_name = results['movie_details'].get('movie_name')
+    user_reviews, reviewed = results['user_reviews']
+    return results['film_reviews'], movie_name, user_reviews, own_review(reviewed, movie_name)
+
+
+def already_reviewed(review):
+    """Formats the taste match answer for a movie the user has already reviewed"""
+    return f"You've already reviewed this movie! You said - {review}"
+
+
+def sse_event(event, data):
+    """Formats a server-sent event carrying a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_error_message(error):
+    """Describes an error raised mid-stream the same way the JSON endpoints do"""
+    if isinstance(error, KeyError):
+        return 'Invalid JSON format or missing key'
+    if isinstance(error, ValueError):
+        return f'Value error: {str(error)}'
+    if isinstance(error, requests.exceptions.RequestException):
+        return f'Request failed: {str(error)}'
+    return str(error)
+
+
+def sse_error(error):
+    """Formats an error raised mid-stream as an event"""
+    return sse_event('error', {'error': stream_error_message(error)})
+
+
+def ndjson_line(data):
+    """Formats one line of a newline-delimited JSON response"""
+    return json.dumps(data) + '\n'
+
+
+def sse_tokens(tokens, parts, max_words):
+    """
+    Forwards streamed LLM tokens as events, collecting them into parts. Raises
+    StreamTooLong and closes the stream once it goes over max_words, the same
+    limit the JSON routes enforce on the whole text
+    """
+    for token in limit_words(tokens, max_words, StreamTooLong,
+                             f"Response over {max_words} words"):
+        parts.append(token)
+        yield sse_event('token', {'text': token})
+
+
+def sse_response(events):
+    """Wraps an event generator in an unbuffered text/event-stream response"""
+    return Response(
+        events,
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
 @app.route('/movie_details', methods=['POST'])
+@with_admission('movie_details')
+@with_profiling
+@with_deadline
 def scraping_movie_details():
     """Scrapes movie details from a Letterboxd movie page"""
     try:
@@ -41,16 +465,22 @@ def scraping_movie_details():
         if not film_url:
             return jsonify({'error': 'film_url is required'}), 400
 
-        movie_details = movie_details_scraper(film_url)
-        reviews = scrape_reviews(film_url)
-        reviews_text = analyze.read_reviews(reviews)
-        summary, aspects = analyze.get_results(reviews_text,GEMINI_API_KEY_RIO,GEMINI_API_KEY_SAI)
+        movie_details = film_details(film_url)
+        if refresher is not None:
+            summary, aspects, _ = refresher.refresh(
+                film_url, GEMINI_API_KEY_RIO, GEMINI_API_KEY_SAI)
+        else:
+            summary, aspects = film_analysis(read_film_reviews(film_url))
 
-        return jsonify({
+        result = {
             'movie_details': movie_details,
             'summary': summary,
             'aspects': aspects
-        })
+        }
+        if deadline_expired():
+            # The deadline ran out part way: return what was generated in time
+            result['partial'] = True
+        return jsonify(result)
 
     except KeyError:
         return jsonify({'error': 'Invalid JSON format or missing key'}), 400
@@ -60,6 +490,9 @@ def scraping_movie_details():
         return jsonify({'error': f'Request failed: {str(re)}'}), 500
 
 @app.route('/roast', methods=['POST'])
+@with_admission('roast')
+@with_profiling
+@with_deadline
 def username_roast():
     """Roasts the user based on their Letterboxd profile"""
     try:
@@ -69,8 +502,7 @@ def username_roast():
         if not username:
             return jsonify({'error': 'username is required'}), 400
 
-        user_reviews = scrape_user_reviews(username, n_pages=10)
-        user_stats = scrape_user_stats(username)
+        user_reviews, user_stats = user_store.profile(username, n_pages=10)
         roast = roaster.get_results(user_reviews,user_stats,GEMINI_API_KEY_SAI)
 
         return jsonify({
@@ -85,6 +517,9 @@ def username_roast():
         return jsonify({'error': f'Request failed: {str(re)}'}), 500
 
 @app.route('/taste', methods=['POST'])
+@with_admission('taste')
+@with_profiling
+@with_deadline
 def taste_match():
     """Returns whether the movie is of the user's taste"""
     try:
@@ -95,14 +530,10 @@ def taste_match():
         if not username:
             return jsonify({'error': 'username is required'}), 400
 
-        reviews = scrape_reviews(film_url,n=30)
-        reviews_text = analyze.read_reviews(reviews)
-        reviews_user = scrape_user_reviews(username, n_pages=10)
-        user_reviews = analyze.read_user_data(reviews_user)
-        movie_details = movie_details_scraper(film_url)
-        movie_name = movie_details.get('movie_name')
-        taste = analyze.get_taste_match_result(
-            user_reviews,reviews_text, movie_name, GEMINI_API_KEY_RIO)
+        reviews_text, movie_name, user_reviews, review = taste_stages(film_url, username)
+        if review:
+            return jsonify({'taste': already_reviewed(review)})
+        taste = match_taste(user_reviews, reviews_text, movie_name)
 
         return jsonify({
             'taste': taste
@@ -115,5 +546,243 @@ def taste_match():
     except requests.exceptions.RequestException as re:
         return jsonify({'error': f'Request failed: {str(re)}'}), 500
 
+@app.route('/movie_details/stream', methods=['POST'])
+@with_admission('movie_details')
+def stream_movie_details():
+    """Streams the review summary, then the aspects, as server-sent events"""
+    data = request.get_json(silent=True) or {}
+    film_url = data.get('film_url')
+
+    if not film_url:
+        return jsonify({'error': 'film_url is required'}), 400
+    if not validate_letterboxd_film_url(film_url):
+        return jsonify({'error': f'Value error: Invalid URL: {film_url}'}), 400
+
+    def events():
+        yield sse_event('status', {'stage': 'scraping'})
+        try:
+            reviews = dedupe_film_reviews(film_url, film_reviews(film_url))
+            reviews_text = analyze.read_reviews(reviews)
+            tokens = analyze.get_summary_stream(reviews_text, GEMINI_API_KEY_RIO)
+            parts = []
+            try:
+                yield from sse_tokens(tokens, parts, analyze.SUMMARY_WORD_LIMIT)
+                summary = ''.join(parts)
+            except StreamTooLong as error:
+                print(f"Truncated streamed summary: {error}")
+                summary = ''.join(parts)
+            except StreamError as error:
+                print(f"Error streaming summary: {error}")
+                summary = None
+            yield sse_event('summary', {'summary': summary})
+            aspects = analyze.get_aspects(reviews_text, GEMINI_API_KEY_SAI)
+            yield sse_event('aspects', {'aspects': aspects})
+            yield sse_event('done', {})
+        except STREAM_ERRORS as error:
+            yield sse_error(error)
+
+    return sse_response(events())
+
+@app.route('/movie_details/progressive', methods=['POST'])
+@with_admission('movie_details')
+def progressive_movie_details():
+    """
+    Sends the movie details, then the summary, then the aspects as lines of JSON,
+    each as soon as it is ready. The reviews are scraped while the details are fetched
+    """
+    data = request.get_json(silent=True) or {}
+    film_url = data.get('film_url')
+
+    if not film_url:
+        return jsonify({'error': 'film_url is required'}), 400
+    if not validate_letterboxd_film_url(film_url):
+        return jsonify({'error': f'Value error: Invalid URL: {film_url}'}), 400
+    seconds = deadline_seconds(request.headers.get('X-Request-Deadline'))
+
+    def stages(reviews):
+        if refresher is not None:
+            summary, aspects, _ = reviews.result()
+            yield 'summary', summary
+            yield 'aspects', aspects
+        else:
+            yield from analyze.get_results_stages(
+                reviews.result(), GEMINI_API_KEY_RIO, GEMINI_API_KEY_SAI)
+
+    def lines():
+        with deadline_scope(seconds), ThreadPoolExecutor(max_workers=1) as executor:
+            try:
+                if refresher is not None:
+                    reviews = executor.submit(propagate_deadline(refresher.refresh),
+                                              film_url, GEMINI_API_KEY_RIO, GEMINI_API_KEY_SAI)
+                else:
+                    reviews = executor.submit(propagate_deadline(read_film_reviews), film_url)
+                yield ndjson_line({'movie_details': film_details(film_url)})
+                for stage, result in stages(reviews):
+                    yield ndjson_line({stage: result})
+                yield ndjson_line({'done': True, 'partial': deadline_expired()})
+            except STREAM_ERRORS as error:
+                yield ndjson_line({'error': stream_error_message(error)})
+
+    return Response(lines(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/roast/stream', methods=['POST'])
+@with_admission('roast')
+def stream_username_roast():
+    """Streams the roast of a Letterboxd user as server-sent events"""
+    data = request.get_json(silent=True) or {}
+    username = data.get('username')
+
+    if not username:
+        return jsonify({'error': 'username is required'}), 400
+
+    def events():
+        yield sse_event('status', {'stage': 'scraping'})
+        try:
+            user_reviews, user_stats = user_store.profile(username, n_pages=10)
+            tokens = roaster.get_results_stream(user_reviews, user_stats, GEMINI_API_KEY_SAI)
+            parts = []
+            yield from sse_tokens(tokens, parts, roaster.ROAST_WORD_LIMIT)
+            yield sse_event('done', {'roast': ''.join(parts)})
+        except STREAM_ERRORS as error:
+            yield sse_error(error)
+
+    return sse_response(events())
+
+@app.route('/taste/stream', methods=['POST'])
+@with_admission('taste')
+def stream_taste_match():
+    """Streams the taste match of a user and a movie as server-sent events"""
+    data = request.get_json(silent=True) or {}
+    film_url = data.get('film_url')
+    username = data.get('username')
+
+    if not username:
+        return jsonify({'error': 'username is required'}), 400
+    if not film_url or not validate_letterboxd_film_url(film_url):
+        return jsonify({'error': f'Value error: Invalid URL: {film_url}'}), 400
+
+    def events():
+        yield sse_event('status', {'stage': 'scraping'})
+        try:
+            reviews_text, movie_name, user_reviews, review = taste_stages(film_url, username)
+            if review:
+                tokens = iter([already_reviewed(review)])
+            else:
+                tokens = analyze.get_taste_match_stream(
+                    user_reviews, reviews_text, movie_name, GEMINI_API_KEY_RIO,
+                    profile=taste_profiles is not None)
+            parts = []
+            yield from sse_tokens(tokens, parts, analyze.SUMMARY_WORD_LIMIT)
+            yield sse_event('done', {'taste': ''.join(parts)})
+        except STREAM_ERRORS as error:
+            yield sse_error(error)
+
+    return sse_response(events())
+
+JOB_VIEWS = {
+    'movie_details': scraping_movie_details,
+    'roast': username_roast,
+    'taste': taste_match,
+}
+
+
+def run_view_job(kind, data):
+    """Builds a job running an endpoint on a JSON body, returning its JSON and status"""
+    def run():
+        with app.test_request_context(f'/{kind}', method='POST', json=data):
+            response = app.make_response(JOB_VIEWS[kind]())
+            return response.get_json(), response.status_code
+    return run
+
+@app.route('/jobs/<kind>', methods=['POST'])
+def submit_job(kind):
+    """Queues a /movie_details, /roast or /taste request and returns its job id"""
+    if kind not in JOB_VIEWS:
+        return jsonify({'error': f'Unknown job type: {kind}'}), 404
+    data = request.get_json(silent=True) or {}
+    try:
+        job_id = jobs.submit(kind, run_view_job(kind, data))
+    except JobQueueFull as error:
+        return jsonify({'error': str(error)}), 503
+    return jsonify({
+        'job_id': job_id,
+        'status': 'queued',
+        'status_url': f'/jobs/{job_id}',
+        'events_url': f'/jobs/{job_id}/events',
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Returns a job, waiting up to ?wait= seconds (at most 60) for it to finish"""
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), 60)
+    except ValueError:
+        return jsonify({'error': 'wait must be a number of seconds'}), 400
+    job = jobs.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Streams a job's status changes, ending with its result, as server-sent events"""
+    if jobs.get(job_id) is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+    return sse_response(sse_event(job['status'], job) for job in jobs.changes(job_id))
+
+@app.route('/stats/jobs', methods=['GET'])
+def job_stats():
+    """Reports the number of jobs in each status"""
+    return jsonify(jobs.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics_page():
+    """Exposes stage and endpoint latency histograms and the load of each admission
+    limit in the Prometheus text format"""
+    return Response(registry.render() + render_admission(admission),
+                    content_type='text/plain; version=0.0.4')
+
+@app.route('/stats/admission', methods=['GET'])
+def admission_stats():
+    """Reports the concurrency limit and current load of each endpoint"""
+    return jsonify({name: limit.stats() for name, limit in admission.items()})
+
+@app.route('/stats/warehouse', methods=['GET'])
+def warehouse_stats():
+    """Reports the films, users and reviews kept in the review warehouse"""
+    if warehouse is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **warehouse.stats()})
+
+@app.route('/stats/hedging', methods=['GET'])
+def hedging_stats():
+    """Reports how often hedged Gemini requests fire"""
+    if hedger is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, 'calls': hedger.stats()})
+
+@app.route('/stats/user_store', methods=['GET'])
+def user_store_stats():
+    """Reports the size and hit rates of the shared user review store, and the age
+    of a user's cached reviews and stats when ?username= is given"""
+    metrics = user_store.metrics()
+    username = request.args.get('username')
+    if username:
+        metrics['freshness'] = user_store.freshness(username)
+    return jsonify(metrics)
+
+@app.route('/stats/circuits', methods=['GET'])
+def circuit_stats():
+    """Reports the state of the Gemini model and API key circuit breakers"""
+    return jsonify({'circuits': breakers.states()})
+
+@app.route('/stats/dedup', methods=['GET'])
+def dedup_stats():
+    """Reports the reviews dropped and prompt tokens saved per film by deduplication"""
+    with dedup_lock:
+        films = dict(dedup_reports)
+    return jsonify({'films': films})
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=5515, debug=True)
@@ -0,0 +1,263 @@
+"""
+ASGI entry point serving /movie_details, /roast and /taste from an event loop.
+
+Each request awaits its scraping and LLM stages, running independent stages
+concurrently, so one process can hold many slow requests open at once. The
+blocking scrapers and Gemini client run in a thread pool of ASGI_THREADS threads
+and the event loop itself never blocks. Responses, errors and the per-endpoint
+admission limits match the Flask app.
+
+Run with an ASGI server, e.g. `uvicorn src.asgi:application --port 5515`. The
+streaming, job and stats routes are only served by the Flask app (src/app.py).
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from src.app import (
+    GEMINI_API_KEY_RIO,
+    GEMINI_API_KEY_SAI,
+    admission,
+    already_reviewed,
+    deadline_seconds,
+    film_analysis,
+    film_details,
+    match_taste,
+    read_film_reviews,
+    refresher,
+    roaster,
+    taste_stages,
+    user_store,
+)
+from src.helpers.admission import Overloaded
+from src.helpers.deadlines import DeadlineExceeded, deadline_expired, deadline_scope
+from src.helpers.metrics import registry, start_request_timings
+
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", "64"))
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"Content-Type, X-Request-Deadline"),
+    (b"access-control-allow-methods", b"POST, OPTIONS"),
+]
+
+
+class HTTPError(Exception):
+    """Custom exception for requests answered with an error status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def run_blocking(func, *args):
+    """
+    Runs a blocking function in the thread pool, under the request deadline.
+
+    Args:
+        func (callable): The scraper or LLM call.
+        *args: Its arguments.
+
+    Returns:
+        asyncio.Future: Resolves to the function's return value.
+    """
+    return asyncio.to_thread(func, *args)
+
+
+def error_response(error):
+    """
+    Maps an exception to the same JSON error and status as the Flask endpoints.
+
+    Args:
+        error (Exception): The exception raised by the endpoint.
+
+    Returns:
+        tuple: The JSON body (dict) and the status code (int).
+    """
+    if isinstance(error, HTTPError):
+        return {"error": str(error)}, error.status
+    if isinstance(error, DeadlineExceeded):
+        return {"error": f"Deadline exceeded: {str(error)}"}, 504
+    if isinstance(error, KeyError):
+        return {"error": "Invalid JSON format or missing key"}, 400
+    if isinstance(error, ValueError):
+        return {"error": f"Value error: {str(error)}"}, 400
+    if isinstance(error, requests.exceptions.RequestException):
+        return {"error": f"Request failed: {str(error)}"}, 500
+    print(f"Unhandled error: {error}")
+    return {"error": "Internal server error"}, 500
+
+
+def required(data, field):
+    """Returns a field of the JSON body, raising a 400 error if it is missing."""
+    value = data.get(field)
+    if not value:
+        raise HTTPError(400, f"{field} is required")
+    return value
+
+
+async def movie_details(data):
+    """Scrapes the movie details and summarizes its reviews, concurrently."""
+    film_url = required(data, "film_url")
+    if refresher is not None:
+        details, (summary, aspects, _) = await asyncio.gather(
+            run_blocking(film_details, film_url),
+            run_blocking(refresher.refresh, film_url, GEMINI_API_KEY_RIO, GEMINI_API_KEY_SAI),
+        )
+    else:
+        details, reviews_text = await asyncio.gather(
+            run_blocking(film_details, film_url),
+            run_blocking(read_film_reviews, film_url),
+        )
+        summary, aspects = await run_blocking(film_analysis, reviews_text)
+    result = {"movie_details": details, "summary": summary, "aspects": aspects}
+    if deadline_expired():
+        result["partial"] = True
+    return result
+
+
+async def roast(data):
+    """Scrapes a user's reviews and stats concurrently, then roasts them."""
+    username = required(data, "username")
+    user_reviews, user_stats = await run_blocking(user_store.profile, username, 10)
+    return {"roast": await run_blocking(
+        roaster.get_results, user_reviews, user_stats, GEMINI_API_KEY_SAI)}
+
+
+async def taste(data):
+    """Gathers the film's reviews and details and the user's reviews, then matches them."""
+    username = required(data, "username")
+    film_url = data.get("film_url")
+    reviews_text, movie_name, user_reviews, review = await run_blocking(
+        taste_stages, film_url, username)
+    if review:
+        return {"taste": already_reviewed(review)}
+    return {"taste": await run_blocking(match_taste, user_reviews, reviews_text, movie_name)}
+
+
+ROUTES = {
+    "/movie_details": movie_details,
+    "/roast": roast,
+    "/taste": taste,
+}
+
+
+async def read_body(receive):
+    """Reads the full request body from the ASGI receive channel."""
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def send_json(send, status, payload, server_timing, headers=()):
+    """Sends a JSON response with the CORS and Server-Timing headers of the Flask app."""
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"server-timing", server_timing.encode()),
+                    (b"timing-allow-origin", b"*")] + CORS_HEADERS + list(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def handle(scope, receive):
+    """
+    Runs the endpoint for a request under its deadline, in one of the endpoint's
+    admission slots.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        receive (callable): The ASGI receive channel.
+
+    Returns:
+        tuple: The JSON body (dict), the status code (int) and extra headers (list).
+    """
+    endpoint = ROUTES.get(scope["path"])
+    if endpoint is None:
+        return {"error": f"Not found: {scope['path']}"}, 404, []
+    if scope["method"] != "POST":
+        return {"error": f"Method not allowed: {scope['method']}"}, 405, []
+    limit = admission[scope["path"].strip("/")]
+    try:
+        # Waiting for a slot blocks, so it happens off the event loop
+        started = await run_blocking(limit.acquire)
+    except Overloaded as error:
+        return {"error": str(error)}, 503, [(b"retry-after", str(error.retry_after).encode())]
+    try:
+        return (*await run_endpoint(endpoint, scope, receive), [])
+    finally:
+        limit.release(started)
+
+
+async def run_endpoint(endpoint, scope, receive):
+    """
+    Runs an endpoint handler under the request deadline.
+
+    Args:
+        endpoint (callable): The handler.
+        scope (dict): The ASGI connection scope.
+        receive (callable): The ASGI receive channel.
+
+    Returns:
+        tuple: The JSON body (dict) and the status code (int).
+    """
+    headers = dict(scope.get("headers", []))
+    header = headers.get(b"x-request-deadline")
+    with deadline_scope(deadline_seconds(header.decode() if header else None)):
+        try:
+            data = json.loads(await read_body(receive) or b"null")
+            if not isinstance(data, dict):
+                raise HTTPError(400, "Invalid JSON format or missing key")
+            return await endpoint(data), 200
+        except json.JSONDecodeError:
+            return {"error": "Invalid JSON format or missing key"}, 400
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            return error_response(error)
+
+
+async def lifespan(receive, send):
+    """Sizes the thread pool the blocking stages run in at startup."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            asyncio.get_running_loop().set_default_executor(
+                ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix="asgi"))
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    """
+    The ASGI application.
+
+    Args:
+        scope (dict): The ASGI connection scope.
+        receive (callable): The ASGI receive channel.
+        send (callable): The ASGI send channel.
+    """
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["method"] == "OPTIONS":
+        await send({"type": "http.response.start", "status": 204, "headers": CORS_HEADERS})
+        await send({"type": "http.response.body", "body": b""})
+        return
+    start = time.perf_counter()
+    timings = start_request_timings()
+    payload, status, headers = await handle(scope, receive)
+    seconds = time.perf_counter() - start
+    registry.observe_endpoint(scope["path"], status, seconds)
+    await send_json(send, status, payload, timings.server_timing(total=seconds), headers)
@@ -0,0 +1,115 @@
+"""
+Exports the review warehouse (WAREHOUSE_PATH) to Parquet datasets for offline
+analytics, appending only what was crawled since the last export unless --full is
+given, and prints the throughput of each dataset.
+
+With --synthetic N, a temporary warehouse of N generated film reviews is exported
+instead, in full and then incrementally after a second crawl, to measure the
+throughput of large exports.
+
+Usage:
+    python -m src.export_reviews --out exports/
+    python -m src.export_reviews --out exports/ --full
+    python -m src.export_reviews --synthetic 1000000 --films 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.helpers.columnar_export import ColumnarExporter, read_dataset
+from src.helpers.fake_letterboxd import VOCABULARY
+from src.helpers.review_warehouse import ReviewWarehouse
+
+RATINGS = ("½", "★", "★½", "★★", "★★½", "★★★", "★★★½", "★★★★", "★★★★½", "★★★★★", None)
+
+
+def format_report(report):
+    """Formats an export report as a table."""
+    lines = [f"{'dataset':<15}{'rows':>11}{'files':>8}{'MB':>9}{'seconds':>9}{'rows/s':>11}"]
+    for name, row in report.items():
+        lines.append(
+            f"{name:<15}{row['rows']:>11}{row['files']:>8}{row['bytes'] / 1e6:>9.1f}"
+            f"{row['seconds']:>9.2f}{row['rows_per_second']:>11}")
+    return "\n".join(lines)
+
+
+def fill_warehouse(warehouse, reviews, films, seed=0):
+    """
+    Stores generated film reviews, as if every film had been crawled.
+
+    Args:
+        warehouse (ReviewWarehouse): The warehouse to fill.
+        reviews (int): Number of reviews, spread evenly over the films.
+        films (int): Number of films.
+        seed (int, optional): Seed of the generated text. Defaults to 0.
+    """
+    rng = random.Random(seed)
+    per_film = max(1, reviews // films)
+    for film in range(films):
+        warehouse.store_reviews("film", f"https://letterboxd.com/film/film-{film}/", [
+            {"rating": rng.choice(RATINGS),
+             "review_text": " ".join(rng.choices(VOCABULARY, k=rng.randint(5, 80)))}
+            for _ in range(per_film)
+        ], pages=1, prepend=False)
+        warehouse.store_document("film_details", f"https://letterboxd.com/film/film-{film}/", {
+            "movie_name": f"Film {film}", "year": str(1950 + film % 75),
+            "genres": rng.choice(("Drama", "Comedy", "Horror")),
+        })
+
+
+def synthetic_benchmark(options):
+    """Exports a generated warehouse in full, then incrementally, printing both reports."""
+    with tempfile.TemporaryDirectory() as directory:
+        warehouse = ReviewWarehouse(os.path.join(directory, "warehouse.db"))
+        start = time.perf_counter()
+        fill_warehouse(warehouse, options.synthetic, options.films)
+        print(f"Generated {options.synthetic} reviews of {options.films} films "
+              f"in {time.perf_counter() - start:.1f}s")
+        output = os.path.join(directory, "export")
+        exporter = ColumnarExporter(warehouse.path, output, batch_size=options.batch_size)
+        print("Full export:")
+        print(format_report(exporter.export(incremental=False)))
+
+        # A second crawl of a tenth of the films, exported incrementally
+        fill_warehouse(warehouse, options.synthetic // 10, max(1, options.films // 10), seed=1)
+        print("Incremental export after recrawling a tenth of the films:")
+        print(format_report(exporter.export(incremental=True)))
+        rows = read_dataset(os.path.join(output, "film_reviews")).count_rows()
+        print(f"film_reviews dataset now holds {rows} rows")
+
+
+def main(argv=None):
+    """
+    Runs the export.
+
+    Returns:
+        int: 1 if there is no warehouse to export, else 0.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--warehouse", default=os.getenv("WAREHOUSE_PATH"),
+                        help="warehouse SQLite file, defaults to WAREHOUSE_PATH")
+    parser.add_argument("--out", default="exports", help="output directory")
+    parser.add_argument("--full", action="store_true",
+                        help="rewrite the datasets instead of appending")
+    parser.add_argument("--batch-size", type=int, default=50000)
+    parser.add_argument("--synthetic", type=int, help="export N generated reviews instead")
+    parser.add_argument("--films", type=int, default=1000, help="films of --synthetic")
+    options = parser.parse_args(argv)
+
+    if options.synthetic:
+        synthetic_benchmark(options)
+        return 0
+    if not options.warehouse or not os.path.exists(options.warehouse):
+        print("No warehouse to export, set WAREHOUSE_PATH or pass --warehouse")
+        return 1
+    exporter = ColumnarExporter(options.warehouse, options.out, batch_size=options.batch_size)
+    print(format_report(exporter.export(incremental=not options.full)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
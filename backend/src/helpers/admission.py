@@ -0,0 +1,160 @@
+"""
+Admission control: each endpoint runs at most a fixed number of requests at once,
+with a short bounded queue in front. Requests arriving when the queue is full, or
+still waiting when their wait runs out, are shed straight away so the admitted ones
+keep their latency during a traffic spike.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Overloaded(Exception):
+    """Custom exception for requests shed because an endpoint is at capacity."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionLimit:
+    """A concurrency limit with a bounded wait queue for one endpoint."""
+
+    def __init__(self, name, max_concurrent, max_waiting=0, max_wait=5.0):
+        """
+        Initialize the limit.
+
+        Args:
+            name (str): The endpoint, used in messages and metrics.
+            max_concurrent (int): Requests served at once, 0 for no limit.
+            max_waiting (int, optional): Requests allowed to wait for a free slot.
+                Defaults to 0.
+            max_wait (float, optional): Seconds a request waits before it is shed.
+                Defaults to 5.0.
+        """
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        # Moving average of how long an admitted request holds its slot
+        self.service_seconds = 1.0
+
+    def retry_after(self):
+        """
+        Estimates when a slot should be free, from the queue length and the average
+        time a request holds its slot. Called with the condition held.
+
+        Returns:
+            int: Seconds to wait before retrying, between 1 and 60.
+        """
+        if not self.max_concurrent:
+            return 1
+        seconds = self.service_seconds * (self.waiting + 1) / self.max_concurrent
+        return min(60, max(1, math.ceil(seconds)))
+
+    def reject(self, reason):
+        """Counts a shed request and builds its exception. Called with the condition held."""
+        self.rejected += 1
+        return Overloaded(f"{self.name} is {reason}, try again later", self.retry_after())
+
+    def acquire(self):
+        """
+        Takes a slot, waiting up to max_wait for one if the queue has room.
+
+        Returns:
+            float: The time the slot was taken, to pass to release.
+
+        Raises:
+            Overloaded: If the queue is full or no slot freed up in time.
+        """
+        with self.condition:
+            if self.max_concurrent and self.in_flight >= self.max_concurrent:
+                if self.waiting >= self.max_waiting:
+                    raise self.reject("at capacity")
+                self.waiting += 1
+                try:
+                    free = self.condition.wait_for(
+                        lambda: self.in_flight < self.max_concurrent, timeout=self.max_wait)
+                finally:
+                    self.waiting -= 1
+                if not free:
+                    raise self.reject("busy")
+            self.in_flight += 1
+            self.admitted += 1
+        return time.monotonic()
+
+    def release(self, started):
+        """
+        Frees a slot and wakes one waiting request.
+
+        Args:
+            started (float): The time returned by acquire.
+        """
+        seconds = time.monotonic() - started
+        with self.condition:
+            self.in_flight -= 1
+            self.service_seconds = 0.8 * self.service_seconds + 0.2 * seconds
+            self.condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """
+        Holds a slot for the duration of the block.
+
+        Raises:
+            Overloaded: If the request is shed.
+        """
+        started = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(started)
+
+    def stats(self):
+        """
+        Reports the limit and its current load.
+
+        Returns:
+            dict: max_concurrent, max_waiting, in_flight, waiting, admitted and rejected.
+        """
+        with self.condition:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_waiting": self.max_waiting,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
+
+
+def render_admission(limits):
+    """
+    Formats the load of each limit in the Prometheus text exposition format.
+
+    Args:
+        limits (dict): AdmissionLimit per endpoint.
+
+    Returns:
+        str: The metrics lines.
+    """
+    stats = {name: limit.stats() for name, limit in sorted(limits.items())}
+    families = (
+        ("letterboxd_admission_in_flight", "gauge", "in_flight", "Requests being served"),
+        ("letterboxd_admission_waiting", "gauge", "waiting", "Requests waiting for a slot"),
+        ("letterboxd_admission_rejected_total", "counter", "rejected",
+         "Requests shed with 503"),
+    )
+    lines = []
+    for metric, kind, key, description in families:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"]
+        lines += [f'{metric}{{endpoint="{name}"}} {values[key]}'
+                  for name, values in stats.items()]
+    return "\n".join(lines) + "\n"
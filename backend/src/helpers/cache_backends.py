@@ -0,0 +1,335 @@
+"""
+Cache backends for scraped pages, LLM outputs and user data. The in-memory backend
+is private to one process; the SQLite backend is shared by the workers of one
+machine, and the Redis backend by every node pointed at the same server. Values
+are stored as JSON, so tuples come back as lists.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+
+class CacheError(Exception):
+    """Custom exception for cache servers that cannot be reached or answer an error."""
+
+
+class CacheBackend:
+    """
+    Interface of a cache of JSON values by string key.
+
+    Subclasses implement `get`, `put` and `delete`. A value past its TTL is gone.
+    """
+
+    def get(self, key):
+        """
+        Reads a value.
+
+        Args:
+            key (str): The key, e.g. 'movie_details:<film url>'.
+
+        Returns:
+            The stored value, or None if it is missing or expired.
+        """
+        raise NotImplementedError
+
+    def put(self, key, value, ttl=None):
+        """
+        Stores a value, replacing the previous one.
+
+        Args:
+            key (str): The key.
+            value: A JSON-serializable value.
+            ttl (float, optional): Seconds the value is kept, forever if None.
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Removes a value if it is stored."""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """A bounded least-recently-used cache private to the process."""
+
+    def __init__(self, max_entries=1024, clock=time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int, optional): Values kept before the least recently used
+                is evicted. Defaults to 1024.
+            clock (callable, optional): Returns the current time in seconds.
+                Defaults to time.monotonic.
+        """
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            data, expires = entry
+            if expires is not None and expires <= self.clock():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        return json.loads(data)
+
+    def put(self, key, value, ttl=None):
+        data = json.dumps(value)
+        with self.lock:
+            self.entries[key] = (data, None if ttl is None else self.clock() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    A cache in a SQLite file, shared by every process on the machine that opens it.
+    A locked, read-only or corrupt file raises CacheError like an unreachable server.
+    """
+
+    def __init__(self, path, clock=time.time):
+        """
+        Initialize the cache, creating the database file if needed.
+
+        Args:
+            path (str): The database file.
+            clock (callable, optional): Returns the wall clock time in seconds, which
+                every process must agree on. Defaults to time.time.
+        """
+        self.path = path
+        self.clock = clock
+        self.local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)")
+
+    def connection(self):
+        """Returns this thread's connection, opening it on first use."""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            # Readers do not block the writer, so workers can share the file
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def get(self, key):
+        try:
+            row = self.connection().execute(
+                "SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as error:
+            raise CacheError(f"Cache read failed: {error}") from error
+        if row is None:
+            return None
+        data, expires = row
+        if expires is not None and expires <= self.clock():
+            self.delete(key)
+            return None
+        return json.loads(data)
+
+    def put(self, key, value, ttl=None):
+        expires = None if ttl is None else self.clock() + ttl
+        try:
+            with self.connection() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires))
+        except sqlite3.Error as error:
+            raise CacheError(f"Cache write failed: {error}") from error
+
+    def delete(self, key):
+        try:
+            with self.connection() as connection:
+                connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+        except sqlite3.Error as error:
+            raise CacheError(f"Cache delete failed: {error}") from error
+
+    def prune(self):
+        """
+        Deletes expired values.
+
+        Returns:
+            int: The number of values deleted.
+
+        Raises:
+            CacheError: If the database cannot be written.
+        """
+        try:
+            with self.connection() as connection:
+                return connection.execute(
+                    "DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?",
+                    (self.clock(),)).rowcount
+        except sqlite3.Error as error:
+            raise CacheError(f"Cache prune failed: {error}") from error
+
+
+def encode_command(*args):
+    """Encodes a command as a RESP array of bulk strings."""
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def read_reply(reader):
+    """
+    Reads one RESP reply.
+
+    Args:
+        reader (io.BufferedReader): The socket's read buffer.
+
+    Returns:
+        The reply: bytes for bulk strings, str for simple strings, int or list, and
+            None for a null reply.
+
+    Raises:
+        CacheError: If the server answers an error.
+        ConnectionError: If the server closes the connection.
+    """
+    line = reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by the cache server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        raise CacheError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        if int(body) < 0:
+            return None
+        data = reader.read(int(body) + 2)
+        return data[:-2]
+    if kind == b"*":
+        if int(body) < 0:
+            return None
+        return [read_reply(reader) for _ in range(int(body))]
+    raise CacheError(f"Unexpected reply from the cache server: {line!r}")
+
+
+class RedisCache(CacheBackend):
+    """
+    A cache on a server speaking the Redis protocol (Redis, Valkey, KeyDB), shared
+    by every node connected to it. Only GET, SET with PX, DEL and SELECT are sent,
+    over one connection per thread, so no client library is needed.
+    """
+
+    def __init__(self, host="localhost", port=6379, db=0, prefix="letterboxd:", timeout=1.0):
+        """
+        Initialize the cache. Connections are opened on first use.
+
+        Args:
+            host (str, optional): The server host. Defaults to 'localhost'.
+            port (int, optional): The server port. Defaults to 6379.
+            db (int, optional): The database number. Defaults to 0.
+            prefix (str, optional): Prepended to every key. Defaults to 'letterboxd:'.
+            timeout (float, optional): Seconds to wait for the server. Defaults to 1.0.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.address = (host, port)
+        self.db = db
+        self.prefix = prefix
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def command(self, *args):
+        """
+        Sends a command and reads its reply, reconnecting once if the connection
+        was dropped.
+
+        Returns:
+            The reply, as read_reply returns it.
+
+        Raises:
+            CacheError: If the server cannot be reached or answers an error.
+        """
+        for attempt in range(2):
+            try:
+                sock, reader = self.connect()
+                sock.sendall(encode_command(*args))
+                return read_reply(reader)
+            except OSError as error:
+                # A reply may be left half read, so the connection is not reused
+                self.close()
+                if attempt:
+                    raise CacheError(f"Cache command {args[0]} failed: {error}") from error
+        return None
+
+    def connect(self):
+        """Returns this thread's socket and read buffer, connecting on first use."""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+            connection = (sock, sock.makefile("rb"))
+            self.local.connection = connection
+            if self.db:
+                self.command("SELECT", self.db)
+        return connection
+
+    def close(self):
+        """Closes this thread's connection."""
+        connection = getattr(self.local, "connection", None)
+        self.local.connection = None
+        if connection is not None:
+            connection[1].close()
+            connection[0].close()
+
+    def get(self, key):
+        data = self.command("GET", self.prefix + key)
+        return None if data is None else json.loads(data)
+
+    def put(self, key, value, ttl=None):
+        args = ["SET", self.prefix + key, json.dumps(value)]
+        if ttl is not None:
+            args += ["PX", max(1, int(ttl * 1000))]
+        self.command(*args)
+
+    def delete(self, key):
+        self.command("DEL", self.prefix + key)
+
+
+def open_cache(url):
+    """
+    Opens a cache backend from a URL.
+
+    Args:
+        url (str): 'memory://', 'sqlite:///relative/cache.db',
+            'sqlite:////absolute/cache.db' or 'redis://host:port/db'.
+
+    Returns:
+        CacheBackend: The backend.
+
+    Raises:
+        ValueError: If the scheme is not supported.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryCache()
+    if parsed.scheme == "sqlite":
+        return SQLiteCache(parsed.path[1:])
+    if parsed.scheme == "redis":
+        return RedisCache(host=parsed.hostname or "localhost", port=parsed.port or 6379,
+                          db=int(parsed.path.strip("/") or 0))
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,228 @@
+"""
+Circuit breakers around Gemini models and API keys, so that a failing model
+or key is skipped straight away instead of paying its timeout on every request.
+"""
+
+import hashlib
+import threading
+import time
+
+from src.helpers.metrics import timed_stage
+
+
+class CircuitOpenError(Exception):
+    """Custom exception for calls skipped because their circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    A circuit that opens after consecutive failures and, once reset_timeout has
+    passed, lets a single probe call through (half-open) to decide whether to
+    close again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open the
+                circuit. Defaults to 3.
+            reset_timeout (float, optional): Seconds to stay open before probing.
+                Defaults to 30.0.
+            clock (callable, optional): Returns the current time in seconds.
+                Defaults to time.monotonic.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Returns the current state of the circuit."""
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self):
+        """
+        Checks whether a call may go through, reserving the probe if half-open.
+
+        Returns:
+            bool: True if the call may go ahead.
+        """
+        with self.lock:
+            state = self.state
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def release(self):
+        """Gives back a probe reserved by allow() that was never used."""
+        with self.lock:
+            self.probing = False
+
+    def record_success(self):
+        """Closes the circuit after a successful call."""
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        """Counts a failed call, opening the circuit at the threshold or on a failed probe."""
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.probing = False
+
+
+class CircuitBreakerRegistry:
+    """Keeps one circuit breaker per Gemini model and one per API key."""
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, clock=time.monotonic):
+        """
+        Initialize the registry.
+
+        Args:
+            failure_threshold (int, optional): Consecutive failures that open a
+                circuit. Defaults to 3.
+            reset_timeout (float, optional): Seconds a circuit stays open before
+                probing. Defaults to 30.0.
+            clock (callable, optional): Returns the current time in seconds.
+                Defaults to time.monotonic.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key_name(api_key):
+        """Returns a circuit name for an API key that does not reveal the key."""
+        digest = hashlib.sha256(str(api_key).encode()).hexdigest()[:8]
+        return f"key:{digest}"
+
+    def breaker(self, name):
+        """Returns the circuit breaker called name, creating it if needed."""
+        with self.lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout, self.clock
+                )
+            return self.breakers[name]
+
+    def call(self, model_name, api_key, func, stream=False):
+        """
+        Runs func if neither the model nor the key circuit is open.
+
+        Args:
+            model_name (str): The Gemini model being called.
+            api_key (str): The API key being used.
+            func (callable): The call to make, without arguments.
+            stream (bool, optional): func returns an iterator of chunks; the call
+                only succeeds once it has been read to the end. Defaults to False.
+
+        Returns:
+            The result of func, wrapped to record its outcome if it is a stream.
+
+        Raises:
+            CircuitOpenError: If either circuit is open; func is not called.
+        """
+        key_breaker = self.breaker(self.key_name(api_key))
+        model_breaker = self.breaker(f"model:{model_name}")
+        if not key_breaker.allow():
+            raise CircuitOpenError(f"Circuit open for API key {self.key_name(api_key)}")
+        if not model_breaker.allow():
+            key_breaker.release()
+            raise CircuitOpenError(f"Circuit open for model {model_name}")
+        try:
+            result = func()
+        except Exception:
+            key_breaker.record_failure()
+            model_breaker.record_failure()
+            raise
+        if stream:
+            return self.watch(result, (key_breaker, model_breaker))
+        key_breaker.record_success()
+        model_breaker.record_success()
+        return result
+
+    @staticmethod
+    def watch(chunks, breakers):
+        """
+        Passes the chunks of a stream through, recording a success once it has been
+        read to the end and a failure if it raises part way.
+
+        Args:
+            chunks (iterator): The stream.
+            breakers (tuple): The circuit breakers the call went through.
+
+        Yields:
+            The chunks of the stream.
+        """
+        try:
+            yield from chunks
+        except GeneratorExit:
+            # Abandoned by the reader (e.g. a cancelled hedge): no verdict either way
+            for breaker in breakers:
+                breaker.release()
+            raise
+        except Exception:
+            for breaker in breakers:
+                breaker.record_failure()
+            raise
+        for breaker in breakers:
+            breaker.record_success()
+
+    def states(self):
+        """
+        Reports the state of every circuit.
+
+        Returns:
+            dict: Circuit name mapped to its state and consecutive failures.
+        """
+        with self.lock:
+            breakers = dict(self.breakers)
+        return {
+            name: {"state": breaker.state, "failures": breaker.failures}
+            for name, breaker in breakers.items()
+        }
+
+
+def guarded_call(breakers, model_name, api_key, func, stream=False):
+    """
+    Runs func through the circuit breakers, or directly if there are none, timing
+    it as the llm stage (up to the first chunk for streamed calls).
+
+    Args:
+        breakers (CircuitBreakerRegistry): The registry to use, or None.
+        model_name (str): The Gemini model being called.
+        api_key (str): The API key being used.
+        func (callable): The call to make, without arguments.
+        stream (bool, optional): func returns a stream, judged once it has been
+            read. Defaults to False.
+
+    Returns:
+        The result of func.
+    """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    with timed_stage("llm"):
+        if breakers is None:
+            return func()
+        return breakers.call(model_name, api_key, func, stream=stream)
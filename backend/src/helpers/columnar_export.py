@@ -0,0 +1,298 @@
+"""
+Columnar export of the review warehouse for offline analytics: film reviews, user
+reviews and movie details are written as Parquet datasets, partitioned by film and
+crawl date in the hive layout (film=<slug>/date=<YYYY-MM-DD>/). Ratings, film slugs
+and usernames are dictionary-encoded. Exports stream rows from SQLite in batches,
+so memory use does not grow with the warehouse.
+
+In incremental mode only rows written since the previous export are written, as new
+files next to the existing ones; nothing is rewritten. A review crawled again shows
+up once per crawl, readers keep the latest crawled_at per review_key. The watermark
+is the warehouse's write sequence number, which increases in commit order: a crawl
+can wait for the write lock after taking its crawled_at, so a watermark on
+crawled_at would skip a crawl committed after a later-stamped one.
+"""
+
+import functools
+import json
+import os
+import re
+import shutil
+import sqlite3
+import time
+import uuid
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+DICTIONARY = pa.dictionary(pa.int32(), pa.string())
+TIMESTAMP = pa.timestamp("ms", tz="UTC")
+
+FILM_SLUG = re.compile(r"/film/([^/]+)/")
+
+STATE_FILE = "_export_state.json"
+# Version 2 watermarks are write sequence numbers; version 1 ones were crawled_at
+STATE_VERSION = 2
+
+REVIEW_PARTITIONING = pa.schema([("film", DICTIONARY), ("date", pa.string())])
+DETAILS_PARTITIONING = pa.schema([("date", pa.string())])
+
+DETAIL_FIELDS = ("movie_name", "year", "director", "genres", "synopsis", "backdrop_image_url")
+
+
+@functools.lru_cache(maxsize=65536)
+def film_slug(url):
+    """Returns the slug of a Letterboxd film URL, 'unknown' if there is none."""
+    match = FILM_SLUG.search(url or "")
+    return match.group(1) if match else "unknown"
+
+
+@functools.lru_cache(maxsize=4096)
+def utc_date(day):
+    """Formats a day number since the epoch as a date."""
+    return time.strftime("%Y-%m-%d", time.gmtime(day * 86400))
+
+
+def crawl_date(seconds):
+    """Formats a crawl time as its UTC date, the date partition."""
+    return utc_date(int(seconds // 86400))
+
+
+def film_review_columns(rows):
+    """Turns film_reviews rows into the columns of the film reviews dataset."""
+    film_urls, keys, positions, ratings, texts, crawled, _ = zip(*rows)
+    return {
+        "film": [film_slug(url) for url in film_urls],
+        "date": [crawl_date(seconds) for seconds in crawled],
+        "film_url": film_urls,
+        "review_key": keys,
+        "position": positions,
+        "rating": ratings,
+        "review_text": texts,
+        "crawled_at": [int(seconds * 1000) for seconds in crawled],
+    }
+
+
+def user_review_columns(rows):
+    """Turns user_reviews rows into the columns of the user reviews dataset."""
+    (usernames, keys, positions, names, urls, years, ratings, watched, texts,
+     crawled, _) = zip(*rows)
+    return {
+        "film": [film_slug(url) for url in urls],
+        "date": [crawl_date(seconds) for seconds in crawled],
+        "username": usernames,
+        "review_key": keys,
+        "position": positions,
+        "movie_name": names,
+        "movie_url": urls,
+        "movie_year": years,
+        "rating": ratings,
+        "watched_date": watched,
+        "review_text": texts,
+        "crawled_at": [int(seconds * 1000) for seconds in crawled],
+    }
+
+
+def movie_detail_columns(rows):
+    """Turns films rows, whose details are JSON, into the movie details columns."""
+    film_urls, details, crawled, _ = zip(*rows)
+    details = [json.loads(document) for document in details]
+    columns = {
+        "date": [crawl_date(seconds) for seconds in crawled],
+        "film": [film_slug(url) for url in film_urls],
+        "film_url": film_urls,
+    }
+    for field in DETAIL_FIELDS:
+        columns[field] = [document.get(field) for document in details]
+    columns["crawled_at"] = [int(seconds * 1000) for seconds in crawled]
+    return columns
+
+
+# Per dataset: the query (rows written after a watermark, in table order), the
+# function building its columns, the file schema and the partition columns
+DATASETS = {
+    "film_reviews": (
+        "SELECT film_url, review_key, position, rating, review_text, crawled_at, seq "
+        "FROM film_reviews WHERE seq > ?",
+        film_review_columns,
+        pa.schema([
+            ("film", DICTIONARY), ("date", pa.string()), ("film_url", pa.string()),
+            ("review_key", pa.string()), ("position", pa.int64()), ("rating", DICTIONARY),
+            ("review_text", pa.string()), ("crawled_at", TIMESTAMP),
+        ]),
+        REVIEW_PARTITIONING,
+    ),
+    "user_reviews": (
+        "SELECT username, review_key, position, movie_name, movie_url, movie_year, "
+        "rating, watched_date, review_text, crawled_at, seq "
+        "FROM user_reviews WHERE seq > ?",
+        user_review_columns,
+        pa.schema([
+            ("film", DICTIONARY), ("date", pa.string()), ("username", DICTIONARY),
+            ("review_key", pa.string()), ("position", pa.int64()),
+            ("movie_name", pa.string()), ("movie_url", pa.string()),
+            ("movie_year", pa.string()), ("rating", DICTIONARY),
+            ("watched_date", pa.string()), ("review_text", pa.string()),
+            ("crawled_at", TIMESTAMP),
+        ]),
+        REVIEW_PARTITIONING,
+    ),
+    "movie_details": (
+        "SELECT film_url, details, crawled_at, seq FROM films WHERE seq > ?",
+        movie_detail_columns,
+        pa.schema([("date", pa.string()), ("film", DICTIONARY), ("film_url", pa.string())]
+                  + [(field, pa.string()) for field in DETAIL_FIELDS]
+                  + [("crawled_at", TIMESTAMP)]),
+        DETAILS_PARTITIONING,
+    ),
+}
+
+
+class ColumnarExporter:
+    """Exports the review warehouse to partitioned Parquet datasets."""
+
+    def __init__(self, warehouse_path, output_dir, batch_size=50000):
+        """
+        Initialize the exporter.
+
+        Args:
+            warehouse_path (str): The warehouse SQLite file, opened read-only.
+            output_dir (str): Where each dataset gets its own directory.
+            batch_size (int, optional): Rows read from SQLite and converted at a
+                time. Defaults to 50000.
+        """
+        self.warehouse_path = warehouse_path
+        self.output_dir = output_dir
+        self.batch_size = batch_size
+
+    def state_path(self):
+        """Returns the file keeping the watermark of each dataset."""
+        return os.path.join(self.output_dir, STATE_FILE)
+
+    def read_state(self):
+        """Reads the watermark of each dataset's last export, {} if it is outdated."""
+        try:
+            with open(self.state_path(), encoding="utf-8") as file:
+                state = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return state if state.get("version") == STATE_VERSION else {}
+
+    def write_state(self, state):
+        """Writes the watermarks, replacing the previous ones atomically."""
+        path = self.state_path()
+        with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+            json.dump(state, file, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def batches(self, connection, name, since, progress):
+        """
+        Reads the rows of a dataset written after a watermark, as record batches.
+
+        Args:
+            connection (sqlite3.Connection): The warehouse.
+            name (str): The dataset.
+            since (int): Only rows with a higher write sequence number are read.
+            progress (dict): Updated with the rows read and the highest sequence number.
+
+        Yields:
+            pyarrow.RecordBatch: Up to batch_size rows.
+        """
+        query, columns, schema, _ = DATASETS[name]
+        cursor = connection.execute(query, (since,))
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            progress["rows"] += len(rows)
+            # seq is the last column of every query
+            progress["watermark"] = max(progress["watermark"], max(row[-1] for row in rows))
+            data = columns(rows)
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(data[field.name], type=field.type) for field in schema],
+                schema=schema)
+
+    def export_dataset(self, connection, name, since):
+        """
+        Writes the rows of one dataset written after a watermark as new Parquet files.
+
+        Returns:
+            dict: rows and files written, bytes, seconds, and the new watermark.
+        """
+        _, _, schema, partitioning = DATASETS[name]
+        progress = {"rows": 0, "watermark": since}
+        written = []
+        start = time.perf_counter()
+        ds.write_dataset(
+            self.batches(connection, name, since, progress),
+            os.path.join(self.output_dir, name),
+            schema=schema,
+            format="parquet",
+            partitioning=ds.partitioning(partitioning, flavor="hive"),
+            # A unique name per run, so appended files never replace earlier ones
+            basename_template=f"part-{time.strftime('%Y%m%dT%H%M%S')}-"
+                              f"{uuid.uuid4().hex[:8]}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+            max_partitions=1_000_000,
+            file_visitor=lambda file: written.append(file.path),
+        )
+        seconds = time.perf_counter() - start
+        size = sum(os.path.getsize(path) for path in written)
+        return {
+            "rows": progress["rows"],
+            "files": len(written),
+            "bytes": size,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(progress["rows"] / seconds) if seconds else 0,
+            "watermark": progress["watermark"],
+        }
+
+    def export(self, incremental=True):
+        """
+        Exports every dataset.
+
+        Args:
+            incremental (bool, optional): Append only the rows written since the last
+                export. If False, or if there is no up to date export state, the
+                datasets are deleted and written again in full. Defaults to True.
+
+        Returns:
+            dict: The export report of each dataset.
+        """
+        state = self.read_state() if incremental else {}
+        # Without a state, appending would write the rows exported before again
+        incremental = bool(state)
+        state["version"] = STATE_VERSION
+        os.makedirs(self.output_dir, exist_ok=True)
+        report = {}
+        # write_dataset pulls the batches from one of its own threads
+        connection = sqlite3.connect(f"file:{self.warehouse_path}?mode=ro", uri=True,
+                                     check_same_thread=False)
+        try:
+            for name in DATASETS:
+                if not incremental:
+                    shutil.rmtree(os.path.join(self.output_dir, name), ignore_errors=True)
+                # Rows written before the warehouse numbered its writes have seq 0
+                report[name] = self.export_dataset(connection, name, state.get(name, -1))
+                state[name] = report[name]["watermark"]
+                # Saved after each dataset, so a failed export resumes where it stopped
+                self.write_state(state)
+        finally:
+            connection.close()
+        return report
+
+
+def read_dataset(directory):
+    """
+    Opens an exported dataset with its partition columns.
+
+    Args:
+        directory (str): The dataset directory, e.g. '<output>/film_reviews'.
+
+    Returns:
+        pyarrow.dataset.Dataset: The dataset, with film (dictionary-encoded) and date
+            read from the paths.
+    """
+    return ds.dataset(directory, format="parquet",
+                      partitioning=ds.HivePartitioning.discover(infer_dictionary=True))
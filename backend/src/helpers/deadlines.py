@@ -0,0 +1,118 @@
+"""
+Per-request deadlines. A deadline is set once per request and read wherever work
+happens (scraper page loops, HTTP timeouts, LLM retry loops and streams) without
+threading it through every signature.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Custom exception for work that ran past the request deadline."""
+
+
+class Deadline:
+    """A point in time by which a request must be answered."""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        """
+        Initialize the deadline.
+
+        Args:
+            seconds (float): Time budget from now.
+            clock (callable, optional): Returns the current time in seconds.
+                Defaults to time.monotonic.
+        """
+        self.clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self):
+        """Returns the seconds left, zero once expired."""
+        return max(0.0, self.expires_at - self.clock())
+
+    def expired(self):
+        """Returns True once the deadline has passed."""
+        return self.remaining() <= 0
+
+
+@contextmanager
+def deadline_scope(seconds):
+    """
+    Applies a deadline to the work done inside the block.
+
+    Args:
+        seconds (float): Time budget, no deadline if None or not positive.
+
+    Yields:
+        Deadline: The deadline, or None.
+    """
+    deadline = Deadline(seconds) if seconds and seconds > 0 else None
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current_deadline():
+    """Returns the deadline of the current request, or None."""
+    return _current.get()
+
+
+def deadline_expired():
+    """Returns True if the current request has run out of time."""
+    deadline = _current.get()
+    return deadline is not None and deadline.expired()
+
+
+def check_deadline(stage):
+    """
+    Stops work that would run past the deadline.
+
+    Args:
+        stage (str): What was about to start, for the error message.
+
+    Raises:
+        DeadlineExceeded: If the current request has run out of time.
+    """
+    if deadline_expired():
+        raise DeadlineExceeded(f"Request deadline exceeded before {stage}")
+
+
+def time_left(default):
+    """
+    Caps a timeout to the time left before the deadline.
+
+    Args:
+        default (float): The timeout used without a deadline.
+
+    Returns:
+        float: The smaller of default and the time left.
+    """
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    return max(0.001, min(default, deadline.remaining()))
+
+
+def propagate_deadline(func):
+    """
+    Wraps a function so it runs under the current deadline in another thread,
+    along with the rest of the request's context (e.g. its stage timings).
+
+    Args:
+        func (callable): The function to run in a worker thread.
+
+    Returns:
+        callable: The wrapped function.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return run
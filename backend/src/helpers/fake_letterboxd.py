@@ -0,0 +1,167 @@
+"""
+A local stand-in for letterboxd.com for offline load tests: film pages, film review
+pages and user profile, stats and review pages, generated deterministically from the
+URL and served after a configurable latency.
+"""
+
+import random
+import re
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import requests
+
+FILM_URL = re.compile(r"^https://letterboxd\.com/film/([\w-]+)/$")
+FILM_REVIEWS_URL = re.compile(
+    r"^https://letterboxd\.com/film/([\w-]+)/reviews/by/activity/page/(\d+)/$")
+USER_URL = re.compile(r"^https://letterboxd\.com/([\w-]+)/$")
+USER_STATS_URL = re.compile(r"^https://letterboxd\.com/([\w-]+)/stats$")
+USER_REVIEWS_URL = re.compile(
+    r"^https://letterboxd\.com/([\w-]+)/films/reviews/(?:page/(\d+)/)?$")
+
+VOCABULARY = (
+    "acting actors ambitious atmosphere beautiful boring brilliant camera casting "
+    "character charming cinematography clever climax color comedy costume dark "
+    "dialogue director dreamy editing emotional ending ensemble flawed funny gorgeous "
+    "haunting heartfelt horror humor iconic intense lighting long masterpiece messy "
+    "moving music overrated pacing performance plot quiet romance score script "
+    "sequel slow soundtrack stunning style subtle tense thrilling twist uneven "
+    "villain visuals weird witty writing"
+).split()
+
+
+class FakeResponse:
+    """The part of requests.Response the scrapers read."""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, text, status_code=200):
+        """Initialize the response with its body and status code."""
+        self.text = text
+        self.status_code = status_code
+
+
+class FakeLetterboxd:
+    """Serves generated Letterboxd pages in place of requests.get."""
+
+    def __init__(self, latency=0.05, film_pages=30, user_pages=3, reviews_per_page=12):
+        """
+        Initialize the stand-in.
+
+        Args:
+            latency (float, optional): Seconds each page takes. Defaults to 0.05.
+            film_pages (int, optional): Review pages per film, later pages are empty.
+                Defaults to 30.
+            user_pages (int, optional): Review pages per user. Defaults to 3.
+            reviews_per_page (int, optional): Reviews on each page. Defaults to 12.
+        """
+        self.latency = latency
+        self.film_pages = film_pages
+        self.user_pages = user_pages
+        self.reviews_per_page = reviews_per_page
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    @staticmethod
+    def words(url, count, salt=0):
+        """Returns count words drawn deterministically from the URL."""
+        rng = random.Random(zlib.crc32(f"{url}#{salt}".encode()))
+        return " ".join(rng.choice(VOCABULARY) for _ in range(count))
+
+    def film_page(self, slug):
+        """Builds a film page with the details movie_details_scraper reads."""
+        title = slug.replace("-", " ").title()
+        return (
+            f'<html><body><div id="backdrop" data-backdrop="https://img.local/{slug}.jpg"></div>'
+            f'<h1 class="filmtitle"><span class="name js-widont prettify">{title}</span></h1>'
+            '<div class="releaseyear"><a>2024</a></div>'
+            '<span class="directorlist">Jane Doe</span>'
+            '<div id="tab-genres"><a class="text-slug">Drama</a></div>'
+            f'<div class="truncate"><p>{self.words(slug, 40)}</p></div></body></html>'
+        )
+
+    def film_reviews_page(self, url, page):
+        """Builds one page of a film's reviews, empty past film_pages."""
+        if page > self.film_pages:
+            return "<html><body></body></html>"
+        reviews = "".join(
+            f'<li class="film-detail" data-object-id="viewing:{page * 1000 + i}">'
+            '<span class="rating">★★★</span>'
+            f'<div class="js-review-body"><p>{self.words(url, 40, i)}</p></div></li>'
+            for i in range(self.reviews_per_page)
+        )
+        return f"<html><body><ul>{reviews}</ul></body></html>"
+
+    def user_reviews_page(self, username, page):
+        """Builds one page of a user's reviews, with pagination links."""
+        pagination = "".join(
+            f'<li class="paginate-page">{i}</li>' for i in range(1, self.user_pages + 1))
+        reviews = "".join(
+            '<div class="film-detail-content"><h2 class="headline-2 prettify">'
+            f'<a href="/film/{username}-{page}-{i}/">Film {page}-{i}</a></h2>'
+            '<small class="metadata"><a>2020</a></small><span class="rating">★★★★</span>'
+            f'<div class="js-review-body" data-full-text-url="/s/full-text/viewing:{page * 1000 + i}/">'
+            f'{self.words(username, 30, page * 100 + i)}</div></div>'
+            for i in range(self.reviews_per_page)
+        ) if page <= self.user_pages else ""
+        return f"<html><body>{pagination}{reviews}</body></html>"
+
+    @staticmethod
+    def stats_page():
+        """Builds a stats page with the statistics scrape_user_stats reads."""
+        stats = "".join(
+            f'<h4 class="yir-member-statistic statistic">{value} units</h4>'
+            for value in (4, 812, 240, 31, 17, 9))
+        return f"<html><body>{stats}</body></html>"
+
+    def page(self, url):
+        """
+        Builds the page for a Letterboxd URL.
+
+        Args:
+            url (str): The requested URL.
+
+        Returns:
+            FakeResponse: The page, or a 404 for URLs the scrapers never request.
+        """
+        match = FILM_REVIEWS_URL.match(url)
+        if match:
+            return FakeResponse(self.film_reviews_page(url, int(match.group(2))))
+        match = FILM_URL.match(url)
+        if match:
+            return FakeResponse(self.film_page(match.group(1)))
+        match = USER_REVIEWS_URL.match(url)
+        if match:
+            return FakeResponse(self.user_reviews_page(match.group(1), int(match.group(2) or 1)))
+        if USER_STATS_URL.match(url):
+            return FakeResponse(self.stats_page())
+        match = USER_URL.match(url)
+        if match:
+            return FakeResponse(f"<html><body><h1>{match.group(1)}</h1></body></html>")
+        return FakeResponse("Not Found", 404)
+
+    def get(self, url, headers=None, timeout=None):  # pylint: disable=unused-argument
+        """
+        Stands in for requests.get: waits out the latency and returns the page.
+
+        Raises:
+            requests.exceptions.Timeout: If the latency is longer than the timeout.
+        """
+        with self.lock:
+            self.requests += 1
+        if timeout is not None and self.latency > timeout:
+            time.sleep(timeout)
+            raise requests.exceptions.Timeout(f"Timed out fetching {url}")
+        time.sleep(self.latency)
+        return self.page(url)
+
+    @contextmanager
+    def installed(self):
+        """Routes every requests.get call to the stand-in inside the block."""
+        original = requests.get
+        requests.get = self.get
+        try:
+            yield self
+        finally:
+            requests.get = original
@@ -0,0 +1,112 @@
+"""
+A local stand-in for a Redis server, for tests and offline runs of RedisCache. It
+speaks the Redis protocol (RESP) on a local port and keeps the commands the cache
+sends (PING, SELECT, GET, SET with EX or PX, DEL, FLUSHDB) in memory.
+"""
+
+import socketserver
+import threading
+import time
+from collections import defaultdict
+
+from src.helpers.cache_backends import CacheError, read_reply
+
+
+def encode_reply(reply):
+    """Encodes a reply: str as a simple string, int, bytes as a bulk string, None as null."""
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, str):
+        return f"+{reply}\r\n".encode()
+    return b"$%d\r\n%s\r\n" % (len(reply), reply)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Serves the commands of one client connection."""
+
+    def handle(self):
+        db = 0
+        while True:
+            try:
+                args = read_reply(self.rfile)
+            except (ConnectionError, CacheError, ValueError):
+                return
+            name = args[0].decode().upper()
+            if name == "SELECT":
+                db = int(args[1])
+                self.wfile.write(encode_reply("OK"))
+                continue
+            try:
+                reply = self.server.run(db, name, args[1:])
+            except CacheError as error:
+                self.wfile.write(f"-ERR {error}\r\n".encode())
+                continue
+            self.wfile.write(encode_reply(reply))
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    """An in-memory Redis stand-in listening on a local port."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0):
+        """
+        Initialize the server on 127.0.0.1. It serves once started.
+
+        Args:
+            port (int, optional): The port, 0 for any free one. Defaults to 0.
+        """
+        super().__init__(("127.0.0.1", port), FakeRedisHandler)
+        self.port = self.server_address[1]
+        self.databases = defaultdict(dict)
+        self.lock = threading.Lock()
+        self.commands = 0
+
+    def run(self, db, name, args):
+        """
+        Runs a command on a database.
+
+        Args:
+            db (int): The database selected by the connection.
+            name (str): The command name, upper case.
+            args (list): Its arguments, as bytes.
+
+        Returns:
+            The reply.
+
+        Raises:
+            CacheError: If the command is not supported.
+        """
+        data = self.databases[db]
+        with self.lock:
+            self.commands += 1
+            if name == "PING":
+                return "PONG"
+            if name == "GET":
+                value, expires = data.get(args[0], (None, None))
+                if expires is not None and expires <= time.monotonic():
+                    del data[args[0]]
+                    return None
+                return value
+            if name == "SET":
+                options = [arg.decode().upper() for arg in args[2::2]]
+                values = [float(arg) for arg in args[3::2]]
+                expires = None
+                for option, value in zip(options, values):
+                    expires = time.monotonic() + (value if option == "EX" else value / 1000)
+                data[args[0]] = (args[1], expires)
+                return "OK"
+            if name == "DEL":
+                return sum(1 for key in args if data.pop(key, None) is not None)
+            if name == "FLUSHDB":
+                data.clear()
+                return "OK"
+        raise CacheError(f"unknown command '{name}'")
+
+    def start(self):
+        """Serves in a daemon thread and returns the server."""
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+        return self
@@ -0,0 +1,171 @@
+"""
+Hedged LLM requests: if a call is slower than usual, race a duplicate on
+another API key and keep whichever answers first.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class HedgeError(Exception):
+    """Custom exception for hedged calls where every attempt failed."""
+
+
+class LatencyTracker:
+    """Keeps a sliding window of call latencies and reports percentiles."""
+
+    def __init__(self, window=200):
+        """
+        Initialize the tracker.
+
+        Args:
+            window (int, optional): Number of recent latencies to keep. Defaults to 200.
+        """
+        self.samples = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        """Records the latency of one successful call."""
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, percent):
+        """
+        Returns the given percentile of the recorded latencies.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The latency in seconds, or None if nothing was recorded yet.
+        """
+        with self.lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def __len__(self):
+        """Returns the number of recorded latencies."""
+        return len(self.samples)
+
+
+class HedgedCaller:
+    """
+    Runs a call on the first API key and, if it has not returned within the
+    tracked percentile latency, fires a duplicate on the next key.
+
+    The first successful result wins and the other attempt is cancelled. Failed
+    attempts move on to the next key straight away, like the plain retry loops.
+    """
+
+    def __init__(self, percentile=95, default_delay=5.0, min_samples=20, max_workers=16):
+        """
+        Initialize the hedged caller.
+
+        Args:
+            percentile (float, optional): Latency percentile after which a hedge is
+                fired. Defaults to 95.
+            default_delay (float, optional): Hedge delay in seconds used until
+                min_samples latencies have been recorded. Defaults to 5.0.
+            min_samples (int, optional): Samples needed before the percentile is
+                trusted. Defaults to 20.
+            max_workers (int, optional): Size of the thread pool. Defaults to 16.
+        """
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.trackers = defaultdict(LatencyTracker)
+        self.counts = defaultdict(lambda: {"calls": 0, "hedged": 0, "hedge_wins": 0})
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+
+    def hedge_delay(self, name):
+        """Returns how long to wait for the call `name` before hedging it."""
+        tracker = self.trackers[name]
+        if len(tracker) < self.min_samples:
+            return self.default_delay
+        return tracker.percentile(self.percentile)
+
+    def _count(self, name, field):
+        """Increments one of the counters of the call `name`."""
+        with self.lock:
+            self.counts[name][field] += 1
+
+    def call(self, name, func, api_keys):
+        """
+        Runs func on the API keys, hedging once if the first attempt is slow.
+
+        Args:
+            name (str): Name of the call, used to track latencies and counts.
+            func (callable): Called as func(api_key, cancelled) where cancelled is
+                a threading.Event set once the attempt is no longer needed.
+            api_keys (list): API keys to use, in order.
+
+        Returns:
+            The result of the first attempt that succeeds.
+
+        Raises:
+            HedgeError: If every attempt fails.
+        """
+        self._count(name, "calls")
+        keys = iter(api_keys)
+        pending = {}
+        errors = []
+        hedged = False
+
+        def launch():
+            key = next(keys, None)
+            if key is None:
+                return False
+            cancelled = threading.Event()
+            future = self.executor.submit(func, key, cancelled)
+            pending[future] = (cancelled, time.monotonic(), bool(pending))
+            return True
+
+        launch()
+        while pending:
+            timeout = None if hedged else self.hedge_delay(name)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                if launch():
+                    self._count(name, "hedged")
+                continue
+            for future in done:
+                _, started, is_hedge = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    errors.append(error)
+                    continue
+                self.trackers[name].record(time.monotonic() - started)
+                if is_hedge:
+                    self._count(name, "hedge_wins")
+                for other, (cancelled, _, _) in pending.items():
+                    cancelled.set()
+                    other.cancel()
+                return result
+            if not pending:
+                launch()
+        raise HedgeError(f"All attempts for {name} failed: {errors}")
+
+    def stats(self):
+        """
+        Reports how often hedges fire for each call name.
+
+        Returns:
+            dict: Per call name, the number of calls, hedges fired, hedges that
+                won, the hedge rate and the current hedge delay in seconds.
+        """
+        with self.lock:
+            counts = {name: dict(values) for name, values in self.counts.items()}
+        for name, values in counts.items():
+            values["hedge_rate"] = (
+                values["hedged"] / values["calls"] if values["calls"] else 0.0
+            )
+            values["hedge_delay"] = self.hedge_delay(name)
+        return counts
@@ -0,0 +1,145 @@
+"""
+Incremental refresh of a film's summary and aspects: only the reviews not seen in
+the last analysis are analyzed, and their aspect sentiment is merged into the
+stored counts instead of re-analyzing every review. The reviews come from an
+injected source, such as the review warehouse, which keeps the crawls themselves
+incremental.
+
+The aspects are always scored with the local lexicon, on the first run as well as
+on the refreshes, so the stored counts are all on one scale. Model percentages
+cannot be turned back into counts that add up with the lexicon ones.
+"""
+
+import time
+
+from src.helpers.letterboxd_analyzers import merge_counts, percentages_from_counts
+from src.helpers.review_dedup import dedupe_reviews
+from src.helpers.scrapers import review_key, scrape_reviews
+
+MAX_KNOWN_REVIEWS = 2000
+MIN_NEW_WORDS = 50
+# Bumped when the stored state changes meaning; older states are re-analyzed
+STATE_VERSION = 2
+
+
+class IncrementalRefresher:
+    """Refreshes a film's summary and aspects from the reviews posted since the last run."""
+
+    def __init__(self, analyzer, store, pages=30, reviews=scrape_reviews):
+        """
+        Initialize the refresher.
+
+        Args:
+            analyzer (LetterboxdReviewAnalyzer): Generates summaries and scores aspects.
+            store (JsonStateStore): Where film states are kept, keyed by film URL.
+            pages (int, optional): Review pages read per film. Defaults to 30.
+            reviews (callable, optional): Takes a film URL, a number of pages and a
+                progress dict, returns the film's reviews, setting
+                progress['complete']. Defaults to scraping every page.
+        """
+        self.analyzer = analyzer
+        self.store = store
+        self.pages = pages
+        self.reviews = reviews
+
+    def refresh(self, film_url, api_key1, api_key2):
+        """
+        Returns an up to date summary and aspect list for a film.
+
+        The first call, or the one after a failed summary or an outdated state,
+        analyzes every review. Later calls pick the reviews whose keys were not seen
+        before, score their aspects locally and merge the counts, and fold them into
+        the stored summary with a short prompt.
+
+        Args:
+            film_url (str): The Letterboxd film URL.
+            api_key1 (list): A list of API keys for generating the summary.
+            api_key2 (list): A list of API keys for generating aspect analysis.
+
+        Returns:
+            tuple: The summary (str), the aspect list (list) and the number of new
+                reviews analyzed (int, all of them on a first run).
+        """
+        state = self.store.get(film_url)
+        if (state is None or state.get("version") != STATE_VERSION
+                or state["summary"] is None or state["aspects"] is None):
+            return self.analyze_all(film_url, api_key1, api_key2)
+
+        progress = {}
+        known = set(state["review_keys"])
+        scraped = [review for review in self.reviews(film_url, self.pages, progress=progress)
+                   if review_key(review) not in known]
+        new_reviews, _ = dedupe_reviews(scraped)
+        if not new_reviews:
+            return state["summary"], state["aspects"], 0
+
+        new_text = self.analyzer.read_reviews(new_reviews)
+        aspect_counts = merge_counts(state["aspect_counts"], self.count_aspects(new_reviews))
+        n_reviews = state["n_reviews"] + len(new_reviews)
+        aspects = percentages_from_counts(aspect_counts, n_reviews)
+
+        summary = state["summary"]
+        if len(new_text.split()) >= MIN_NEW_WORDS:
+            summary = self.analyzer.update_summary(summary, new_text, api_key1) or summary
+
+        if not progress["complete"]:
+            # Like the warehouse, the state only moves on complete crawls; the reviews
+            # that were read are analyzed again on the next call
+            print(f"Partial crawl of {film_url}, the refresh is not saved")
+            return summary, aspects, len(new_reviews)
+        self.save(film_url, {
+            "review_keys": [review_key(review) for review in scraped] + state["review_keys"],
+            "n_reviews": n_reviews,
+            "aspect_counts": aspect_counts,
+            "summary": summary,
+            "aspects": aspects,
+        })
+        return summary, aspects, len(new_reviews)
+
+    def analyze_all(self, film_url, api_key1, api_key2):
+        """
+        Summarizes every review of a film, scores their aspects locally and stores
+        the result.
+
+        Args:
+            film_url (str): The Letterboxd film URL.
+            api_key1 (list): A list of API keys for generating the summary.
+            api_key2 (list): A list of API keys for generating aspect analysis.
+
+        Returns:
+            tuple: The summary (str), the aspect list (list) and the number of
+                reviews analyzed (int).
+        """
+        progress = {}
+        scraped = self.reviews(film_url, self.pages, progress=progress)
+        reviews, _ = dedupe_reviews(scraped)
+        reviews_text = self.analyzer.read_reviews(reviews)
+        summary = None
+        for stage, result in self.analyzer.get_results_stages(reviews_text, api_key1, api_key2):
+            if stage == "summary":
+                summary = result
+                break
+        aspect_counts = self.count_aspects(reviews)
+        aspects = percentages_from_counts(aspect_counts, len(reviews))
+        if not progress["complete"]:
+            print(f"Partial crawl of {film_url}, the analysis is not saved")
+            return summary, aspects, len(reviews)
+        self.save(film_url, {
+            "review_keys": [review_key(review) for review in scraped],
+            "n_reviews": len(reviews),
+            "aspect_counts": aspect_counts,
+            "summary": summary,
+            "aspects": aspects,
+        })
+        return summary, aspects, len(reviews)
+
+    def count_aspects(self, reviews):
+        """Counts the reviews mentioning each aspect positively and negatively, locally."""
+        return self.analyzer.local_aspects.counts([review["review_text"] for review in reviews])
+
+    def save(self, film_url, state):
+        """Stores a film state, keeping only the most recent known review keys."""
+        state["review_keys"] = state["review_keys"][:MAX_KNOWN_REVIEWS]
+        state["version"] = STATE_VERSION
+        state["updated_at"] = time.time()
+        self.store.put(film_url, state)
@@ -0,0 +1,176 @@
+"""
+In-process background jobs: requests are queued and answered with a job id straight
+away, worker threads run the scraping and LLM pipelines, and clients poll or wait
+for the result. No external broker is needed.
+"""
+
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class JobQueueFull(Exception):
+    """Custom exception for jobs submitted while the queue is full."""
+
+
+class JobQueue:
+    """A bounded queue of jobs run by a pool of daemon worker threads."""
+
+    def __init__(self, workers=4, max_pending=100, max_jobs=1000, ttl=3600.0):
+        """
+        Initialize the queue. Workers are started on the first submission.
+
+        Args:
+            workers (int, optional): Number of worker threads. Defaults to 4.
+            max_pending (int, optional): Jobs waiting to run before submissions are
+                refused. Defaults to 100.
+            max_jobs (int, optional): Jobs remembered, oldest finished ones are
+                forgotten first. Defaults to 1000.
+            ttl (float, optional): Seconds a finished job is kept. Defaults to 3600.
+        """
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.ttl = ttl
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.jobs = OrderedDict()
+        self.condition = threading.Condition()
+        self.threads = []
+
+    def start(self):
+        """Starts the worker threads if they are not running yet."""
+        with self.condition:
+            if self.threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self.work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def submit(self, kind, func):
+        """
+        Queues a job.
+
+        Args:
+            kind (str): What the job does, e.g. 'roast'.
+            func (callable): Runs the job and returns (result, status_code). A status
+                code of 400 or more marks the job failed.
+
+        Returns:
+            str: The job id.
+
+        Raises:
+            JobQueueFull: If max_pending jobs are already waiting.
+        """
+        self.start()
+        job_id = uuid.uuid4().hex
+        with self.condition:
+            self.prune()
+            self.jobs[job_id] = {
+                "id": job_id, "kind": kind, "status": "queued", "created_at": time.time(),
+                "started_at": None, "finished_at": None, "status_code": None, "result": None,
+            }
+        try:
+            self.pending.put_nowait((job_id, func))
+        except queue.Full as error:
+            with self.condition:
+                del self.jobs[job_id]
+            raise JobQueueFull("Too many jobs waiting, try again later") from error
+        return job_id
+
+    def work(self):
+        """Worker loop: runs queued jobs one at a time, forever."""
+        while True:
+            job_id, func = self.pending.get()
+            self.update(job_id, status="running", started_at=time.time())
+            try:
+                result, status_code = func()
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                result, status_code = {"error": str(error)}, 500
+            self.update(
+                job_id,
+                status="done" if status_code < 400 else "failed",
+                status_code=status_code,
+                result=result,
+                finished_at=time.time(),
+            )
+            self.pending.task_done()
+
+    def update(self, job_id, **fields):
+        """Updates a job and wakes up the clients waiting on it."""
+        with self.condition:
+            if job_id in self.jobs:
+                self.jobs[job_id].update(fields)
+            self.condition.notify_all()
+
+    def get(self, job_id, wait=0.0):
+        """
+        Returns a job, optionally waiting for it to finish.
+
+        Args:
+            job_id (str): The job id.
+            wait (float, optional): Seconds to wait for the job to finish.
+                Defaults to 0.0.
+
+        Returns:
+            dict: A copy of the job, or None if the id is unknown or expired.
+        """
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.jobs.get(job_id, {}).get("status") not in ("queued", "running"),
+                timeout=wait,
+            )
+            job = self.jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def changes(self, job_id, timeout=60.0):
+        """
+        Yields the job each time its status changes, until it finishes.
+
+        Args:
+            job_id (str): The job id.
+            timeout (float, optional): Seconds to follow the job for. Defaults to 60.
+
+        Yields:
+            dict: A copy of the job.
+        """
+        end = time.monotonic() + timeout
+        status = None
+        while time.monotonic() < end:
+            with self.condition:
+                self.condition.wait_for(
+                    lambda: self.jobs.get(job_id, {}).get("status") != status,
+                    timeout=end - time.monotonic(),
+                )
+                job = self.jobs.get(job_id)
+                job = dict(job) if job is not None else None
+            if job is None or job["status"] == status:
+                return
+            status = job["status"]
+            yield job
+            if status in ("done", "failed"):
+                return
+
+    def prune(self):
+        """Forgets expired finished jobs, and the oldest ones past max_jobs."""
+        now = time.time()
+        for job_id in list(self.jobs):
+            job = self.jobs[job_id]
+            finished = job["finished_at"] is not None
+            if finished and (now - job["finished_at"] > self.ttl
+                             or len(self.jobs) >= self.max_jobs):
+                del self.jobs[job_id]
+
+    def stats(self):
+        """
+        Reports the number of jobs in each status.
+
+        Returns:
+            dict: Counts per status, the queue length and the number of workers.
+        """
+        with self.condition:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self.jobs.values():
+                counts[job["status"]] += 1
+        return {"jobs": counts, "pending": self.pending.qsize(), "workers": self.workers}
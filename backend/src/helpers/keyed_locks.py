@@ -0,0 +1,42 @@
+"""
+Per-key locks that only exist while they are held or waited for, so a map keyed by
+usernames or film URLs stays as small as the number of requests in flight.
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+class KeyedLocks:
+    """A lock per key, dropped once no thread holds or waits for it."""
+
+    def __init__(self):
+        """Initialize an empty set of locks."""
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def hold(self, key):
+        """
+        Holds the lock of a key for the duration of the block.
+
+        Args:
+            key (str): The key, e.g. a username.
+        """
+        with self.lock:
+            entry = self.locks.setdefault(key, [threading.Lock(), 0])
+            # Threads holding or waiting for the lock
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.locks[key]
+
+    def __len__(self):
+        """Returns the number of keys locked or waited for."""
+        with self.lock:
+            return len(self.locks)
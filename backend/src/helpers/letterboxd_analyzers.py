@@ -3,7 +3,21 @@
 import json
 import re
 import ast
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
+from src.helpers.circuit_breaker import guarded_call
+from src.helpers.deadlines import (
+    DeadlineExceeded,
+    check_deadline,
+    deadline_expired,
+    propagate_deadline,
+)
+from src.helpers.hedging import HedgeError
+from src.helpers.llm_providers import GeminiProvider
+from src.helpers.metrics import instrument
+from src.helpers.streaming import (
+    collect_stream,
+    first_available_stream,
+)
 
 
 class AspectFormatError(Exception):
@@ -14,6 +28,65 @@ class SummaryError(Exception):
     """Custom exception for summary format errors."""
 
 
+def counts_from_percentages(aspect_list, n_reviews):
+    """
+    Converts [aspect, pos %, neg %] lists back into review counts.
+
+    Args:
+        aspect_list (list): Aspect lists as returned by the analyzer.
+        n_reviews (int): The number of reviews the percentages are over.
+
+    Returns:
+        dict: Aspect name mapped to [positive count, negative count].
+    """
+    return {
+        aspect: [round(positive * n_reviews / 100), round(negative * n_reviews / 100)]
+        for aspect, positive, negative in aspect_list or []
+    }
+
+
+def percentages_from_counts(aspect_counts, n_reviews, top_n=5):
+    """
+    Converts review counts into aspect lists, most mentioned first.
+
+    Args:
+        aspect_counts (dict): Aspect name mapped to [positive count, negative count].
+        n_reviews (int): The number of reviews seen.
+        top_n (int, optional): Number of aspects to return. Defaults to 5.
+
+    Returns:
+        list: [aspect, positive percentage, negative percentage] lists.
+    """
+    if not n_reviews:
+        return []
+    aspects = [
+        [aspect, round(100 * positive / n_reviews), round(100 * negative / n_reviews)]
+        for aspect, (positive, negative) in aspect_counts.items()
+    ]
+    aspects.sort(reverse=True, key=lambda x: x[1] + x[2])
+    return [aspect for aspect in aspects if aspect[1] + aspect[2] > 0][:top_n]
+
+
+def merge_counts(total, counts):
+    """
+    Adds aspect counts into a running total, matching aspect names case-insensitively.
+
+    Args:
+        total (dict): Aspect name mapped to [positive count, negative count], updated
+            in place.
+        counts (dict): The counts to add, in the same format.
+
+    Returns:
+        dict: The updated total.
+    """
+    for aspect, (positive, negative) in counts.items():
+        name = next((n for n in total if n.lower() == aspect.lower()), aspect)
+        merged = total.setdefault(name, [0, 0])
+        merged[0] += positive
+        merged[1] += negative
+    return total
+
+
 class LetterboxdReviewAnalyzer:
     """A class for analyzing Letterboxd movie reviews using AI models."""
 
@@ -24,9 +97,63 @@ class LetterboxdReviewAnalyzer:
         {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
     ]
 
-    def __init__(self):
-        """Initialize the analyzer."""
+    SUMMARY_WORD_LIMIT = 210
+    SUMMARY_MODEL = "gemini-2.0-flash"
+    ASPECTS_MODEL = "gemini-2.0-flash"
+    TASTE_MATCH_MODEL = "gemini-1.5-pro"
+    TASTE_PROFILE_MODEL = "gemini-2.0-flash"
+    ASPECT_MODES = ("llm", "fallback", "local")
+    MAP_CHUNK_WORDS = 6000
+    MAP_WORKERS = 8
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self, stream_generation=False, hedger=None, breakers=None, provider=None,
+        aspect_mode="llm", map_reduce=False
+    ):
+        """
+        Initialize the analyzer.
+
+        Args:
+            stream_generation (bool, optional): Stream summaries and taste matches,
+                abandoning a generation as soon as it goes over the word limit so the
+                retry can start straight away. Defaults to False.
+            hedger (HedgedCaller, optional): When given, slow calls are duplicated on
+                the next API key instead of waiting for an outright failure.
+                Defaults to None.
+            breakers (CircuitBreakerRegistry, optional): When given, calls to a model
+                or API key whose circuit is open are skipped straight away.
+                Defaults to None.
+            provider (LLMProvider, optional): The LLM backend. Defaults to Gemini.
+            aspect_mode (str, optional): 'llm' asks the model for aspects, 'fallback'
+                scores them locally when every model attempt fails, and 'local' only
+                scores them locally. Defaults to 'llm'.
+            map_reduce (bool, optional): Split reviews longer than MAP_CHUNK_WORDS into
+                chunks analyzed in parallel across the API keys, then merge the
+                results. Defaults to False.
 
+        Raises:
+            ValueError: If the aspect mode is unknown.
+        """
+        if aspect_mode not in self.ASPECT_MODES:
+            raise ValueError(f"Unknown aspect mode: {aspect_mode}")
+        self.stream_generation = stream_generation
+        self.hedger = hedger
+        self.breakers = breakers
+        self.provider = provider if provider is not None else GeminiProvider()
+        self.aspect_mode = aspect_mode
+        self.map_reduce = map_reduce
+        self._local_aspects = None
+
+    @property
+    def local_aspects(self):
+        """The local aspect scorer, created (and numpy imported) on first use."""
+        if self._local_aspects is None:
+            # pylint: disable=import-outside-toplevel
+            from src.helpers.local_aspects import LocalAspectAnalyzer
+            self._local_aspects = LocalAspectAnalyzer()
+        return self._local_aspects
+
+    @instrument("prompt_build")
     def read_reviews(self, reviews_list):
         """
         Read reviews from a list of dictionaries.
@@ -53,6 +180,7 @@ class LetterboxdReviewAnalyzer:
                 f"No reviews found in the provided list due to error {e}"
             ) from e
 
+    @instrument("prompt_build")
     def read_user_data(self, reviews_list):
         """
         Reads reviews and statistics, and formats them into a single string.
@@ -84,23 +212,19 @@ class LetterboxdReviewAnalyzer:
 
         return reviews_text
 
-    def generate_summary(self, reviews, api_key1, safety="off"):
+    @instrument("prompt_build")
+    def build_summary_prompt(self, reviews, safety="off"):
         """
-        Generate a summary of reviews using an AI model.
+        Build the prompt used to summarize reviews.
 
         Args:
             reviews (str): The reviews to summarize.
-            api_key1 (str): The API key for the AI model.
             safety (str, optional): Safety mode for content generation. Defaults to 'off'.
 
         Returns:
-            str: The generated summary.
+            str: The summary prompt.
         """
-        try:
-            genai.configure(api_key=api_key1)
-            model1 = genai.GenerativeModel("gemini-2.0-flash")
-
-            prompt = f"""
+        prompt = f"""
                         You are summarizing Letterboxd reviews.  Given a collection of reviews, create a short, 
                         witty, and humorous paragraph that captures the overall sentiment and tone of the reviewers. 
                         Focus on the reviewers' reactions to the film itself, not just the plot.  
@@ -119,36 +243,88 @@ class LetterboxdReviewAnalyzer:
                         {reviews}
                     """
 
-            if safety == "off":
-                prompt += "\n- Do not generate publicly offensive language."
+        if safety == "off":
+            prompt += "\n- Do not generate publicly offensive language."
+        return prompt
 
-            response = model1.generate_content(
-                prompt, safety_settings=self.SAFETY_SETTINGS
-            )
-            if len(response.text.split()) > 210:
-                raise SummaryError("Summary over 200 words")
-            return response.text
+    @instrument("prompt_build")
+    def build_summary_update_prompt(self, summary, new_reviews, safety="off"):
+        """
+        Build the prompt used to fold new reviews into an existing summary.
 
-        except Exception as error:
-            raise ValueError(f"Error generating summary: {error}") from error
+        Args:
+            summary (str): The summary of the reviews seen so far.
+            new_reviews (str): The reviews posted since, separated by " >>>".
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
 
-    def generate_aspects(self, reviews, api_key2, safety="off"):
+        Returns:
+            str: The summary update prompt.
         """
-        Generate aspect-based sentiment analysis of reviews using an AI model.
+        prompt = f"""
+                        You wrote the summary below of a film's Letterboxd reviews. New reviews have
+                        been posted since. Rewrite the summary so it also reflects the new reviews,
+                        weighing them against the reviews the summary already covers - a handful of
+                        new reviews should only shift it slightly. Keep the same witty, reviewer-like
+                        tone and keep the summary *strictly* under 200 words.
+                        - Use only the summary and reviews provided
+                        - STRICTLY avoid formatting like bold, italics. No * or _.
+                        - Only use alphanumeric characters or punctuation. No special characters.
+
+                        Summary:
+                        {summary}
+
+                        New reviews:
+                        {new_reviews}
+                    """
+
+        if safety == "off":
+            prompt += "\n- Do not generate publicly offensive language."
+        return prompt
+
+    @instrument("prompt_build")
+    def build_summary_reduce_prompt(self, summaries, safety="off"):
+        """
+        Build the prompt used to combine the summaries of chunks of reviews.
 
         Args:
-            reviews (str): The reviews to analyze.
-            api_key2 (str): The API key for the AI model.
+            summaries (list): The summaries of each chunk of reviews.
             safety (str, optional): Safety mode for content generation. Defaults to 'off'.
 
         Returns:
-            str: The generated aspect analysis.
+            str: The summary reduce prompt.
         """
-        try:
-            genai.configure(api_key=api_key2)
-            model2 = genai.GenerativeModel("gemini-2.0-flash")
+        partial_summaries = " >>>".join(summaries)
+        prompt = f"""
+                        Each summary below, starting with ">>>", summarizes a different batch of
+                        Letterboxd reviews of the same film. Combine them into one short, witty
+                        paragraph that captures the overall sentiment and tone of all the reviewers,
+                        giving each batch equal weight. Keep the reviewers' own tone and keep the
+                        summary *strictly* under 200 words.
+                        - Use only the summaries provided
+                        - STRICTLY avoid formatting like bold, italics. No * or _.
+                        - Only use alphanumeric characters or punctuation. No special characters.
+
+                        Summaries:
+                        {partial_summaries}
+                    """
+
+        if safety == "off":
+            prompt += "\n- Do not generate publicly offensive language."
+        return prompt
+
+    @instrument("prompt_build")
+    def build_aspects_prompt(self, reviews, safety="off"):
+        """
+        Build the prompt used for aspect-based sentiment analysis.
+
+        Args:
+            reviews (str): The reviews to analyze.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
 
-            prompt = f"""
+        Returns:
+            str: The aspect analysis prompt.
+        """
+        prompt = f"""
                         The following is a collection of movie reviews from Letterboxd. 
                         Each new review starts with ">>>".
 
@@ -189,13 +365,179 @@ class LetterboxdReviewAnalyzer:
                         {reviews}
                     """
 
-            if safety == "off":
-                prompt += "\n- Do not generate publicly offensive language."
+        if safety == "off":
+            prompt += "\n- Do not generate publicly offensive language."
+        return prompt
+
+    @instrument("prompt_build")
+    def build_taste_match_prompt(self, user_reviews, movie_reviews, movie_name):
+        """
+        Build the prompt used to match a user's taste against a movie.
+
+        Args:
+            user_reviews (str): The user reviews to analyze.
+            movie_reviews (str): The movie reviews to analyze.
+            movie_name (str): The name of the movie.
+
+        Returns:
+            str: The taste match prompt.
+        """
+        prompt = f"""
+                        The moview_reviews is a collection of movie reviews from Letterboxd. 
+                        Each new review starts with ">>>".
+
+                        The user_reviews is a collection of a Letterboxd user's movie reviews from Letterboxd. 
+                        Each new review starts with ">>>", with this format "movie_name, rating: review_text".
+                        It may instead be a condensed profile of the user's likes and dislikes, followed
+                        by the names of the movies they have reviewed.
 
-            response = model2.generate_content(
-                prompt, safety_settings=self.SAFETY_SETTINGS
+                        Please analyze both these data and generate a paragraph about the taste match
+                        of the user and the movie. 
+                        
+                        Check if the {movie_name} is present in the user reviews. If it is,
+                        then DO NOT generate a taste match paragraph for this movie.
+                        simply return the user's own review like this - 
+                        'You've already reviewed this movie! You said - (user's own review text, without the movie name and rating)'
+                        
+                        Otherwise, depending on the aspects the user has liked/disliked 
+                        the most in their own reviews, what might they like/dislike about this particular movie? 
+                        Keep your response brief and *STRCITLY* under 200 words and don't give spoilers.
+                        Address it to the user themself in 2nd person.
+
+                        - STRICTLY avoid formatting like bold, italics. No * or _.
+                        - Only use alphanumeric characters or punctuation. No special characters.
+
+                        movie_reviews:
+                        {movie_reviews}
+                        user_reviews:
+                        {user_reviews}
+                    """
+
+        prompt += "\n- Do not generate publicly offensive language."
+        return prompt
+
+    @instrument("prompt_build")
+    def build_taste_profile_prompt(self, user_reviews):
+        """
+        Build the prompt used to condense a user's reviews into a taste profile.
+
+        Args:
+            user_reviews (str): The user reviews, as formatted by read_user_data.
+
+        Returns:
+            str: The taste profile prompt.
+        """
+        prompt = f"""
+                        The user_reviews is a collection of a Letterboxd user's movie reviews.
+                        Each new review starts with ">>>", with this format "movie_name, rating: review_text".
+
+                        Condense them into a taste profile of the user: the genres, directors, styles,
+                        themes and cinematic aspects they love and the ones they dislike, with a few
+                        movies they rated highest and lowest as examples. It will be used later to
+                        predict whether they would like other movies, so be specific and factual.
+                        Keep it *STRICTLY* under 200 words.
+
+                        - STRICTLY avoid formatting like bold, italics. No * or _.
+                        - Only use alphanumeric characters or punctuation. No special characters.
+
+                        user_reviews:
+                        {user_reviews}
+                    """
+
+        prompt += "\n- Do not generate publicly offensive language."
+        return prompt
+
+    def generate_summary(self, reviews, api_key1, safety="off"):
+        """
+        Generate a summary of reviews using an AI model.
+
+        Args:
+            reviews (str): The reviews to summarize.
+            api_key1 (str): The API key for the AI model.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            str: The generated summary.
+        """
+        try:
+            if self.stream_generation:
+                return collect_stream(
+                    self.stream_summary(reviews, api_key1, safety=safety),
+                    self.SUMMARY_WORD_LIMIT,
+                    SummaryError,
+                    "Summary over 200 words",
+                )
+
+            prompt = self.build_summary_prompt(reviews, safety=safety)
+
+            summary = guarded_call(
+                self.breakers,
+                self.SUMMARY_MODEL,
+                api_key1,
+                lambda: self.provider.generate(
+                    self.SUMMARY_MODEL, prompt, api_key1, self.SAFETY_SETTINGS
+                ),
             )
-            return response.text
+            if len(summary.split()) > self.SUMMARY_WORD_LIMIT:
+                raise SummaryError("Summary over 200 words")
+            return summary
+
+        except Exception as error:
+            raise ValueError(f"Error generating summary: {error}") from error
+
+    def stream_summary(self, reviews, api_key1, safety="off"):
+        """
+        Stream a summary of reviews from an AI model as it is generated.
+
+        Args:
+            reviews (str): The reviews to summarize.
+            api_key1 (str): The API key for the AI model.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Yields:
+            str: Pieces of the summary as they arrive.
+        """
+        try:
+            prompt = self.build_summary_prompt(reviews, safety=safety)
+
+            tokens = guarded_call(
+                self.breakers,
+                self.SUMMARY_MODEL,
+                api_key1,
+                lambda: self.provider.stream(
+                    self.SUMMARY_MODEL, prompt, api_key1, self.SAFETY_SETTINGS
+                ),
+                stream=True,
+            )
+        except Exception as error:
+            raise ValueError(f"Error streaming summary: {error}") from error
+
+        yield from tokens
+
+    def generate_aspects(self, reviews, api_key2, safety="off"):
+        """
+        Generate aspect-based sentiment analysis of reviews using an AI model.
+
+        Args:
+            reviews (str): The reviews to analyze.
+            api_key2 (str): The API key for the AI model.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            str: The generated aspect analysis.
+        """
+        try:
+            prompt = self.build_aspects_prompt(reviews, safety=safety)
+
+            aspects = guarded_call(
+                self.breakers,
+                self.ASPECTS_MODEL,
+                api_key2,
+                lambda: self.provider.generate(
+                    self.ASPECTS_MODEL, prompt, api_key2, self.SAFETY_SETTINGS
+                ),
+            )
+            return aspects
 
         except Exception as error:
             raise ValueError(f"Error generating aspects: {error}") from error
@@ -277,71 +619,101 @@ class LetterboxdReviewAnalyzer:
             str: The generated taste match analysis.
         """
         try:
-            genai.configure(api_key=api_key3)
-            model3 = genai.GenerativeModel("gemini-1.5-pro")
+            if self.stream_generation:
+                return collect_stream(
+                    self.stream_taste_match(
+                        user_reviews, movie_reviews, movie_name, api_key3
+                    ),
+                    self.SUMMARY_WORD_LIMIT,
+                    SummaryError,
+                    "Summary over 200 words",
+                )
 
-            prompt = f"""
-                        The moview_reviews is a collection of movie reviews from Letterboxd. 
-                        Each new review starts with ">>>".
+            prompt = self.build_taste_match_prompt(
+                user_reviews, movie_reviews, movie_name
+            )
 
-                        The user_reviews is a collection of a Letterboxd user's movie reviews from Letterboxd. 
-                        Each new review starts with ">>>", with this format "movie_name, rating: review_text".
+            taste_match = guarded_call(
+                self.breakers,
+                self.TASTE_MATCH_MODEL,
+                api_key3,
+                lambda: self.provider.generate(
+                    self.TASTE_MATCH_MODEL, prompt, api_key3, self.SAFETY_SETTINGS
+                ),
+            )
+            if len(taste_match.split()) > self.SUMMARY_WORD_LIMIT:
+                raise SummaryError("Summary over 200 words")
 
-                        Please analyze both these data and generate a paragraph about the taste match
-                        of the user and the movie. 
-                        
-                        Check if the {movie_name} is present in the user reviews. If it is,
-                        then DO NOT generate a taste match paragraph for this movie.
-                        simply return the user's own review like this - 
-                        'You've already reviewed this movie! You said - (user's own review text, without the movie name and rating)'
-                        
-                        Otherwise, depending on the aspects the user has liked/disliked 
-                        the most in their own reviews, what might they like/dislike about this particular movie? 
-                        Keep your response brief and *STRCITLY* under 200 words and don't give spoilers.
-                        Address it to the user themself in 2nd person.
+            return taste_match
 
-                        - STRICTLY avoid formatting like bold, italics. No * or _.
-                        - Only use alphanumeric characters or punctuation. No special characters.
+        except Exception as error:
+            raise ValueError(f"Error generating taste match: {error}") from error
 
-                        movie_reviews:
-                        {movie_reviews}
-                        user_reviews:
-                        {user_reviews}
-                    """
+    def stream_taste_match(
+        self, user_reviews, movie_reviews, movie_name, api_key3
+    ):
+        """
+        Stream a taste match paragraph for a user and a given movie.
 
-            prompt += "\n- Do not generate publicly offensive language."
+        Args:
+            user_reviews (str): The user reviews to analyze.
+            movie_reviews (str): The movie reviews to analyze.
+            movie_name (str): The name of the movie.
+            api_key3 (str): The API key for the AI model.
 
-            response = model3.generate_content(
-                prompt, safety_settings=self.SAFETY_SETTINGS
+        Yields:
+            str: Pieces of the taste match analysis as they arrive.
+        """
+        try:
+            prompt = self.build_taste_match_prompt(
+                user_reviews, movie_reviews, movie_name
             )
-            if len(response.text.split()) > 210:
-                raise SummaryError("Summary over 200 words")
-
-            return response.text
 
+            tokens = guarded_call(
+                self.breakers,
+                self.TASTE_MATCH_MODEL,
+                api_key3,
+                lambda: self.provider.stream(
+                    self.TASTE_MATCH_MODEL, prompt, api_key3, self.SAFETY_SETTINGS
+                ),
+                stream=True,
+            )
         except Exception as error:
-            raise ValueError(f"Error generating taste match: {error}") from error
+            raise ValueError(f"Error streaming taste match: {error}") from error
 
-    def get_results(self, reviews, api_key1, api_key2, safety="off"):
+        yield from tokens
+
+    def get_summary(self, reviews, api_key1, safety="off"):
         """
-        Generates a summary and aspect analysis for the given movie reviews.
+        Generates a summary, trying each API key in turn.
 
         Args:
-            reviews (str): The movie reviews to analyze.
+            reviews (str): The movie reviews to summarize.
             api_key1 (list): A list of API keys for generating the summary.
-            api_key2 (list): A list of API keys for generating aspect analysis.
             safety (str, optional): Safety mode for content generation. Defaults to 'off'.
 
         Returns:
-            tuple: A tuple containing the generated summary (str) and the aspect list (list).
+            str: The generated summary, or None if every attempt failed.
         """
-        if len(reviews.split()) < 400:
-            raise ValueError("Not enough reviews found")
+        if self.hedger is not None:
+            return self.get_hedged(
+                "summary",
+                lambda key, cancelled: collect_stream(
+                    self.stream_summary(reviews, key, safety=safety),
+                    self.SUMMARY_WORD_LIMIT,
+                    SummaryError,
+                    "Summary over 200 words",
+                    cancelled,
+                ),
+                api_key1,
+            )
+
         summary = None
         for i in range(3):
+            check_deadline(f"attempt {i + 1}")
             try:
                 summary = self.generate_summary(reviews, api_key1[i], safety=safety)
-                if len(summary.split()) > 210:
+                if len(summary.split()) > self.SUMMARY_WORD_LIMIT:
                     raise SummaryError("Summary too long")
                 break
             except (SummaryError, ValueError, TypeError, KeyError) as error:
@@ -349,8 +721,118 @@ class LetterboxdReviewAnalyzer:
                 continue
         else:
             print("Failed to generate summary after 3 tries")
+        return summary
+
+    def generate_with_keys(self, model_name, prompt, api_keys, name):
+        """
+        Generates a response of at most SUMMARY_WORD_LIMIT words, trying each API key in turn.
+
+        Args:
+            model_name (str): The model to use.
+            prompt (str): The prompt.
+            api_keys (list): A list of API keys, at most three are tried.
+            name (str): What is generated, for error messages.
+
+        Returns:
+            str: The response, or None if every attempt failed.
+        """
+        for api_key in api_keys[:3]:
+            if deadline_expired():
+                print(f"Deadline reached before generating {name}")
+                return None
+            try:
+                response = guarded_call(
+                    self.breakers,
+                    model_name,
+                    api_key,
+                    lambda key=api_key: self.provider.generate(
+                        model_name, prompt, key, self.SAFETY_SETTINGS
+                    ),
+                )
+                if len(response.split()) > self.SUMMARY_WORD_LIMIT:
+                    raise SummaryError(f"{name.capitalize()} over 200 words")
+                return response
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                print(f"Error generating {name}: {error}")
+        print(f"Failed to generate {name} after 3 tries")
+        return None
+
+    def update_summary(self, summary, new_reviews, api_key1, safety="off"):
+        """
+        Folds new reviews into an existing summary, trying each API key in turn.
+
+        Args:
+            summary (str): The summary of the reviews seen so far.
+            new_reviews (str): The reviews posted since, separated by " >>>".
+            api_key1 (list): A list of API keys for generating the summary.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            str: The updated summary, or None if every attempt failed.
+        """
+        prompt = self.build_summary_update_prompt(summary, new_reviews, safety=safety)
+        return self.generate_with_keys(self.SUMMARY_MODEL, prompt, api_key1, "summary update")
+
+    def get_taste_profile(self, user_reviews, api_key3):
+        """
+        Condenses a user's reviews into a taste profile, trying each API key in turn.
+
+        Args:
+            user_reviews (str): The user reviews, as formatted by read_user_data.
+            api_key3 (list): A list of API keys.
+
+        Returns:
+            str: The taste profile, or None if every attempt failed.
+        """
+        prompt = self.build_taste_profile_prompt(user_reviews)
+        return self.generate_with_keys(
+            self.TASTE_PROFILE_MODEL, prompt, api_key3, "taste profile"
+        )
+
+    def get_aspects(self, reviews, api_key2, safety="off"):
+        """
+        Generates the processed aspect list according to the aspect mode.
+
+        Args:
+            reviews (str): The movie reviews to analyze.
+            api_key2 (list): A list of API keys for generating aspect analysis.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            list: The aspect list, or None if every model attempt failed in 'llm' mode.
+        """
+        if self.aspect_mode == "local":
+            return self.local_aspects.analyze(reviews)
+        aspect_list = self.get_llm_aspects(reviews, api_key2, safety=safety)
+        if aspect_list is None and self.aspect_mode == "fallback":
+            print("Falling back to local aspect analysis")
+            aspect_list = self.local_aspects.analyze(reviews)
+        return aspect_list
+
+    def get_llm_aspects(self, reviews, api_key2, safety="off"):
+        """
+        Generates the processed aspect list with the model, trying each API key in turn.
+
+        Args:
+            reviews (str): The movie reviews to analyze.
+            api_key2 (list): A list of API keys for generating aspect analysis.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            list: The aspect list, or None if every attempt failed.
+        """
+        if self.hedger is not None:
+            return self.get_hedged(
+                "aspects",
+                lambda key, _cancelled: self.aspect_processor(
+                    self.generate_aspects(reviews, key, safety=safety)
+                ),
+                api_key2,
+            )
+
         aspect_list = None
         for i in range(3):
+            check_deadline(f"attempt {i + 1}")
             try:
                 aspects = self.generate_aspects(reviews, api_key2[i], safety=safety)
                 aspect_list = self.aspect_processor(aspects)
@@ -361,11 +843,221 @@ class LetterboxdReviewAnalyzer:
         else:
             print("Failed to generate aspects after 3 tries")
             aspect_list = None
+        return aspect_list
+
+    def get_hedged(self, name, func, api_keys):
+        """
+        Runs a generation through the hedger, trying at most three API keys.
+
+        Streamed generations stop at their next chunk once the other attempt wins.
 
+        Args:
+            name (str): Name of the generation, used for latency tracking and stats.
+            func (callable): Called as func(api_key, cancelled).
+            api_keys (list): A list of API keys.
+
+        Returns:
+            The result of the fastest successful attempt, or None if all failed.
+        """
+        check_deadline(f"generating {name}")
+        try:
+            return self.hedger.call(name, propagate_deadline(func), api_keys[:3])
+        except HedgeError as error:
+            print(f"Error generating {name}: {error}")
+            return None
+
+    def get_results(self, reviews, api_key1, api_key2, safety="off"):
+        """
+        Generates a summary and aspect analysis for the given movie reviews.
+
+        Args:
+            reviews (str): The movie reviews to analyze.
+            api_key1 (list): A list of API keys for generating the summary.
+            api_key2 (list): A list of API keys for generating aspect analysis.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            tuple: A tuple containing the generated summary (str) and the aspect list (list).
+                Either is None if the request deadline ran out before it was generated.
+        """
+        results = dict(self.get_results_stages(reviews, api_key1, api_key2, safety=safety))
+        return results.get("summary"), results.get("aspects")
+
+    def get_results_stages(self, reviews, api_key1, api_key2, safety="off"):
+        """
+        Generates the summary, then the aspect analysis, yielding each once it is ready.
+
+        Args:
+            reviews (str): The movie reviews to analyze.
+            api_key1 (list): A list of API keys for generating the summary.
+            api_key2 (list): A list of API keys for generating aspect analysis.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Yields:
+            tuple: ('summary', str) then ('aspects', list). Stops early if the request
+                deadline runs out.
+
+        Raises:
+            ValueError: If there are fewer than 400 words of reviews.
+        """
+        if len(reviews.split()) < 400:
+            raise ValueError("Not enough reviews found")
+        if self.map_reduce and len(reviews.split()) > self.MAP_CHUNK_WORDS:
+            summary, aspect_list = self.get_results_map_reduce(
+                reviews, api_key1, api_key2, safety=safety)
+            yield "summary", summary
+            yield "aspects", aspect_list
+            return
+        try:
+            yield "summary", self.get_summary(reviews, api_key1, safety=safety)
+            yield "aspects", self.get_aspects(reviews, api_key2, safety=safety)
+        except DeadlineExceeded as error:
+            print(f"Returning partial results: {error}")
+
+    def chunk_reviews(self, reviews):
+        """
+        Splits reviews into chunks of whole reviews of about MAP_CHUNK_WORDS words.
+
+        Args:
+            reviews (str): The reviews, separated by " >>>".
+
+        Returns:
+            list: (chunk text, number of reviews) tuples.
+        """
+        chunks = []
+        current, words = [], 0
+        for review in reviews.split(" >>>"):
+            if current and words + len(review.split()) > self.MAP_CHUNK_WORDS:
+                chunks.append((" >>>".join(current), len(current)))
+                current, words = [], 0
+            current.append(review)
+            words += len(review.split())
+        if current:
+            chunks.append((" >>>".join(current), len(current)))
+        return chunks
+
+    def map_summary(self, chunk, api_keys, safety="off"):
+        """
+        Summarizes one chunk of reviews, trying each API key in turn.
+
+        Args:
+            chunk (str): The chunk of reviews.
+            api_keys (list): The API keys to try, in order.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            str: The chunk summary, or None if every attempt failed.
+        """
+        for api_key in api_keys[:3]:
+            if deadline_expired():
+                return None
+            try:
+                return self.generate_summary(chunk, api_key, safety=safety)
+            except (SummaryError, ValueError, TypeError, KeyError) as error:
+                print(f"Error generating chunk summary: {error}")
+        return None
+
+    def map_aspects(self, chunk, n_reviews, api_keys, safety="off"):
+        """
+        Counts the reviews of one chunk mentioning each aspect positively and negatively.
+
+        Args:
+            chunk (str): The chunk of reviews.
+            n_reviews (int): The number of reviews in the chunk.
+            api_keys (list): The API keys to try, in order.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            dict: Aspect name mapped to [positive count, negative count], or None if
+                every attempt failed.
+        """
+        if self.aspect_mode != "local":
+            for api_key in api_keys[:3]:
+                if deadline_expired():
+                    return None
+                try:
+                    aspects = self.aspect_processor(
+                        self.generate_aspects(chunk, api_key, safety=safety)
+                    )
+                    return counts_from_percentages(aspects, n_reviews)
+                except (AspectFormatError, ValueError, TypeError, KeyError) as error:
+                    print(f"Error generating chunk aspects: {error}")
+            if self.aspect_mode == "llm":
+                return None
+        return self.local_aspects.counts(chunk)
+
+    def get_results_map_reduce(self, reviews, api_key1, api_key2, safety="off"):
+        """
+        Generates a summary and aspect analysis with map-reduce.
+
+        The reviews are split into chunks whose summaries and aspect counts are
+        generated in parallel, spread over every API key. The aspect counts are then
+        summed and turned back into percentages, and the chunk summaries combined
+        with one more call, so the latency stays about that of two calls however
+        many reviews there are (as long as there are enough keys and workers).
+
+        Args:
+            reviews (str): The movie reviews to analyze.
+            api_key1 (list): A list of API keys for generating the summary.
+            api_key2 (list): A list of API keys for generating aspect analysis.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            tuple: The combined summary (str, None if every chunk failed) and the
+                aspect list (list, None if every chunk failed).
+        """
+        chunks = self.chunk_reviews(reviews)
+        pool = list(dict.fromkeys(api_key1 + api_key2))
+
+        def rotated(offset):
+            return pool[offset % len(pool):] + pool[:offset % len(pool)]
+
+        with ThreadPoolExecutor(max_workers=min(self.MAP_WORKERS, 2 * len(chunks))) as executor:
+            summaries = [
+                executor.submit(propagate_deadline(self.map_summary), chunk, rotated(2 * i), safety)
+                for i, (chunk, _) in enumerate(chunks)
+            ]
+            counts = [
+                executor.submit(propagate_deadline(self.map_aspects), chunk, n_reviews, rotated(2 * i + 1), safety)
+                for i, (chunk, n_reviews) in enumerate(chunks)
+            ]
+            summaries = [future.result() for future in summaries]
+            counts = [future.result() for future in counts]
+
+        total, n_reviews = {}, 0
+        for chunk_counts, (_, chunk_reviews) in zip(counts, chunks):
+            if chunk_counts is not None:
+                merge_counts(total, chunk_counts)
+                n_reviews += chunk_reviews
+        aspect_list = percentages_from_counts(total, n_reviews) if n_reviews else None
+
+        summaries = [summary for summary in summaries if summary]
+        if len(summaries) <= 1:
+            return (summaries[0] if summaries else None), aspect_list
+        prompt = self.build_summary_reduce_prompt(summaries, safety=safety)
+        summary = self.generate_with_keys(self.SUMMARY_MODEL, prompt, pool, "summary")
         return summary, aspect_list
 
+    def get_summary_stream(self, reviews, api_key1, safety="off"):
+        """
+        Streams a summary for the given movie reviews from the first working API key.
+
+        Args:
+            reviews (str): The movie reviews to summarize.
+            api_key1 (list): A list of API keys for generating the summary.
+            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+
+        Returns:
+            generator: Yields pieces of the summary as they arrive.
+        """
+        if len(reviews.split()) < 400:
+            raise ValueError("Not enough reviews found")
+        return first_available_stream(
+            lambda key: self.stream_summary(reviews, key, safety=safety), api_key1[:3]
+        )
+
     def get_taste_match_result(
-        self, user_reviews, movie_reviews, movie_name, api_key3
+        self, user_reviews, movie_reviews, movie_name, api_key3, profile=False
     ):
         """
         Generates a taste match summary between given movie reviews and user reviews.
@@ -374,23 +1066,40 @@ class LetterboxdReviewAnalyzer:
             movie_reviews (str): The movie reviews to analyze.
             user_reviews (str): The user reviews to analyze.
             api_key3 (list): A list of API keys for generating aspect analysis.
-            safety (str, optional): Safety mode for content generation. Defaults to 'off'.
+            profile (bool, optional): user_reviews is a condensed taste profile, built
+                from reviews already checked to be long enough, so its own length is
+                not checked. Defaults to False.
 
         Returns:
             string: a <= 200 word taste match summary.
         """
-        if len(user_reviews.split()) < 100:
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        if not profile and len(user_reviews.split()) < 100:
             raise ValueError("Not enough user reviews found")
         if len(movie_reviews.split()) < 400:
             raise ValueError("Not enough movie reviews found")
 
+        if self.hedger is not None:
+            return self.get_hedged(
+                "taste_match",
+                lambda key, cancelled: collect_stream(
+                    self.stream_taste_match(user_reviews, movie_reviews, movie_name, key),
+                    self.SUMMARY_WORD_LIMIT,
+                    SummaryError,
+                    "Summary over 200 words",
+                    cancelled,
+                ),
+                api_key3,
+            )
+
         taste_match = None
         for i in range(3):
+            check_deadline(f"attempt {i + 1}")
             try:
                 taste_match = self.generate_taste_match(
                     user_reviews, movie_reviews, movie_name, api_key3[i]
                 )
-                if len(taste_match.split()) > 210:
+                if len(taste_match.split()) > self.SUMMARY_WORD_LIMIT:
                     raise SummaryError("Taste match too long")
                 break
             except (SummaryError, ValueError, TypeError, KeyError) as error:
@@ -400,3 +1109,32 @@ class LetterboxdReviewAnalyzer:
             print("Failed to generate taste match after 3 tries")
 
         return taste_match
+
+    def get_taste_match_stream(
+        self, user_reviews, movie_reviews, movie_name, api_key3, profile=False
+    ):
+        """
+        Streams a taste match summary from the first working API key.
+
+        Args:
+            user_reviews (str): The user reviews to analyze.
+            movie_reviews (str): The movie reviews to analyze.
+            movie_name (str): The name of the movie.
+            api_key3 (list): A list of API keys for generating the taste match.
+            profile (bool, optional): user_reviews is a condensed taste profile, whose
+                length is not checked. Defaults to False.
+
+        Returns:
+            generator: Yields pieces of the taste match as they arrive.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        if not profile and len(user_reviews.split()) < 100:
+            raise ValueError("Not enough user reviews found")
+        if len(movie_reviews.split()) < 400:
+            raise ValueError("Not enough movie reviews found")
+        return first_available_stream(
+            lambda key: self.stream_taste_match(
+                user_reviews, movie_reviews, movie_name, key
+            ),
+            api_key3[:3],
+        )
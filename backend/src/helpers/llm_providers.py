@@ -0,0 +1,219 @@
+"""
+LLM providers used by the analyzers: the Gemini backend, and a deterministic
+local fake for offline load tests and benchmarks.
+"""
+
+import random
+import threading
+import time
+import zlib
+from src.helpers.deadlines import check_deadline, current_deadline, time_left
+from src.helpers.streaming import iter_stream_text
+
+
+def gemini_modules():
+    """
+    Imports the Gemini client libraries on first use. They pull in gRPC and protobuf
+    and take most of the app's import time, so they are not imported at startup.
+
+    Returns:
+        tuple: The google.generativeai and google.ai.generativelanguage modules.
+    """
+    # pylint: disable=import-outside-toplevel
+    import google.generativeai as genai
+    import google.ai.generativelanguage as glm
+    return genai, glm
+
+
+def __getattr__(name):
+    """Gives module-level access to the lazily imported genai and glm modules."""
+    if name == "genai":
+        return gemini_modules()[0]
+    if name == "glm":
+        return gemini_modules()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class ProviderError(Exception):
+    """Custom exception for failures injected by the fake provider."""
+
+
+class LLMProvider:
+    """
+    Interface the analyzers depend on to generate text.
+
+    Subclasses implement `generate` and `stream`. Both must make (or start)
+    the call before returning, so callers can time it and count failures.
+    """
+
+    def generate(self, model_name, prompt, api_key, safety_settings=None):
+        """
+        Generates a complete response.
+
+        Args:
+            model_name (str): The model to use.
+            prompt (str): The prompt.
+            api_key (str): The API key to send the request with.
+            safety_settings (list, optional): Provider safety settings. Defaults to None.
+
+        Returns:
+            str: The generated text.
+        """
+        raise NotImplementedError
+
+    def stream(self, model_name, prompt, api_key, safety_settings=None):
+        """
+        Starts a streamed response.
+
+        Args:
+            model_name (str): The model to use.
+            prompt (str): The prompt.
+            api_key (str): The API key to send the request with.
+            safety_settings (list, optional): Provider safety settings. Defaults to None.
+
+        Returns:
+            generator: Yields text pieces as they arrive; closing it cancels the call.
+        """
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    """Generates text with Google Gemini, keeping one client per API key."""
+
+    def __init__(self):
+        """Initialize the provider with no clients yet."""
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def model(self, model_name, api_key):
+        """
+        Returns a Gemini model that always sends requests with the given API key.
+
+        `genai.configure` swaps a process-wide client, so two threads calling with
+        different keys at the same time could end up sharing one key. Each key gets
+        its own client here instead, created once and reused.
+
+        Args:
+            model_name (str): The Gemini model name, e.g. "gemini-2.0-flash".
+            api_key (str): The API key to bind the model to.
+
+        Returns:
+            genai.GenerativeModel: A model bound to a client for api_key.
+        """
+        genai, glm = gemini_modules()
+        with self.lock:
+            client = self.clients.get(api_key)
+            if client is None:
+                client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+                self.clients[api_key] = client
+        model = genai.GenerativeModel(model_name)
+        model._client = client  # pylint: disable=protected-access
+        return model
+
+    @staticmethod
+    def request_kwargs(safety_settings):
+        """Builds the generate_content options, capping the call at the request deadline."""
+        kwargs = {"safety_settings": safety_settings} if safety_settings else {}
+        if current_deadline() is not None:
+            kwargs["request_options"] = {"timeout": time_left(600)}
+        return kwargs
+
+    def generate(self, model_name, prompt, api_key, safety_settings=None):
+        """Generates a complete response with Gemini."""
+        kwargs = self.request_kwargs(safety_settings)
+        response = self.model(model_name, api_key).generate_content(prompt, **kwargs)
+        return response.text
+
+    def stream(self, model_name, prompt, api_key, safety_settings=None):
+        """Starts a streamed Gemini response, waiting for its first chunk."""
+        kwargs = self.request_kwargs(safety_settings)
+        response = self.model(model_name, api_key).generate_content(
+            prompt, stream=True, **kwargs
+        )
+        return iter_stream_text(response)
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    A local stand-in for Gemini with configurable latency, failure rate and
+    output shape.
+
+    Output depends only on the seed and the prompt, so runs are reproducible.
+    Aspect prompts (the ones asking for an `ast.literal_eval()` dictionary) get
+    an aspect dictionary back; every other prompt gets plain words.
+    """
+
+    VOCABULARY = (
+        "the film feels like a slow burn with striking visuals a haunting score "
+        "and performances that linger long after the credits roll although the "
+        "pacing drags in the middle act and the dialogue can be clunky"
+    ).split()
+
+    ASPECTS = ("Acting", "Cinematography", "Direction", "Music", "Pacing", "Plot", "Writing")
+
+    def __init__(self, latency=0.0, failure_rate=0.0, words=120, **options):
+        """
+        Initialize the fake provider.
+
+        Args:
+            latency (float, optional): Seconds before the first token. Defaults to 0.0.
+            failure_rate (float, optional): Probability that a call fails, between
+                0 and 1. Defaults to 0.0.
+            words (int, optional): Number of words in text responses. Defaults to 120.
+            **options: token_delay (seconds between streamed words, default 0.0),
+                aspects (number of aspects returned, default 5) and seed (default 0).
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.words = words
+        self.token_delay = options.get("token_delay", 0.0)
+        self.aspects = options.get("aspects", 5)
+        self.seed = options.get("seed", 0)
+        self.failures = random.Random(self.seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def respond(self, prompt):
+        """
+        Builds the deterministic response for a prompt.
+
+        Args:
+            prompt (str): The prompt.
+
+        Returns:
+            str: An aspect dictionary string for aspect prompts, otherwise words.
+        """
+        rng = random.Random(f"{self.seed}:{zlib.crc32(prompt.encode())}")
+        if "ast.literal_eval()" in prompt:
+            names = rng.sample(self.ASPECTS, min(self.aspects, len(self.ASPECTS)))
+            pairs = [f'"{name}": [{rng.randint(5, 80)}, {rng.randint(0, 30)}]' for name in names]
+            return "{" + ", ".join(pairs) + "}"
+        return " ".join(rng.choice(self.VOCABULARY) for _ in range(self.words)) + "."
+
+    def start(self, api_key):
+        """Waits out the latency and raises if this call was drawn to fail."""
+        with self.lock:
+            self.calls += 1
+            failed = self.failures.random() < self.failure_rate
+        time.sleep(time_left(self.latency) if self.latency else 0)
+        check_deadline("the fake response")
+        if failed:
+            raise ProviderError(f"Injected failure for API key {api_key}")
+
+    def generate(self, model_name, prompt, api_key, safety_settings=None):
+        """Returns the fake response after the configured latency."""
+        self.start(api_key)
+        text = self.respond(prompt)
+        time.sleep(self.token_delay * len(text.split()))
+        return text
+
+    def stream(self, model_name, prompt, api_key, safety_settings=None):
+        """Streams the fake response word by word after the configured latency."""
+        self.start(api_key)
+        return self.stream_words(self.respond(prompt))
+
+    def stream_words(self, text):
+        """Yields text one word at a time, token_delay apart."""
+        for word in text.split(" "):
+            yield word + " "
+            time.sleep(self.token_delay)
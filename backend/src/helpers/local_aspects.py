@@ -0,0 +1,198 @@
+"""
+Local aspect-based sentiment analysis of movie reviews, using a cinematic
+aspect lexicon and NumPy-vectorized term counting. Produces the same
+[aspect, positive %, negative %] lists as the Gemini aspect analysis in
+milliseconds, for use as a fallback or as a cheap precomputed mode.
+"""
+
+import re
+import numpy as np
+
+ASPECT_LEXICON = {
+    "Acting": ["acting", "actor", "actors", "actress", "performance", "performances",
+               "cast", "casting", "role", "portrayal", "chemistry"],
+    "Direction": ["direction", "directed", "director", "directing", "filmmaking"],
+    "Cinematography": ["cinematography", "shot", "shots", "camera", "framing", "lighting",
+                       "visuals", "visual", "imagery", "frame", "frames", "gorgeous"],
+    "Music": ["music", "score", "soundtrack", "song", "songs", "sound", "composer"],
+    "Plot": ["plot", "story", "storyline", "narrative", "twist", "twists", "ending"],
+    "Writing": ["script", "writing", "written", "dialogue", "screenplay", "lines"],
+    "Characters": ["character", "characters", "protagonist", "villain", "characterization"],
+    "Pacing": ["pacing", "paced", "runtime", "length", "slow", "drags", "dragged"],
+    "Humor": ["funny", "humor", "humour", "comedy", "jokes", "joke", "hilarious", "laugh"],
+    "Editing": ["editing", "edited", "cuts", "montage"],
+    "Themes": ["theme", "themes", "message", "metaphor", "allegory", "commentary"],
+    "Visual Effects": ["cgi", "vfx", "effects"],
+    "Production Design": ["costumes", "costume", "set", "sets", "production", "design"],
+}
+
+POSITIVE_WORDS = [
+    "good", "great", "amazing", "awesome", "beautiful", "best", "brilliant", "excellent",
+    "fantastic", "favorite", "favourite", "fun", "gorgeous", "incredible", "love", "loved",
+    "masterpiece", "masterful", "perfect", "phenomenal", "powerful", "stunning", "superb",
+    "wonderful", "strong", "compelling", "impressive", "outstanding", "enjoyed", "hilarious",
+    "charming", "moving", "breathtaking", "haunting", "tight", "nice", "solid", "iconic",
+]
+
+NEGATIVE_WORDS = [
+    "bad", "awful", "boring", "clunky", "dull", "terrible", "worst", "weak", "mess", "messy",
+    "hate", "hated", "poor", "disappointing", "disappointed", "bland", "forgettable", "flat",
+    "overrated", "annoying", "lazy", "cringe", "horrible", "stupid", "confusing", "tedious",
+    "predictable", "meh", "unfunny", "wooden", "shallow", "dragged", "drags", "slow", "pointless",
+]
+
+NEGATIONS = ["not", "no", "never", "isn't", "wasn't", "aren't", "don't", "didn't", "nothing",
+             "hardly", "without"]
+
+TOKEN_PATTERN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+class LocalAspectAnalyzer:
+    """
+    Scores cinematic aspects in reviews without calling an LLM.
+
+    Every aspect term occurrence gets the summed polarity of the sentiment
+    words within `window` tokens of it (negated sentiment words count the other
+    way). A review mentions an aspect positively if that sum is positive for the
+    review, negatively if it is negative. Percentages are over all reviews.
+    """
+
+    def __init__(self, lexicon=None, window=4):
+        """
+        Initialize the analyzer and build its vocabulary lookup tables.
+
+        Args:
+            lexicon (dict, optional): Aspect names mapped to lists of terms.
+                Defaults to ASPECT_LEXICON.
+            window (int, optional): Tokens on each side of an aspect term whose
+                sentiment is attributed to it. Defaults to 4.
+        """
+        self.lexicon = lexicon if lexicon is not None else ASPECT_LEXICON
+        self.window = window
+        self.aspects = list(self.lexicon)
+        self.term_aspect = {
+            term: index for index, aspect in enumerate(self.aspects)
+            for term in self.lexicon[aspect]
+        }
+        self.polarity = {word: 1 for word in POSITIVE_WORDS}
+        self.polarity.update({word: -1 for word in NEGATIVE_WORDS})
+        self.negations = set(NEGATIONS)
+
+    @staticmethod
+    def split_reviews(reviews):
+        """
+        Accepts either a list of review strings or the " >>>" joined review text.
+
+        Args:
+            reviews (list or str): The reviews.
+
+        Returns:
+            list: One string per review.
+        """
+        if isinstance(reviews, str):
+            return [review for review in reviews.split(">>>") if review.strip()]
+        return [review for review in reviews if review and review.strip()]
+
+    def tokenize(self, reviews):
+        """
+        Tokenizes reviews into flat NumPy arrays.
+
+        Args:
+            reviews (list): One string per review.
+
+        Returns:
+            tuple: Per-token review index, aspect index (-1 for none) and polarity
+                (+1, -1 or 0, already flipped after a negation), as NumPy arrays.
+        """
+        tokens = [TOKEN_PATTERN.findall(review.lower()) for review in reviews]
+        lengths = np.fromiter((len(review) for review in tokens), dtype=np.int64,
+                              count=len(tokens))
+        review_ids = np.repeat(np.arange(len(tokens)), lengths)
+        flat = np.array([token for review in tokens for token in review], dtype=object)
+        if flat.size == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return review_ids, empty, empty
+
+        vocabulary, inverse = np.unique(flat, return_inverse=True)
+        aspect_ids = np.array([self.term_aspect.get(word, -1) for word in vocabulary])[inverse]
+        polarity = np.array([self.polarity.get(word, 0) for word in vocabulary])[inverse]
+        negated = np.array([word in self.negations for word in vocabulary])[inverse]
+
+        # A negation flips the sentiment word right after it, within the same review
+        follows_negation = np.zeros(flat.size, dtype=bool)
+        follows_negation[1:] = negated[:-1] & (review_ids[1:] == review_ids[:-1])
+        polarity = np.where(follows_negation, -polarity, polarity)
+        return review_ids, aspect_ids, polarity
+
+    def score(self, reviews):
+        """
+        Counts, per aspect, the reviews mentioning it positively and negatively.
+
+        Args:
+            reviews (list or str): The reviews.
+
+        Returns:
+            tuple: Positive counts and negative counts (NumPy arrays, one entry
+                per aspect) and the number of reviews.
+        """
+        reviews = self.split_reviews(reviews)
+        review_ids, aspect_ids, polarity = self.tokenize(reviews)
+        n_aspects = len(self.aspects)
+        if not reviews or review_ids.size == 0:
+            return np.zeros(n_aspects, dtype=np.int64), np.zeros(n_aspects, dtype=np.int64), \
+                len(reviews)
+
+        # Window sums of polarity via a cumulative sum, clipped to each review
+        cumulative = np.concatenate(([0], np.cumsum(polarity)))
+        starts = np.searchsorted(review_ids, review_ids, side="left")
+        ends = np.searchsorted(review_ids, review_ids, side="right")
+        positions = np.nonzero(aspect_ids >= 0)[0]
+        low = np.maximum(positions - self.window, starts[positions])
+        high = np.minimum(positions + self.window + 1, ends[positions])
+        window_scores = cumulative[high] - cumulative[low]
+
+        totals = np.zeros((len(reviews), n_aspects), dtype=np.int64)
+        np.add.at(totals, (review_ids[positions], aspect_ids[positions]), window_scores)
+        return (totals > 0).sum(axis=0), (totals < 0).sum(axis=0), len(reviews)
+
+    def counts(self, reviews):
+        """
+        Counts the reviews mentioning each aspect positively and negatively.
+
+        Args:
+            reviews (list or str): The reviews.
+
+        Returns:
+            dict: Aspect name mapped to [positive count, negative count], for the
+                aspects mentioned at least once.
+        """
+        positive, negative, _ = self.score(reviews)
+        return {
+            aspect: [int(positive[i]), int(negative[i])]
+            for i, aspect in enumerate(self.aspects)
+            if positive[i] + negative[i] > 0
+        }
+
+    def analyze(self, reviews, top_n=5):
+        """
+        Produces the aspect list in the same shape as `aspect_processor`.
+
+        Args:
+            reviews (list or str): The reviews.
+            top_n (int, optional): Number of aspects to return. Defaults to 5.
+
+        Returns:
+            list: [aspect, positive percentage, negative percentage] lists, sorted
+                by total mentions, most mentioned first.
+        """
+        positive, negative, n_reviews = self.score(reviews)
+        if n_reviews == 0:
+            return []
+        positive_pct = np.rint(100 * positive / n_reviews).astype(int)
+        negative_pct = np.rint(100 * negative / n_reviews).astype(int)
+        order = np.argsort(-(positive_pct + negative_pct), kind="stable")
+        return [
+            [self.aspects[i], int(positive_pct[i]), int(negative_pct[i])]
+            for i in order[:top_n]
+            if positive_pct[i] + negative_pct[i] > 0
+        ]
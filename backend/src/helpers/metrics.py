@@ -0,0 +1,213 @@
+"""
+Latency metrics per stage (HTTP fetches, HTML parsing, prompt building, LLM calls)
+and per endpoint, exposed in the Prometheus text format, plus the per-request stage
+totals sent back in a Server-Timing header.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+class LatencyHistogram:
+    """Counts observed latencies in cumulative buckets, with their sum."""
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets (tuple, optional): Upper bounds in seconds. Defaults to BUCKETS.
+        """
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        """Records one latency."""
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+
+class MetricsRegistry:
+    """Latency histograms and counters per stage and per endpoint."""
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Initialize the registry.
+
+        Args:
+            buckets (tuple, optional): Histogram upper bounds in seconds.
+                Defaults to BUCKETS.
+        """
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.stages = defaultdict(lambda: LatencyHistogram(self.buckets))
+        self.stage_errors = defaultdict(int)
+        self.endpoints = defaultdict(lambda: LatencyHistogram(self.buckets))
+        self.responses = defaultdict(int)
+
+    def observe_stage(self, stage, seconds, error=False):
+        """
+        Records the latency of a stage.
+
+        Args:
+            stage (str): The stage name, e.g. 'http_fetch'.
+            seconds (float): How long it took.
+            error (bool, optional): Whether it raised. Defaults to False.
+        """
+        with self.lock:
+            self.stages[stage].observe(seconds)
+            if error:
+                self.stage_errors[stage] += 1
+
+    def observe_endpoint(self, endpoint, status, seconds):
+        """
+        Records the latency and status of a response.
+
+        Args:
+            endpoint (str): The route, e.g. '/movie_details'.
+            status (int): The response status code.
+            seconds (float): How long the request took.
+        """
+        with self.lock:
+            self.endpoints[endpoint].observe(seconds)
+            self.responses[(endpoint, status)] += 1
+
+    def render(self):
+        """
+        Formats every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics page.
+        """
+        with self.lock:
+            lines = []
+            lines += self.render_histograms(
+                "letterboxd_stage_seconds", "stage", self.stages,
+                "Time spent in each stage, summed over threads")
+            lines += [
+                "# HELP letterboxd_stage_errors_total Stage calls that raised",
+                "# TYPE letterboxd_stage_errors_total counter",
+            ] + [f'letterboxd_stage_errors_total{{stage="{stage}"}} {count}'
+                 for stage, count in sorted(self.stage_errors.items())]
+            lines += self.render_histograms(
+                "letterboxd_endpoint_seconds", "endpoint", self.endpoints,
+                "Time to answer each endpoint")
+            lines += [
+                "# HELP letterboxd_responses_total Responses by endpoint and status",
+                "# TYPE letterboxd_responses_total counter",
+            ] + [f'letterboxd_responses_total{{endpoint="{endpoint}",status="{status}"}} {count}'
+                 for (endpoint, status), count in sorted(self.responses.items())]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def render_histograms(name, label, histograms, description):
+        """Formats a family of histograms keyed by one label."""
+        lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for key, histogram in sorted(histograms.items()):
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.sum:.6f}')
+            lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+        return lines
+
+
+registry = MetricsRegistry()
+
+
+class RequestTimings:
+    """Time spent per stage while serving one request, across its threads."""
+
+    def __init__(self):
+        """Initialize empty totals."""
+        self.lock = threading.Lock()
+        self.totals = defaultdict(float)
+
+    def add(self, stage, seconds):
+        """Adds time spent in a stage."""
+        with self.lock:
+            self.totals[stage] += seconds
+
+    def server_timing(self, total=None):
+        """
+        Formats the totals as a Server-Timing header value.
+
+        Args:
+            total (float, optional): The whole request in seconds, sent as 'total'.
+
+        Returns:
+            str: E.g. 'http_fetch;dur=412.5, llm;dur=2310.0, total;dur=2750.1'.
+        """
+        with self.lock:
+            timings = dict(self.totals)
+        if total is not None:
+            timings["total"] = total
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}"
+                         for stage, seconds in timings.items())
+
+
+def start_request_timings():
+    """
+    Starts collecting the stage timings of the current request.
+
+    Returns:
+        RequestTimings: The timings the stages of this request add to.
+    """
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+@contextmanager
+def timed_stage(stage):
+    """
+    Times the block as a stage, in the registry and in the current request's timings.
+
+    Args:
+        stage (str): The stage name.
+    """
+    start = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        registry.observe_stage(stage, seconds, error=error)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.add(stage, seconds)
+
+
+def instrument(stage):
+    """
+    Decorates a function so each call is timed as a stage.
+
+    Args:
+        stage (str): The stage name.
+
+    Returns:
+        callable: The decorator.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapped(*args, **kwargs):
+            with timed_stage(stage):
+                return func(*args, **kwargs)
+        return wrapped
+    return decorator
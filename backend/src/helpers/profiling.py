@@ -0,0 +1,122 @@
+"""
+Opt-in request profiling. A request is profiled with cProfile when it carries the
+admin X-Profile header or is picked by the sampling rate. The raw profile and a
+text report of the hottest call paths are saved to a local directory.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+
+
+class RequestProfiler:
+    """Profiles selected requests and saves their profiles to a directory."""
+
+    def __init__(self, directory, sample_rate=0.0, token=None, top_n=30, max_profiles=200):
+        """
+        Initialize the profiler.
+
+        Args:
+            directory (str): Where profiles are saved, created if missing.
+            sample_rate (float, optional): Fraction of requests profiled without the
+                header. Defaults to 0.0.
+            token (str, optional): Value of the X-Profile header that profiles a
+                request. The header is ignored if None. Defaults to None.
+            top_n (int, optional): Call paths listed in each report. Defaults to 30.
+            max_profiles (int, optional): Profiles kept, the oldest are deleted
+                first. Defaults to 200.
+        """
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.token = token
+        self.top_n = top_n
+        self.max_profiles = max_profiles
+        # Only one profiler can be active at a time; concurrent requests are skipped
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def wanted(self, header):
+        """
+        Decides whether to profile a request.
+
+        Args:
+            header (str): The X-Profile header value, or None.
+
+        Returns:
+            bool: True if the header matches the token or the request is sampled.
+        """
+        if self.token and header == self.token:
+            return True
+        return random.random() < self.sample_rate
+
+    def run(self, name, func):
+        """
+        Runs a request handler under cProfile if no other request is being profiled.
+
+        Args:
+            name (str): The endpoint, used in the file names.
+            func (callable): The handler, without arguments.
+
+        Returns:
+            tuple: The handler's return value, and the profile id (None if the
+                request was not profiled).
+        """
+        if not self.lock.acquire(blocking=False):
+            return func(), None
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            try:
+                result = profiler.runcall(func)
+            finally:
+                seconds = time.perf_counter() - start
+                profile_id = self.save(name, profiler, seconds)
+            return result, profile_id
+        finally:
+            self.lock.release()
+
+    def save(self, name, profiler, seconds):
+        """
+        Saves a raw profile (.prof, readable with pstats or snakeviz) and a report of
+        the top call paths by cumulative time (.txt).
+
+        Args:
+            name (str): The endpoint.
+            profiler (cProfile.Profile): The finished profiler.
+            seconds (float): Wall time of the request.
+
+        Returns:
+            str: The profile id, the shared base name of both files.
+        """
+        slug = re.sub(r"[^\w]+", "_", name).strip("_") or "request"
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:8]}"
+        base = os.path.join(self.directory, profile_id)
+        profiler.dump_stats(f"{base}.prof")
+
+        report = io.StringIO()
+        report.write(f"{name} took {seconds:.3f}s\n")
+        report.write("Work done in worker threads shows up as time waiting on them\n\n")
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        with open(f"{base}.txt", "w", encoding="utf-8") as file:
+            file.write(report.getvalue())
+        self.prune()
+        print(f"Saved profile {profile_id} ({seconds:.3f}s)")
+        return profile_id
+
+    def prune(self):
+        """Deletes the oldest profiles past max_profiles."""
+        profiles = sorted(
+            entry for entry in os.listdir(self.directory) if entry.endswith(".prof")
+        )
+        for entry in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            base = os.path.join(self.directory, entry[:-len(".prof")])
+            for extension in (".prof", ".txt"):
+                if os.path.exists(base + extension):
+                    os.remove(base + extension)
@@ -0,0 +1,121 @@
+"""
+Near-duplicate review elimination, so copy-paste memes, repeated one-liners
+and empty reviews are not paid for in the prompt.
+"""
+
+import hashlib
+import re
+import struct
+from collections import defaultdict
+
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+SHINGLE_SIZE = 3
+
+
+def normalize_review(text):
+    """
+    Normalizes a review for comparison: lowercase, no punctuation, single spaces.
+
+    Args:
+        text (str): The review text.
+
+    Returns:
+        str: The normalized text.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def estimate_tokens(text):
+    """Estimates the number of LLM tokens in a text (about four characters each)."""
+    return (len(text) + 3) // 4
+
+
+def minhash_signature(normalized):
+    """
+    Computes a MinHash signature over the word shingles of a normalized review.
+
+    Each shingle is hashed once with blake2b and its 64 byte digest is split into
+    NUM_HASHES independent 16 bit hash values, so no Python-level loop over hash
+    functions is needed.
+
+    Args:
+        normalized (str): A normalized review.
+
+    Returns:
+        tuple: NUM_HASHES integers.
+    """
+    words = normalized.split()
+    if len(words) <= SHINGLE_SIZE:
+        shingles = {normalized}
+    else:
+        shingles = {
+            " ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)
+        }
+    rows = [
+        struct.unpack(f"<{NUM_HASHES}H", hashlib.blake2b(shingle.encode()).digest())
+        for shingle in shingles
+    ]
+    return tuple(min(column) for column in zip(*rows))
+
+
+def similarity(signature1, signature2):
+    """Estimates the Jaccard similarity of two reviews from their signatures."""
+    return sum(a == b for a, b in zip(signature1, signature2)) / NUM_HASHES
+
+
+def dedupe_reviews(reviews_list, threshold=0.8):
+    """
+    Drops empty reviews and collapses exact and near duplicates, keeping the
+    first occurrence (the most popular one, as pages are sorted by activity).
+
+    Near duplicates are found with MinHash and locality-sensitive hashing: only
+    reviews sharing a band of their signature are compared.
+
+    Args:
+        reviews_list (list): Review dictionaries with a 'review_text' key.
+        threshold (float, optional): Estimated Jaccard similarity above which two
+            reviews count as duplicates. Defaults to 0.8.
+
+    Returns:
+        tuple: The kept reviews (list) and a report (dict) with the number of
+            reviews in and kept, empty, exact and near duplicates dropped, and the
+            estimated prompt tokens before, after and saved.
+    """
+    kept = []
+    seen_texts = set()
+    signatures = []
+    buckets = defaultdict(list)
+    report = {"reviews_in": len(reviews_list), "empty": 0, "exact_duplicates": 0,
+              "near_duplicates": 0}
+
+    for review in reviews_list:
+        normalized = normalize_review(review.get("review_text") or "")
+        if not normalized:
+            report["empty"] += 1
+            continue
+        if normalized in seen_texts:
+            report["exact_duplicates"] += 1
+            continue
+        signature = minhash_signature(normalized)
+        bands = [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+        candidates = {index for band in bands for index in buckets[band]}
+        if any(similarity(signature, signatures[index]) >= threshold for index in candidates):
+            report["near_duplicates"] += 1
+            continue
+        seen_texts.add(normalized)
+        for band in bands:
+            buckets[band].append(len(signatures))
+        signatures.append(signature)
+        kept.append(review)
+
+    report["reviews_kept"] = len(kept)
+    report["tokens_before"] = estimate_tokens(
+        " >>>".join(review.get("review_text") or "" for review in reviews_list)
+    )
+    report["tokens_after"] = estimate_tokens(
+        " >>>".join(review["review_text"] for review in kept)
+    )
+    report["tokens_saved"] = report["tokens_before"] - report["tokens_after"]
+    return kept, report
@@ -0,0 +1,441 @@
+"""
+Persistent warehouse of scraped films, film reviews, user reviews and user stats in
+a SQLite file. Each film and user has a crawl watermark: the time of its last
+complete crawl and the pages it covered. Until the watermark is older than the
+refresh interval, analyses read the stored rows without any HTTP request; after
+that, only the pages newer than the last crawl are fetched.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from src.helpers.keyed_locks import KeyedLocks
+from src.helpers.scrapers import (
+    movie_details_scraper,
+    review_key,
+    scrape_new_reviews,
+    scrape_reviews,
+)
+from src.helpers.scrapers_roast import (
+    scrape_new_user_reviews,
+    scrape_user_profile,
+    scrape_user_reviews,
+    scrape_user_stats,
+    user_review_key,
+)
+
+# Reviews on one Letterboxd review page, to turn a page count into a row limit
+REVIEWS_PER_PAGE = 12
+
+# Known review keys compared against when crawling new pages
+KNOWN_KEYS_LIMIT = 500
+
+# Version 2 keys stored reviews by their listing position: version 1 keyed them by
+# a hash of their content, which merged identical reviews, so they are crawled again
+SCHEMA_VERSION = 2
+MIGRATIONS = {
+    2: """
+DROP TABLE IF EXISTS film_reviews;
+DROP TABLE IF EXISTS user_reviews;
+DELETE FROM watermarks WHERE kind IN ('film', 'user');
+""",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS films (
+    film_url TEXT PRIMARY KEY,
+    details TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS film_reviews (
+    film_url TEXT NOT NULL,
+    review_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    review_id TEXT,
+    rating TEXT,
+    review_text TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (film_url, position)
+);
+CREATE TABLE IF NOT EXISTS user_stats (
+    username TEXT PRIMARY KEY,
+    stats TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS user_reviews (
+    username TEXT NOT NULL,
+    review_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    review_id TEXT,
+    movie_name TEXT,
+    movie_url TEXT,
+    movie_year TEXT,
+    rating TEXT,
+    watched_date TEXT,
+    review_text TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    seq INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (username, position)
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    pages INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS write_sequence (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO write_sequence (id, value) VALUES (1, 0);
+"""
+
+# Columns added to tables after they were first created, filled in with their
+# default on existing rows. seq numbers the writes in commit order (see
+# next_sequence), for the columnar export to pick up the rows written since its
+# last run; rows written before it existed have seq 0
+ADDED_COLUMNS = (
+    ("films", "seq", "INTEGER NOT NULL DEFAULT 0"),
+    ("film_reviews", "seq", "INTEGER NOT NULL DEFAULT 0"),
+    ("user_stats", "seq", "INTEGER NOT NULL DEFAULT 0"),
+    ("user_reviews", "seq", "INTEGER NOT NULL DEFAULT 0"),
+)
+
+FILM_REVIEW_COLUMNS = ("review_id", "rating", "review_text")
+USER_REVIEW_COLUMNS = (
+    "review_id", "movie_name", "movie_url", "movie_year", "rating", "watched_date", "review_text",
+)
+
+# The reviews table, review key and review columns of each kind of watermark
+REVIEW_TABLES = {
+    "film": ("film_reviews", "film_url", FILM_REVIEW_COLUMNS),
+    "user": ("user_reviews", "username", USER_REVIEW_COLUMNS),
+}
+
+# The table, key column and JSON column of each kind of stored document
+DOCUMENT_TABLES = {
+    "film_details": ("films", "film_url", "details"),
+    "user_stats": ("user_stats", "username", "stats"),
+}
+
+
+class ReviewWarehouse:
+    """Stores every scraped film and user, crawling each incrementally."""
+
+    def __init__(self, path, max_age=3600.0, clock=time.time):
+        """
+        Initialize the warehouse, creating the database file if needed.
+
+        Args:
+            path (str): The SQLite database file.
+            max_age (float, optional): Seconds before a film or user is crawled
+                again for new reviews. Defaults to 3600.
+            clock (callable, optional): Returns the wall clock time in seconds.
+                Defaults to time.time.
+        """
+        self.path = path
+        self.max_age = max_age
+        self.clock = clock
+        self.local = threading.local()
+        # One crawl at a time per film or user; concurrent requests wait for it
+        self.locks = KeyedLocks()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self.connection()
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if not version:
+            # Version 1 did not record its version; a new file needs no migration
+            version = 1 if connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'film_reviews'").fetchone() \
+                else SCHEMA_VERSION
+        for target in range(version + 1, SCHEMA_VERSION + 1):
+            connection.executescript(MIGRATIONS[target])
+        connection.executescript(SCHEMA)
+        for table, column, definition in ADDED_COLUMNS:
+            existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def connection(self):
+        """Returns this thread's connection, opening it on first use."""
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def crawl_lock(self, kind, key):
+        """Holds the lock serializing the crawls of one film or user."""
+        return self.locks.hold((kind, key))
+
+    def watermark(self, kind, key):
+        """
+        Reads the crawl watermark of a film or user.
+
+        Args:
+            kind (str): 'film', 'film_details', 'user' or 'user_stats'.
+            key (str): The film URL or username.
+
+        Returns:
+            dict: crawled_at and pages of the last complete crawl, or None.
+        """
+        row = self.connection().execute(
+            "SELECT crawled_at, pages FROM watermarks WHERE kind = ? AND key = ?",
+            (kind, key)).fetchone()
+        return None if row is None else {"crawled_at": row[0], "pages": row[1]}
+
+    def is_fresh(self, watermark, pages=0):
+        """Checks a watermark exists, covers enough pages and is within max_age."""
+        return (watermark is not None and watermark["pages"] >= pages
+                and self.clock() - watermark["crawled_at"] < self.max_age)
+
+    def next_sequence(self, connection):
+        """
+        Numbers a write; must be the first statement of its transaction. It takes the
+        write lock, held until the commit, so the numbers increase in commit order.
+        crawled_at does not: it is read before a write waits for the lock.
+        """
+        connection.execute("UPDATE write_sequence SET value = value + 1")
+        return connection.execute("SELECT value FROM write_sequence").fetchone()[0]
+
+    def set_watermark(self, connection, kind, key, pages):
+        """Records a complete crawl, inside the transaction that stored its rows."""
+        connection.execute(
+            "INSERT OR REPLACE INTO watermarks (kind, key, crawled_at, pages) "
+            "VALUES (?, ?, ?, ?)", (kind, key, self.clock(), pages))
+
+    def stored_reviews(self, kind, key, limit=None):
+        """
+        Reads the stored reviews of a film or user.
+
+        Args:
+            kind (str): 'film' or 'user'.
+            key (str): The film URL or username.
+            limit (int, optional): Most reviews returned. Defaults to all.
+
+        Returns:
+            list: Review dictionaries, in the order Letterboxd lists them.
+        """
+        table, key_column, columns = REVIEW_TABLES[kind]
+        rows = self.connection().execute(
+            f"SELECT {', '.join(columns)} FROM {table} WHERE {key_column} = ? "
+            "ORDER BY position LIMIT ?", (key, -1 if limit is None else limit)).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def known_keys(self, kind, key):
+        """Returns the keys of the most recently listed stored reviews."""
+        table, key_column, _ = REVIEW_TABLES[kind]
+        rows = self.connection().execute(
+            f"SELECT review_key FROM {table} WHERE {key_column} = ? "
+            "ORDER BY position LIMIT ?", (key, KNOWN_KEYS_LIMIT)).fetchall()
+        return {row[0] for row in rows}
+
+    def store_reviews(self, kind, key, reviews, pages, prepend):
+        """
+        Stores a complete crawl of reviews and moves the watermark.
+
+        Args:
+            kind (str): 'film' or 'user'.
+            key (str): The film URL or username.
+            reviews (list): The scraped review dictionaries, in listing order.
+            pages (int): Pages the crawl covered.
+            prepend (bool): Whether the reviews are newer than every stored one
+                (an incremental crawl) or replace the stored ones (a full crawl, which
+                covers at least the pages crawled before).
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        table, key_column, columns = REVIEW_TABLES[kind]
+        make_key = review_key if kind == "film" else user_review_key
+        now = self.clock()
+        with self.connection() as connection:
+            seq = self.next_sequence(connection)
+            first = 0
+            if prepend:
+                first = connection.execute(
+                    f"SELECT COALESCE(MIN(position), 0) FROM {table} WHERE {key_column} = ?",
+                    (key,)).fetchone()[0] - len(reviews)
+            else:
+                connection.execute(f"DELETE FROM {table} WHERE {key_column} = ?", (key,))
+            connection.executemany(
+                f"INSERT INTO {table} ({key_column}, review_key, position, "
+                f"{', '.join(columns)}, crawled_at, seq) "
+                f"VALUES ({', '.join('?' * (len(columns) + 5))})",
+                [(key, make_key(review), first + i,
+                  *(review.get(column) or ("" if column == "review_text" else None)
+                    for column in columns), now, seq)
+                 for i, review in enumerate(reviews)])
+            self.set_watermark(connection, kind, key, pages)
+
+    def crawl_reviews(self, kind, key, pages, full, incremental, progress=None):
+        """
+        Returns the reviews of a film or user, crawling only what is needed.
+
+        A film or user without a watermark covering the pages is crawled in full.
+        One whose watermark is older than max_age has its new reviews crawled, from
+        the top of the listing down to the first stored review. A crawl that skipped
+        a page or was cut short by the request deadline is returned but not stored,
+        so no gap is left behind.
+
+        Args:
+            kind (str): 'film' or 'user'.
+            key (str): The film URL or username.
+            pages (int): Review pages wanted.
+            full (callable): Takes a progress dict, scrapes every page and returns
+                the reviews, setting progress['complete'].
+            incremental (callable): Takes the known review keys and a progress dict,
+                returns the new reviews, setting progress['complete'].
+            progress (dict, optional): Set to {'complete': False} if the reviews
+                returned come from a crawl that was not stored, True otherwise.
+
+        Returns:
+            list: The review dictionaries, in listing order.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        limit = pages * REVIEWS_PER_PAGE
+        progress = {} if progress is None else progress
+        with self.crawl_lock(kind, key):
+            watermark = self.watermark(kind, key)
+            if self.is_fresh(watermark, pages):
+                progress["complete"] = True
+                return self.stored_reviews(kind, key, limit)
+            if watermark is None or watermark["pages"] < pages:
+                reviews = full(progress)
+                if progress["complete"]:
+                    self.store_reviews(kind, key, reviews, pages, prepend=False)
+                return reviews[:limit]
+            new_reviews = incremental(self.known_keys(kind, key), progress)
+            if not progress["complete"]:
+                return (new_reviews + self.stored_reviews(kind, key, limit))[:limit]
+            self.store_reviews(kind, key, new_reviews, watermark["pages"], prepend=True)
+            print(f"Crawled {len(new_reviews)} new reviews of {key}")
+            return self.stored_reviews(kind, key, limit)
+
+    def film_reviews(self, film_url, pages=30, progress=None):
+        """
+        Returns a film's reviews from the warehouse, crawling new ones when stale.
+
+        Args:
+            film_url (str): The Letterboxd film URL.
+            pages (int, optional): Review pages wanted. Defaults to 30.
+            progress (dict, optional): Set to {'complete': False} if a page was
+                skipped or the deadline cut the crawl short, True otherwise.
+
+        Returns:
+            list: Dictionaries with the rating and review_text, most active first.
+        """
+        return self.crawl_reviews(
+            "film", film_url, pages,
+            lambda crawl: scrape_reviews(film_url, n=pages, progress=crawl),
+            lambda known, crawl: scrape_new_reviews(
+                film_url, known, n=pages, progress=crawl),
+            progress=progress)
+
+    def user_reviews(self, username, n_pages=10):
+        """
+        Returns a user's reviews from the warehouse, crawling new ones when stale.
+
+        Args:
+            username (str): The Letterboxd username.
+            n_pages (int, optional): Review pages wanted. Defaults to 10.
+
+        Returns:
+            list: The review dictionaries, newest first.
+        """
+        return self.crawl_reviews(
+            "user", username, n_pages,
+            lambda progress: scrape_user_reviews(username, n_pages=n_pages, progress=progress),
+            lambda known, progress: scrape_new_user_reviews(
+                username, known, n_pages=n_pages, progress=progress))
+
+    def document(self, kind, key, scrape):
+        """
+        Returns a film's details or a user's stats, scraping them again when stale.
+
+        Args:
+            kind (str): 'film_details' or 'user_stats'.
+            key (str): The film URL or username.
+            scrape (callable): Scrapes the document.
+
+        Returns:
+            dict: The stored or freshly scraped document.
+        """
+        table, key_column, column = DOCUMENT_TABLES[kind]
+        with self.crawl_lock(kind, key):
+            if self.is_fresh(self.watermark(kind, key)):
+                row = self.connection().execute(
+                    f"SELECT {column} FROM {table} WHERE {key_column} = ?", (key,)).fetchone()
+                if row is not None:
+                    return json.loads(row[0])
+            document = scrape()
+            self.store_document(kind, key, document)
+            return document
+
+    def store_document(self, kind, key, document):
+        """Stores a film's details or a user's stats and moves the watermark."""
+        table, key_column, column = DOCUMENT_TABLES[kind]
+        with self.connection() as connection:
+            seq = self.next_sequence(connection)
+            connection.execute(
+                f"INSERT OR REPLACE INTO {table} ({key_column}, {column}, crawled_at, seq) "
+                "VALUES (?, ?, ?, ?)", (key, json.dumps(document), self.clock(), seq))
+            self.set_watermark(connection, kind, key, 1)
+
+    def film_details(self, film_url):
+        """Returns a film's details, scraped again once older than max_age."""
+        return self.document("film_details", film_url, lambda: movie_details_scraper(film_url))
+
+    def user_stats(self, username):
+        """Returns a user's stats, scraped again once older than max_age."""
+        return self.document("user_stats", username, lambda: scrape_user_stats(username))
+
+    def user_profile(self, username, n_pages=10):
+        """
+        Returns a user's reviews and stats. A user crawled for the first time is
+        scraped with every page fetched concurrently; after that the reviews are
+        crawled incrementally.
+
+        Args:
+            username (str): The Letterboxd username.
+            n_pages (int, optional): Review pages wanted. Defaults to 10.
+
+        Returns:
+            tuple: The review dictionaries (list, newest first) and the statistics (dict).
+        """
+        with self.crawl_lock("user", username):
+            watermark = self.watermark("user", username)
+            if watermark is None or watermark["pages"] < n_pages:
+                progress = {}
+                reviews, stats = scrape_user_profile(username, n_pages=n_pages,
+                                                     progress=progress)
+                if progress["complete"]:
+                    self.store_reviews("user", username, reviews, n_pages, prepend=False)
+                    self.store_document("user_stats", username, stats)
+                return reviews, stats
+        return self.user_reviews(username, n_pages), self.user_stats(username)
+
+    def stats(self):
+        """
+        Reports the size of the warehouse.
+
+        Returns:
+            dict: Films, film reviews, users and user reviews stored.
+        """
+        connection = self.connection()
+        return {
+            name: connection.execute(query).fetchone()[0]
+            for name, query in (
+                ("films", "SELECT COUNT(DISTINCT film_url) FROM film_reviews"),
+                ("film_reviews", "SELECT COUNT(*) FROM film_reviews"),
+                ("users", "SELECT COUNT(DISTINCT username) FROM user_reviews"),
+                ("user_reviews", "SELECT COUNT(*) FROM user_reviews"),
+            )
+        }
@@ -3,7 +3,11 @@ Module containing functions for generating a savage roast based on Letterboxd
 user reviews and statistics.
 """
 
-import google.generativeai as genai
+from src.helpers.circuit_breaker import guarded_call
+from src.helpers.deadlines import check_deadline
+from src.helpers.llm_providers import GeminiProvider
+from src.helpers.metrics import instrument
+from src.helpers.streaming import collect_stream, first_available_stream
 
 
 class RoastGenerationError(Exception):
@@ -16,6 +20,27 @@ class LetterboxdRoastAnalyzer:
     brutally funny roast using an AI model.
     """
 
+    ROAST_WORD_LIMIT = 710
+    ROAST_MODEL = "gemini-2.0-flash"
+
+    def __init__(self, stream_generation=False, breakers=None, provider=None):
+        """
+        Initialize the analyzer.
+
+        Args:
+            stream_generation (bool, optional): Stream roasts, abandoning a generation
+                as soon as it goes over the word limit so the next API key can be tried
+                straight away. Defaults to False.
+            breakers (CircuitBreakerRegistry, optional): When given, calls to a model
+                or API key whose circuit is open are skipped straight away.
+                Defaults to None.
+            provider (LLMProvider, optional): The LLM backend. Defaults to Gemini.
+        """
+        self.stream_generation = stream_generation
+        self.breakers = breakers
+        self.provider = provider if provider is not None else GeminiProvider()
+
+    @instrument("prompt_build")
     def read_user_data(self, reviews_list, stats_dict):
         """
         Reads reviews and statistics, and formats them into a single string.
@@ -57,23 +82,17 @@ class LetterboxdRoastAnalyzer:
         )
         return combined_text
 
-    def generate_roast(self, user_data, api_key):
+    @instrument("prompt_build")
+    def build_roast_prompt(self, user_data):
         """
-        Generates a savage roast using the provided user data.
+        Builds the roast prompt for the provided user data.
 
         Args:
             user_data (str): The combined reviews and stats text.
-            api_key (str): The API key for the AI model.
 
         Returns:
-            str: The generated roast.
-
-        Raises:
-            RoastGenerationError: If the roast is too long or an error occurs.
+            str: The roast prompt.
         """
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel("gemini-2.0-flash")
-
         prompt = f""" You're a ruthless, wildly funny film critic, and your job is to
                       obliterate this user's Letterboxd taste in a way that's fast, savage,
                       and impossible to ignore. No lists, no formatting—just a single,
@@ -103,15 +122,69 @@ class LetterboxdRoastAnalyzer:
                       must be plain text only.
                       - Only use alphanumeric characters or punctuation. No special characters.
                   """
+        return prompt
+
+    def generate_roast(self, user_data, api_key):
+        """
+        Generates a savage roast using the provided user data.
+
+        Args:
+            user_data (str): The combined reviews and stats text.
+            api_key (str): The API key for the AI model.
+
+        Returns:
+            str: The generated roast.
+
+        Raises:
+            RoastGenerationError: If the roast is too long or an error occurs.
+        """
+        if self.stream_generation:
+            return collect_stream(
+                self.stream_roast(user_data, api_key),
+                self.ROAST_WORD_LIMIT,
+                RoastGenerationError,
+                "Roast generated is too long.",
+            )
 
-        response = model.generate_content(prompt)
-        roast = response.text
+        prompt = self.build_roast_prompt(user_data)
 
-        if len(roast.split()) > 710:
+        roast = guarded_call(
+            self.breakers,
+            self.ROAST_MODEL,
+            api_key,
+            lambda: self.provider.generate(self.ROAST_MODEL, prompt, api_key),
+        )
+
+        if len(roast.split()) > self.ROAST_WORD_LIMIT:
             raise RoastGenerationError("Roast generated is too long.")
 
         return roast
 
+    def stream_roast(self, user_data, api_key):
+        """
+        Streams a savage roast for the provided user data as it is generated.
+
+        Args:
+            user_data (str): The combined reviews and stats text.
+            api_key (str): The API key for the AI model.
+
+        Yields:
+            str: Pieces of the roast as they arrive.
+        """
+        try:
+            prompt = self.build_roast_prompt(user_data)
+            tokens = guarded_call(
+                self.breakers,
+                self.ROAST_MODEL,
+                api_key,
+                lambda: self.provider.stream(self.ROAST_MODEL, prompt, api_key),
+                stream=True,
+            )
+        except Exception as error:
+            raise ValueError(f"Error streaming roast: {error}") from error
+
+        yield from tokens
+
     def get_results(self, reviews_list, stats_dict, api_keys):
         """
         Generates the final roast by combining reviews and stats, and calling the AI
@@ -127,10 +200,12 @@ class LetterboxdRoastAnalyzer:
 
         Raises:
             RoastGenerationError: If roast generation fails after multiple attempts.
+            DeadlineExceeded: If the request deadline runs out first.
         """
         user_data = self.read_user_data(reviews_list, stats_dict)
         roast = None
         for i, key in enumerate(api_keys):
+            check_deadline(f"roast attempt {i + 1}")
             try:
                 roast = self.generate_roast(user_data, key)
                 if roast and roast.strip():
@@ -144,3 +219,20 @@ class LetterboxdRoastAnalyzer:
             )
 
         return roast
+
+    def get_results_stream(self, reviews_list, stats_dict, api_keys):
+        """
+        Streams the final roast from the first API key that starts responding.
+
+        Args:
+            reviews_list (list): A list of review dictionaries.
+            stats_dict (dict): A dictionary containing user statistics.
+            api_keys (list): A list of API keys for generating the roast.
+
+        Returns:
+            generator: Yields pieces of the roast as they arrive.
+        """
+        user_data = self.read_user_data(reviews_list, stats_dict)
+        return first_available_stream(
+            lambda key: self.stream_roast(user_data, key), api_keys
+        )
@@ -2,9 +2,22 @@
 Scraper functions for extracting movie details and reviews from Letterboxd.
 """
 
+import hashlib
 import re
 import requests
-from bs4 import BeautifulSoup
+from src.helpers.deadlines import (
+    DeadlineExceeded,
+    check_deadline,
+    deadline_expired,
+    time_left,
+)
+from src.helpers.metrics import instrument, timed_stage
+
+
+# Letterboxd marks each review with its viewing id, e.g. data-object-id="viewing:1234"
+VIEWING_ID = re.compile(r"viewing:\d+")
+VIEWING_ATTRIBUTES = ("data-object-id", "data-likeable-uid", "data-full-text-url")
+VIEWING_SELECTOR = ", ".join(f"[{attribute}]" for attribute in VIEWING_ATTRIBUTES)
 
 
 class ScraperError(Exception):
@@ -17,9 +30,16 @@ def validate_letterboxd_film_url(film_url):
     return bool(re.match(pattern, film_url))
 
 
+@instrument("http_fetch")
 def fetch_html_content(url, headers):
-    """Fetches HTML content from a given URL."""
-    response = requests.get(url, headers=headers, timeout=10)
+    """Fetches HTML content from a given URL, within the request deadline if one is set."""
+    check_deadline(f"fetching {url}")
+    try:
+        response = requests.get(url, headers=headers, timeout=time_left(10))
+    except requests.exceptions.Timeout as error:
+        if deadline_expired():
+            raise DeadlineExceeded(f"Request deadline exceeded fetching {url}") from error
+        raise
     if response.status_code == 200:
         return response.text
     raise ScraperError(
@@ -27,38 +47,158 @@ def fetch_html_content(url, headers):
     )
 
 
-def scrape_reviews(film_url, n=30):
-    """Scrapes reviews from a Letterboxd movie page."""
+def parse_html(html_content):
+    """Parses an HTML page, importing BeautifulSoup on first use to keep startup fast."""
+    from bs4 import BeautifulSoup  # pylint: disable=import-outside-toplevel
+    return BeautifulSoup(html_content, "html.parser")
+
+
+@instrument("html_parse")
+def parse_film_reviews(html_content):
+    """Parses the reviews on one page of a film's review listing."""
+    soup = parse_html(html_content)
+    reviews_data = []
+    for review in soup.select("li.film-detail"):
+        review_text = review.select_one(".js-review-body p")
+        rating = review.select_one(".rating")
+        reviews_data.append({
+            "review_id": review_id(review),
+            "rating": rating.get_text(strip=True) if rating else None,
+            "review_text": review_text.get_text(strip=True) if review_text else "",
+        })
+    return reviews_data
+
+
+def review_id(element):
+    """
+    Reads the Letterboxd identifier of a review element: its viewing id, found on
+    the element, inside it (like button, full text link) or on its parent, or else
+    its permalink.
+
+    Args:
+        element (bs4.element.Tag): The review element.
+
+    Returns:
+        str: e.g. 'viewing:622379101' or '/user/film/slug/', None if there is neither.
+    """
+    candidates = [element, *element.select(VIEWING_SELECTOR)]
+    if element.parent is not None:
+        candidates.append(element.parent)
+    for candidate in candidates:
+        for attribute in VIEWING_ATTRIBUTES:
+            match = VIEWING_ID.search(candidate.get(attribute) or "")
+            if match:
+                return match.group(0)
+    permalink = element.select_one("a.context[href]")
+    return permalink["href"] if permalink else None
+
+
+def review_key(review):
+    """
+    Identifies a scraped review by its Letterboxd id. Pages without ids fall back to
+    a hash of the rating and text, which cannot tell identical reviews apart.
+    """
+    if review.get("review_id"):
+        return hashlib.sha1(review["review_id"].encode()).hexdigest()[:16]
+    content = f"{review.get('rating')}|{review.get('review_text') or ''}"
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+def scrape_reviews(film_url, n=30, progress=None):
+    """
+    Scrapes reviews from a Letterboxd movie page.
+
+    Args:
+        film_url (str): The Letterboxd film URL.
+        n (int, optional): Number of pages to read. Defaults to 30.
+        progress (dict, optional): Set to {'complete': False} if a page was
+            skipped or the deadline cut the crawl short, True otherwise.
+
+    Returns:
+        list: The review dictionaries, most active first.
+    """
     if not validate_letterboxd_film_url(film_url):
         raise ValueError(f"Invalid URL: {film_url}")
 
     headers = {"User-Agent": "Mozilla/5.0"}
 
     reviews_data = []
+    complete = True
 
     for page in range(1, n + 1):
+        if deadline_expired():
+            print(f"Deadline reached, keeping the reviews of {page - 1} pages")
+            complete = False
+            break
         try:
             html_content = fetch_html_content(
                 f"{film_url}reviews/by/activity/page/{page}/", headers
             )
         except ScraperError:
+            complete = False
             continue
+        except DeadlineExceeded:
+            complete = False
+            break
+
+        reviews_data.extend(parse_film_reviews(html_content))
 
-        soup = BeautifulSoup(html_content, "html.parser")
-        reviews = soup.select("li.film-detail")
+    if progress is not None:
+        progress["complete"] = complete
+    return reviews_data
 
-        if not reviews:
-            pass
 
-        for review in reviews:
-            review_text = review.select_one(".js-review-body p")
-            rating = review.select_one(".rating")
-            reviews_data.append({
-                "rating": rating.get_text(strip=True) if rating else None,
-                "review_text": review_text.get_text(strip=True) if review_text else "",
-            })
+def scrape_new_reviews(film_url, known_keys, n=30, progress=None):
+    """
+    Scrapes only the reviews not seen before, reading the activity-sorted pages
+    from the top and stopping at the first already known review.
 
-    return reviews_data
+    Args:
+        film_url (str): The Letterboxd film URL.
+        known_keys (set): The review_key of every review already seen.
+        n (int, optional): Maximum number of pages to read. Defaults to 30.
+        progress (dict, optional): Set to {'complete': False} if a page was
+            skipped or the deadline cut the crawl short, True otherwise.
+
+    Returns:
+        list: The new review dictionaries, most active first.
+    """
+    if not validate_letterboxd_film_url(film_url):
+        raise ValueError(f"Invalid URL: {film_url}")
+
+    headers = {"User-Agent": "Mozilla/5.0"}
+
+    new_reviews = []
+    complete = True
+
+    for page in range(1, n + 1):
+        if deadline_expired():
+            print(f"Deadline reached, keeping the reviews of {page - 1} pages")
+            complete = False
+            break
+        try:
+            html_content = fetch_html_content(
+                f"{film_url}reviews/by/activity/page/{page}/", headers
+            )
+        except ScraperError:
+            complete = False
+            continue
+        except DeadlineExceeded:
+            complete = False
+            break
+
+        page_reviews = parse_film_reviews(html_content)
+        if not page_reviews:
+            break
+        known = next((i for i, review in enumerate(page_reviews)
+                      if review_key(review) in known_keys), None)
+        new_reviews.extend(page_reviews[:known])
+        if known is not None:
+            break
+
+    if progress is not None:
+        progress["complete"] = complete
+    return new_reviews
 
 
 def movie_details_scraper(url):
@@ -69,7 +209,8 @@ def movie_details_scraper(url):
     headers = {"User-Agent": "Mozilla/5.0"}
     html_content = fetch_html_content(url, headers=headers)
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    with timed_stage("html_parse"):
+        soup = parse_html(html_content)
 
     def extract_text(selector):
         element = soup.select_one(selector)
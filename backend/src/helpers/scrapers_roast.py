@@ -1,7 +1,18 @@
 """Scraper module for Letterboxd user profiles."""
 
+import functools
+import hashlib
+
 import requests
-from bs4 import BeautifulSoup
+from src.helpers.deadlines import (
+    DeadlineExceeded,
+    check_deadline,
+    deadline_expired,
+    time_left,
+)
+from src.helpers.metrics import instrument, timed_stage
+from src.helpers.scrapers import review_id
+from src.helpers.stages import format_timings, run_stages
 
 
 class ScraperError(Exception):
@@ -19,13 +30,17 @@ def validate_letterboxd_user(username):
         bool: True if the user exists, False otherwise.
     """
     profile_url = f"https://letterboxd.com/{username}/"
+    check_deadline(f"fetching {profile_url}")
     try:
-        response = requests.get(profile_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        with timed_stage("http_fetch"):
+            response = requests.get(
+                profile_url, headers={"User-Agent": "Mozilla/5.0"}, timeout=time_left(10)
+            )
     except Exception as e:
         raise ScraperError(f"Error fetching {profile_url}: {e}") from e
     if response.status_code != 200:
         return False
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = parse_html(response.text)
     error_h1 = soup.find("h1")
     error_strong = soup.find("strong")
     error_body = soup.find("body", class_="error message-dark")
@@ -38,6 +53,17 @@ def validate_letterboxd_user(username):
     return True
 
 
+def parse_html(html_content):
+    """
+    Parses an HTML page, timing it as the html_parse stage. BeautifulSoup is
+    imported on first use to keep startup fast.
+    """
+    from bs4 import BeautifulSoup  # pylint: disable=import-outside-toplevel
+    with timed_stage("html_parse"):
+        return BeautifulSoup(html_content, "html.parser")
+
+
+@instrument("http_fetch")
 def fetch_html_content(url, headers):
     """
     Fetches HTML content from a given URL.
@@ -51,8 +77,15 @@ def fetch_html_content(url, headers):
 
     Raises:
         ScraperError: If fetching the URL fails.
+        DeadlineExceeded: If the request deadline passes first.
     """
-    response = requests.get(url, headers=headers, timeout=10)
+    check_deadline(f"fetching {url}")
+    try:
+        response = requests.get(url, headers=headers, timeout=time_left(10))
+    except requests.exceptions.Timeout as error:
+        if deadline_expired():
+            raise DeadlineExceeded(f"Request deadline exceeded fetching {url}") from error
+        raise
     if response.status_code == 200:
         return response.text
     raise ScraperError(f"Failed to fetch {url}. Status code: {response.status_code}")
@@ -90,6 +123,7 @@ def parse_review_element(element):
     review_tag = element.find("div", class_="js-review-body")
     review_text = review_tag.get_text(strip=True) if review_tag else ""
     return {
+        "review_id": review_id(element),
         "movie_name": movie_name,
         "movie_url": movie_url,
         "movie_year": movie_year,
@@ -99,13 +133,34 @@ def parse_review_element(element):
     }
 
 
-def scrape_user_reviews(username, n_pages=10):
+def last_review_page(soup):
+    """
+    Reads the number of review pages from the pagination of a reviews page.
+
+    Args:
+        soup (BeautifulSoup): The parsed reviews page.
+
+    Returns:
+        int: The last page number, 1 if there is no pagination.
+    """
+    try:
+        return max(
+            int(link.get_text()) for link in soup.find_all("li", class_="paginate-page")
+            if link.get_text().isdigit()
+        ) if soup.find_all("li", class_="paginate-page") else 1
+    except ValueError:
+        return 1
+
+
+def scrape_user_reviews(username, n_pages=10, progress=None):
     """
     Scrapes user reviews from a Letterboxd profile.
 
     Args:
         username (str): The Letterboxd username.
         n_pages (int): Maximum number of review pages to scrape.
+        progress (dict, optional): Set to {'complete': False} if a page was
+            skipped or the deadline cut the crawl short, True otherwise.
 
     Returns:
         list: A list of dictionaries, each containing details of a review.
@@ -117,29 +172,90 @@ def scrape_user_reviews(username, n_pages=10):
         raise ValueError(f"Invalid or non-existent user profile: {username}")
 
     base_url = f"https://letterboxd.com/{username}/films/reviews/"
-    soup = BeautifulSoup(fetch_html_content(base_url, {"User-Agent": "Mozilla/5.0"}), "html.parser")
-    try:
-        last_page = max(
-            int(link.get_text()) for link in soup.find_all("li", class_="paginate-page")
-            if link.get_text().isdigit()
-        ) if soup.find_all("li", class_="paginate-page") else 1
-    except ValueError:
-        last_page = 1
+    soup = parse_html(fetch_html_content(base_url, {"User-Agent": "Mozilla/5.0"}))
+    last_page = last_review_page(soup)
 
     reviews = []
+    complete = True
     for page in range(1, min(n_pages, last_page) + 1):
+        if deadline_expired():
+            print(f"Deadline reached, keeping the reviews of {page - 1} pages")
+            complete = False
+            break
         page_url = f"{base_url}page/{page}/"
         try:
-            page_soup = BeautifulSoup(
-                fetch_html_content(page_url, {"User-Agent": "Mozilla/5.0"}), "html.parser"
-            )
+            page_soup = parse_html(fetch_html_content(page_url, {"User-Agent": "Mozilla/5.0"}))
         except ScraperError:
+            complete = False
             continue
+        except DeadlineExceeded:
+            complete = False
+            break
         for element in page_soup.find_all("div", class_="film-detail-content"):
             reviews.append(parse_review_element(element))
+    if progress is not None:
+        progress["complete"] = complete
     return reviews
 
 
+def user_review_key(review):
+    """
+    Identifies a scraped user review by its Letterboxd id. Pages without ids fall
+    back to a hash of its film, watch date, rating and text.
+    """
+    if review.get("review_id"):
+        return hashlib.sha1(review["review_id"].encode()).hexdigest()[:16]
+    content = "|".join(str(review.get(field)) for field in
+                       ("movie_url", "watched_date", "rating", "review_text"))
+    return hashlib.sha1(content.encode()).hexdigest()[:16]
+
+
+def scrape_new_user_reviews(username, known_keys, n_pages=10, progress=None):
+    """
+    Scrapes only the reviews a user posted since the last crawl, reading the
+    newest-first review pages from the top and stopping at the first known review.
+    The profile is not validated again, it was when it was first crawled.
+
+    Args:
+        username (str): The Letterboxd username.
+        known_keys (set): The user_review_key of every review already seen.
+        n_pages (int, optional): Maximum number of pages to read. Defaults to 10.
+        progress (dict, optional): Set to {'complete': False} if a page could not
+            be fetched or the deadline cut the crawl short, True otherwise.
+
+    Returns:
+        list: The new review dictionaries, newest first.
+    """
+    new_reviews = []
+    complete = True
+    last_page = n_pages
+    for page in range(1, n_pages + 1):
+        if page > last_page:
+            break
+        if deadline_expired():
+            print(f"Deadline reached, keeping the reviews of {page - 1} pages")
+            complete = False
+            break
+        page_soup = fetch_review_page(username, page)
+        if page_soup is None:
+            complete = False
+            break
+        if page == 1:
+            last_page = last_review_page(page_soup)
+        elements = page_soup.find_all("div", class_="film-detail-content")
+        if not elements:
+            break
+        reviews = [parse_review_element(element) for element in elements]
+        known = next((i for i, review in enumerate(reviews)
+                      if user_review_key(review) in known_keys), None)
+        new_reviews.extend(reviews[:known])
+        if known is not None:
+            break
+    if progress is not None:
+        progress["complete"] = complete
+    return new_reviews
+
+
 def scrape_user_stats(username):
     """
     Scrapes user statistics from a Letterboxd profile.
@@ -159,8 +275,21 @@ def scrape_user_stats(username):
         html_content = fetch_html_content(stats_url, {"User-Agent": "Mozilla/5.0"})
     except ScraperError:
         return {}
+    return parse_user_stats(html_content)
+
 
-    soup = BeautifulSoup(html_content, "html.parser")
+def parse_user_stats(html_content):
+    """
+    Parses the statistics of a Letterboxd stats page.
+
+    Args:
+        html_content (str): HTML of the stats page.
+
+    Returns:
+        dict: A dictionary containing user statistics, or an empty dict if the page
+              is an error page.
+    """
+    soup = parse_html(html_content)
     error_h1 = soup.find("h1")
     error_strong = soup.find("strong")
     error_body = soup.find("body", class_="error message-dark")
@@ -183,3 +312,86 @@ def scrape_user_stats(username):
         else:
             stats_dict[key] = None
     return stats_dict
+
+
+def fetch_review_page(username, page):
+    """
+    Fetches one page of a user's reviews, for the concurrent profile scrape.
+
+    Args:
+        username (str): The Letterboxd username.
+        page (int): The page number.
+
+    Returns:
+        BeautifulSoup: The parsed page, or None if it could not be fetched in time.
+    """
+    page_url = f"https://letterboxd.com/{username}/films/reviews/page/{page}/"
+    try:
+        return parse_html(fetch_html_content(page_url, {"User-Agent": "Mozilla/5.0"}))
+    except (ScraperError, DeadlineExceeded):
+        return None
+
+
+def fetch_stats_page(username):
+    """Fetches and parses a user's stats page, an empty dict if it is unavailable."""
+    try:
+        return parse_user_stats(
+            fetch_html_content(f"https://letterboxd.com/{username}/stats",
+                               {"User-Agent": "Mozilla/5.0"})
+        )
+    except ScraperError:
+        return {}
+
+
+def scrape_user_profile(username, n_pages=10, progress=None):
+    """
+    Scrapes a user's reviews and statistics concurrently, validating the profile once.
+
+    The profile page, the stats page and the first reviews page are fetched together.
+    The remaining review pages, whose number is only known from the first page, are
+    then fetched together too.
+
+    Args:
+        username (str): The Letterboxd username.
+        n_pages (int): Maximum number of review pages to scrape.
+
+        progress (dict, optional): Set to {'complete': False} if a review page
+            could not be fetched in time, True otherwise.
+
+    Returns:
+        tuple: The reviews (list of dicts, newest first) and the statistics (dict).
+
+    Raises:
+        ValueError: If the user profile is invalid.
+        ScraperError: If the first reviews page cannot be fetched.
+    """
+    results, timings = run_stages({
+        "profile": lambda: validate_letterboxd_user(username),
+        "stats": lambda: fetch_stats_page(username),
+        "first_page": lambda: fetch_review_page(username, 1),
+    })
+    if not results["profile"]:
+        raise ValueError(f"Invalid or non-existent user profile: {username}")
+    first_page = results["first_page"]
+    if first_page is None:
+        raise ScraperError(f"Failed to fetch the reviews of {username}")
+
+    pages = [first_page]
+    remaining = range(2, min(n_pages, last_review_page(first_page)) + 1)
+    if remaining:
+        page_results, page_timings = run_stages({
+            f"page_{page}": functools.partial(fetch_review_page, username, page)
+            for page in remaining
+        })
+        pages += [page_results[f"page_{page}"] for page in remaining]
+        timings["pages"] = page_timings["total"]
+    print(f"Profile stages for {username}: {format_timings(timings)}")
+
+    reviews = []
+    for page_soup in pages:
+        if page_soup is not None:
+            reviews += [parse_review_element(element)
+                        for element in page_soup.find_all("div", class_="film-detail-content")]
+    if progress is not None:
+        progress["complete"] = None not in pages
+    return reviews, results["stats"]
@@ -0,0 +1,62 @@
+"""
+Runs the independent stages of a request (scrapes, page fetches) in parallel threads
+and times each one, so a request takes as long as its slowest stage.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.helpers.deadlines import propagate_deadline
+
+
+def timed(func, timings, name):
+    """
+    Wraps a stage so its duration is recorded, even if it fails.
+
+    Args:
+        func (callable): The stage.
+        timings (dict): Where the duration in seconds is stored.
+        name (str): The stage name.
+
+    Returns:
+        callable: The wrapped stage.
+    """
+    def run():
+        start = time.perf_counter()
+        try:
+            return func()
+        finally:
+            timings[name] = time.perf_counter() - start
+    return run
+
+
+def run_stages(stages):
+    """
+    Runs stages concurrently under the current request deadline.
+
+    Args:
+        stages (dict): Callables taking no arguments, keyed by stage name.
+
+    Returns:
+        tuple: The results keyed by stage name (dict), and the duration in seconds of
+            each stage plus 'total' for the whole call (dict).
+
+    Raises:
+        Exception: The error of the first failed stage, in the order given, once
+            every stage has finished.
+    """
+    timings = {}
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+        futures = {
+            name: executor.submit(propagate_deadline(timed(func, timings, name)))
+            for name, func in stages.items()
+        }
+    timings["total"] = time.perf_counter() - start
+    results = {name: future.result() for name, future in futures.items()}
+    return results, timings
+
+
+def format_timings(timings):
+    """Formats stage durations for logging, e.g. 'scrape=1.20s total=1.21s'."""
+    return " ".join(f"{name}={seconds:.2f}s" for name, seconds in timings.items())
@@ -0,0 +1,58 @@
+"""
+Small persistent state stores shared by the incremental refresh and taste profiles.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+
+class JsonStateStore:
+    """Keeps one JSON document per key (a film URL, a username) as files in a directory."""
+
+    def __init__(self, directory):
+        """
+        Initialize the store, creating its directory if needed.
+
+        Args:
+            directory (str): Directory holding one JSON file per key.
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        """Returns the path of the state file of a key."""
+        name = hashlib.sha256(key.encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{name}.json")
+
+    def get(self, key):
+        """
+        Reads the stored state of a key.
+
+        Args:
+            key (str): The key, such as a film URL or a username.
+
+        Returns:
+            dict: The stored state, or None if nothing was stored for the key.
+        """
+        try:
+            with self.lock, open(self.path(key), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, state):
+        """
+        Writes the state of a key, replacing the previous one atomically.
+
+        Args:
+            key (str): The key, such as a film URL or a username.
+            state (dict): The state to store.
+        """
+        path = self.path(key)
+        with self.lock:
+            with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+                json.dump(state, file)
+            os.replace(f"{path}.tmp", path)
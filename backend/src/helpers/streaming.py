@@ -0,0 +1,187 @@
+"""Helpers for consuming streamed (token by token) LLM responses."""
+
+from src.helpers.deadlines import check_deadline
+
+
+class StreamError(Exception):
+    """Custom exception for streams that could not be started."""
+
+
+class StreamCancelled(StreamError):
+    """Custom exception for streams abandoned because their output is no longer needed."""
+
+
+class StreamTooLong(StreamError):
+    """Custom exception for streams abandoned for going over their word limit."""
+
+
+def chunk_text(chunk):
+    """
+    Returns the text of a streamed response chunk.
+
+    Args:
+        chunk: A chunk yielded by a streamed `generate_content` call.
+
+    Returns:
+        str: The chunk text, or an empty string if the chunk carries no text
+            (for example the final chunk holding only the finish reason).
+    """
+    try:
+        return chunk.text or ""
+    except (ValueError, AttributeError):
+        return ""
+
+
+def cancel_stream(response):
+    """
+    Cancels the network call behind a streamed response, if it is still open.
+
+    `GenerateContentResponse` does not expose a public cancel, but the gRPC
+    iterator it wraps does, so look it up defensively.
+
+    Args:
+        response: A streamed response object.
+    """
+    iterator = getattr(response, "_iterator", None)
+    cancel = getattr(iterator, "cancel", None)
+    if callable(cancel):
+        cancel()
+
+
+def iter_stream_text(response):
+    """
+    Yields the non-empty text pieces of a streamed response.
+
+    The underlying call is cancelled when the generator is closed early.
+
+    Args:
+        response: A streamed response object.
+
+    Yields:
+        str: Text pieces as they arrive.
+
+    Raises:
+        ValueError: If the stream fails midway.
+    """
+    try:
+        for chunk in response:
+            text = chunk_text(chunk)
+            if text:
+                yield text
+    except Exception as error:
+        raise ValueError(f"Error streaming response: {error}") from error
+    finally:
+        cancel_stream(response)
+
+
+def first_available_stream(make_stream, api_keys):
+    """
+    Streams from the first API key that produces output.
+
+    A key is only abandoned if it fails before its first chunk; once text has
+    been sent to the caller it cannot be taken back, so later errors propagate.
+
+    Args:
+        make_stream (callable): Called with an API key, returns a text generator.
+        api_keys (list): API keys to try in order.
+
+    Yields:
+        str: Text pieces from the first working key.
+
+    Raises:
+        StreamError: If no key produced any output.
+    """
+    for i, key in enumerate(api_keys):
+        stream = make_stream(key)
+        try:
+            first = next(stream)
+        except StopIteration:
+            print(f"Empty stream with API key {i}")
+            continue
+        except ValueError as error:
+            print(f"Error starting stream with API key {i}: {error}")
+            continue
+        yield first
+        yield from stream
+        return
+    raise StreamError("Failed to start stream after trying every API key")
+
+
+def close_stream(chunks):
+    """Closes a text stream if it can be closed, cancelling the underlying generation."""
+    close = getattr(chunks, "close", None)
+    if callable(close):
+        close()
+
+
+def limit_words(chunks, max_words, error_cls, message):
+    """
+    Passes a text stream through until it goes over a word limit.
+
+    Words are counted incrementally, so a word split across two chunks is only
+    counted once. The piece that goes over the limit is not passed on, and the
+    stream is closed once the limit is hit or the generator is closed.
+
+    Args:
+        chunks (generator): Yields text pieces.
+        max_words (int): The largest acceptable number of words.
+        error_cls (type): The exception raised when the limit is exceeded.
+        message (str): The message of that exception.
+
+    Yields:
+        str: The non-empty text pieces within the limit.
+
+    Raises:
+        error_cls: Once the text goes over max_words.
+    """
+    words = 0
+    inside_word = False
+    try:
+        for piece in chunks:
+            if not piece:
+                continue
+            words += len(piece.split())
+            if inside_word and not piece[0].isspace():
+                words -= 1
+            inside_word = not piece[-1].isspace()
+            if words > max_words:
+                raise error_cls(message)
+            yield piece
+    finally:
+        close_stream(chunks)
+
+
+def collect_stream(chunks, max_words, error_cls, message, cancelled=None):
+    """
+    Joins a text stream, abandoning it as soon as it goes over a word limit.
+
+    Closing the stream cancels the underlying generation.
+
+    Args:
+        chunks (generator): Yields text pieces.
+        max_words (int): The largest acceptable number of words.
+        error_cls (type): The exception raised when the limit is exceeded.
+        message (str): The message of that exception.
+        cancelled (threading.Event, optional): Once set, the stream is abandoned
+            at the next chunk. Defaults to None.
+
+    Returns:
+        str: The complete text.
+
+    Raises:
+        error_cls: If the text goes over max_words.
+        StreamCancelled: If cancelled was set before the stream finished.
+        DeadlineExceeded: If the request deadline passed before the stream finished.
+    """
+    parts = []
+    limited = limit_words(chunks, max_words, error_cls, message)
+    try:
+        for piece in limited:
+            if cancelled is not None and cancelled.is_set():
+                raise StreamCancelled("Stream cancelled")
+            check_deadline("the stream finished")
+            parts.append(piece)
+    finally:
+        limited.close()
+        close_stream(chunks)
+    return "".join(parts)
@@ -0,0 +1,114 @@
+"""
+Cached per-user taste profiles, so /taste sends a short summary of a user's likes
+and dislikes instead of re-scraping and re-sending all of their reviews.
+"""
+
+import time
+
+from src.helpers.scrapers_roast import scrape_user_reviews, user_review_key
+
+PROFILE_TTL = 7 * 24 * 3600
+
+
+class TasteProfiles:
+    """Builds, stores and refreshes condensed taste profiles keyed by username."""
+
+    def __init__(self, analyzer, store, ttl=PROFILE_TTL, fetch_reviews=scrape_user_reviews):
+        """
+        Initialize the profile cache.
+
+        Args:
+            analyzer (LetterboxdReviewAnalyzer): Formats reviews and writes the profiles.
+            store (JsonStateStore): Where profiles are kept, keyed by username.
+            ttl (float, optional): Seconds after which a profile is rebuilt even if
+                the user posted nothing new. Defaults to a week.
+            fetch_reviews (callable, optional): Called as fetch_reviews(username,
+                n_pages=...) to get a user's reviews. Defaults to scrape_user_reviews.
+        """
+        self.analyzer = analyzer
+        self.store = store
+        self.ttl = ttl
+        self.fetch_reviews = fetch_reviews
+
+    def is_fresh(self, state, username):
+        """
+        Checks a stored profile is younger than the TTL and that the newest review
+        on the first page of the user's reviews is the one it was built from.
+
+        Args:
+            state (dict): The stored profile, or None.
+            username (str): The Letterboxd username.
+
+        Returns:
+            bool: True if the profile can be used as is.
+        """
+        if state is None or time.time() - state["built_at"] >= self.ttl:
+            return False
+        first_page = self.fetch_reviews(username, n_pages=1)
+        latest_key = user_review_key(first_page[0]) if first_page else None
+        return latest_key == state["latest_key"]
+
+    def build(self, username, api_keys):
+        """
+        Scrapes a user's reviews and condenses them into a profile.
+
+        Args:
+            username (str): The Letterboxd username.
+            api_keys (list): A list of API keys for writing the profile.
+
+        Returns:
+            dict: The profile state, with the profile text (None if generation
+                failed), the user's own reviews by movie name and the prompt text.
+        """
+        reviews = self.fetch_reviews(username, n_pages=10)
+        user_reviews = self.analyzer.read_user_data(reviews)
+        if len(user_reviews.split()) < 100:
+            raise ValueError("Not enough user reviews found")
+        return {
+            "profile": self.analyzer.get_taste_profile(user_reviews, api_keys),
+            "reviewed": {
+                review["movie_name"].lower(): review["review_text"]
+                for review in reviews
+                if review.get("movie_name") and review.get("review_text")
+            },
+            "latest_key": user_review_key(reviews[0]),
+            "built_at": time.time(),
+            "user_reviews": user_reviews,
+        }
+
+    def get(self, username, api_keys):
+        """
+        Returns the text to send as the user's reviews in a taste match prompt.
+
+        Args:
+            username (str): The Letterboxd username.
+            api_keys (list): A list of API keys for writing the profile.
+
+        Returns:
+            tuple: The prompt text (the profile and the names of the movies the user
+                reviewed, or every review if no profile could be written) and the
+                user's own reviews keyed by lowercase movie name (dict).
+        """
+        state = self.store.get(username)
+        if not self.is_fresh(state, username):
+            state = self.build(username, api_keys)
+            if state["profile"] is None:
+                return state["user_reviews"], state["reviewed"]
+            del state["user_reviews"]
+            self.store.put(username, state)
+        movies = ", ".join(state["reviewed"])
+        return f"{state['profile']}\nMovies already reviewed: {movies}", state["reviewed"]
+
+
+def own_review(reviewed, movie_name):
+    """
+    Looks up the user's own review of a movie.
+
+    Args:
+        reviewed (dict): The user's reviews keyed by lowercase movie name.
+        movie_name (str): The movie name.
+
+    Returns:
+        str: The review text, or None if the user has not reviewed the movie.
+    """
+    return reviewed.get((movie_name or "").lower())
@@ -0,0 +1,270 @@
+"""
+In-memory store of scraped Letterboxd user reviews and stats shared by /roast and
+/taste, so a user trying both features is only scraped once. With a shared cache
+backend, scrapes are also reused by the other workers and nodes.
+"""
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from src.helpers.cache_backends import CacheError
+from src.helpers.deadlines import deadline_expired
+from src.helpers.keyed_locks import KeyedLocks
+from src.helpers.scrapers_roast import (
+    scrape_user_profile,
+    scrape_user_reviews,
+    scrape_user_stats,
+)
+
+
+class UserReviewStore:
+    """
+    A bounded least-recently-used store of user reviews and stats, keyed by username.
+
+    Entries older than the TTL are scraped again. Concurrent requests for the same
+    user wait for a single scrape instead of each starting their own.
+    """
+
+    def __init__(self, max_users=256, ttl=900.0, clock=time.monotonic, backend=None,
+                 warehouse=None):
+        """
+        Initialize the store.
+
+        Args:
+            max_users (int, optional): Users kept before the least recently used is
+                evicted. Defaults to 256.
+            ttl (float, optional): Seconds a scrape stays fresh. Defaults to 900.
+            clock (callable, optional): Returns the current time in seconds.
+                Defaults to time.monotonic.
+            backend (CacheBackend, optional): Cache shared with other workers,
+                looked up on a local miss and written on every scrape. Defaults to None.
+            warehouse (ReviewWarehouse, optional): Persistent store that misses are
+                read from, crawling only new reviews, instead of scraping the whole
+                profile. Defaults to None.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.max_users = max_users
+        self.ttl = ttl
+        self.clock = clock
+        self.backend = backend
+        self.warehouse = warehouse
+        self.entries = OrderedDict()
+        self.user_locks = KeyedLocks()
+        self.lock = threading.Lock()
+        self.counts = {"reviews": defaultdict(int), "stats": defaultdict(int)}
+        self.evictions = 0
+
+    def is_fresh(self, entry, n_pages=None):
+        """Checks a cached entry exists, is within the TTL and covers n_pages pages."""
+        return (entry is not None and self.clock() - entry["fetched_at"] < self.ttl
+                and (n_pages is None or entry["n_pages"] >= n_pages))
+
+    def cached(self, username, kind, n_pages=None):
+        """
+        Returns a fresh cached value, counting the hit or miss.
+
+        Args:
+            username (str): The Letterboxd username.
+            kind (str): 'reviews' or 'stats'.
+            n_pages (int, optional): For reviews, the number of pages needed.
+
+        Returns:
+            The cached value, or None on a miss.
+        """
+        with self.lock:
+            entry = self.entries.get(username, {}).get(kind)
+            if self.is_fresh(entry, n_pages):
+                self.entries.move_to_end(username)
+                self.counts[kind]["hits"] += 1
+                return entry["value"]
+        value = self.shared(username, kind, n_pages)
+        with self.lock:
+            self.counts[kind]["shared_hits" if value is not None else "misses"] += 1
+        return value
+
+    def shared(self, username, kind, n_pages=None):
+        """
+        Looks a value up in the shared backend, keeping a fresh one locally.
+
+        Returns:
+            The shared value, or None if there is no backend, the value is missing,
+                too old or covers fewer pages, or the backend cannot be reached.
+        """
+        if self.backend is None:
+            return None
+        try:
+            entry = self.backend.get(f"user:{kind}:{username}")
+        except CacheError as error:
+            print(f"Shared cache unavailable: {error}")
+            return None
+        if entry is None:
+            return None
+        age = time.time() - entry["saved_at"]
+        if age >= self.ttl or (n_pages is not None and entry["n_pages"] < n_pages):
+            return None
+        self.save(username, kind, entry["value"], entry["n_pages"], age=age)
+        return entry["value"]
+
+    def save(self, username, kind, value, n_pages=None, age=None):
+        """
+        Stores a value, evicting the least recently used users. A fresh scrape
+        (age None) is also written to the shared backend.
+        """
+        if age is None and self.backend is not None:
+            try:
+                self.backend.put(f"user:{kind}:{username}", {
+                    "value": value, "n_pages": n_pages, "saved_at": time.time(),
+                }, ttl=self.ttl)
+            except CacheError as error:
+                print(f"Shared cache unavailable: {error}")
+        with self.lock:
+            self.entries.setdefault(username, {})[kind] = {
+                "value": value, "fetched_at": self.clock() - (age or 0), "n_pages": n_pages,
+            }
+            self.entries.move_to_end(username)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_scrape(self, username, kind, scrape, n_pages=None):
+        """
+        Returns a cached value, scraping it once under the user's lock on a miss.
+
+        Args:
+            username (str): The Letterboxd username.
+            kind (str): 'reviews' or 'stats'.
+            scrape (callable): Scrapes the value when it is not cached.
+            n_pages (int, optional): For reviews, the number of pages needed.
+
+        Returns:
+            The cached or freshly scraped value.
+        """
+        value = self.cached(username, kind, n_pages)
+        if value is not None:
+            return value
+        with self.user_locks.hold(username):
+            with self.lock:
+                entry = self.entries.get(username, {}).get(kind)
+                if self.is_fresh(entry, n_pages):
+                    return entry["value"]
+            value = scrape()
+            if not deadline_expired():
+                # A scrape cut short by the request deadline is not kept
+                self.save(username, kind, value, n_pages)
+            return value
+
+    def reviews(self, username, n_pages=10):
+        """
+        Returns a user's reviews, scraping them if they are not cached.
+
+        A cached scrape of more pages is reused as is, so the list may be longer
+        than n_pages pages.
+
+        Args:
+            username (str): The Letterboxd username.
+            n_pages (int, optional): Maximum number of review pages. Defaults to 10.
+
+        Returns:
+            list: The review dictionaries, newest first.
+        """
+        if self.warehouse is not None:
+            return self.get_or_scrape(
+                username, "reviews", lambda: self.warehouse.user_reviews(username, n_pages),
+                n_pages)
+        return self.get_or_scrape(
+            username, "reviews", lambda: scrape_user_reviews(username, n_pages=n_pages), n_pages
+        )
+
+    def stats(self, username):
+        """
+        Returns a user's stats, scraping them if they are not cached.
+
+        Args:
+            username (str): The Letterboxd username.
+
+        Returns:
+            dict: The user statistics.
+        """
+        if self.warehouse is not None:
+            return self.get_or_scrape(
+                username, "stats", lambda: self.warehouse.user_stats(username))
+        return self.get_or_scrape(username, "stats", lambda: scrape_user_stats(username))
+
+    def profile(self, username, n_pages=10):
+        """
+        Returns a user's reviews and stats. When neither is cached they are scraped
+        together, validating the profile once and fetching every page concurrently.
+
+        Args:
+            username (str): The Letterboxd username.
+            n_pages (int, optional): Maximum number of review pages. Defaults to 10.
+
+        Returns:
+            tuple: The review dictionaries (list, newest first) and the user
+                statistics (dict).
+        """
+        with self.lock:
+            entry = self.entries.get(username, {})
+            cached = (self.is_fresh(entry.get("reviews"), n_pages)
+                      or self.is_fresh(entry.get("stats")))
+        if cached:
+            # At most one of the two is scraped, on its own
+            return self.reviews(username, n_pages=n_pages), self.stats(username)
+        with self.user_locks.hold(username):
+            reviews = self.cached(username, "reviews", n_pages)
+            stats = self.cached(username, "stats")
+            if reviews is not None and stats is not None:
+                return reviews, stats
+            if self.warehouse is not None:
+                reviews, stats = self.warehouse.user_profile(username, n_pages=n_pages)
+            else:
+                reviews, stats = scrape_user_profile(username, n_pages=n_pages)
+            if not deadline_expired():
+                self.save(username, "reviews", reviews, n_pages)
+                self.save(username, "stats", stats)
+            return reviews, stats
+
+    def freshness(self, username):
+        """
+        Reports how old the cached reviews and stats of a user are.
+
+        Args:
+            username (str): The Letterboxd username.
+
+        Returns:
+            dict: Age in seconds of each cached kind, None when not cached.
+        """
+        with self.lock:
+            entry = self.entries.get(username, {})
+            now = self.clock()
+            return {
+                kind: round(now - entry[kind]["fetched_at"], 3) if kind in entry else None
+                for kind in ("reviews", "stats")
+            }
+
+    def metrics(self):
+        """
+        Reports the size of the store and its hit rates.
+
+        Returns:
+            dict: Users cached, the bounds, evictions and hits, misses and hit rate
+                per kind.
+        """
+        with self.lock:
+            metrics = {
+                "users": len(self.entries),
+                "max_users": self.max_users,
+                "ttl": self.ttl,
+                "evictions": self.evictions,
+            }
+            for kind, counts in self.counts.items():
+                hits = counts["hits"] + counts["shared_hits"]
+                lookups = hits + counts["misses"]
+                metrics[kind] = {
+                    "hits": counts["hits"],
+                    "shared_hits": counts["shared_hits"],
+                    "misses": counts["misses"],
+                    "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                }
+            return metrics
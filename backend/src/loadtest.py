@@ -0,0 +1,292 @@
+"""
+Offline load test of one backend instance. The Flask app is served on a local port
+with Letterboxd replaced by generated pages (FakeLetterboxd) and Gemini by
+FakeLLMProvider. Requests for /movie_details, /taste and /roast arrive at a fixed
+average rate (open loop, Poisson arrivals), and the report gives throughput,
+latency percentiles and error rate per endpoint, compared against a saved baseline.
+
+Usage:
+    python -m src.loadtest --rate 5 --duration 30 --mix movie_details=2,taste=1,roast=1
+    python -m src.loadtest --save-baseline baseline.json
+    python -m src.loadtest --baseline baseline.json   # exits 1 on an SLO regression
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ENDPOINTS = ("movie_details", "taste", "roast")
+
+
+def parse_mix(mix):
+    """
+    Parses a request mix such as 'movie_details=2,taste=1,roast=1'.
+
+    Args:
+        mix (str): Comma separated endpoint=weight pairs.
+
+    Returns:
+        dict: The weight of each endpoint.
+
+    Raises:
+        ValueError: If an endpoint is unknown or a weight is not a positive number.
+    """
+    weights = {}
+    for part in mix.split(","):
+        endpoint, _, weight = part.partition("=")
+        endpoint = endpoint.strip()
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+        weights[endpoint] = float(weight or 1)
+        if weights[endpoint] <= 0:
+            raise ValueError(f"Weight of {endpoint} must be positive")
+    return weights
+
+
+def schedule(rate, duration, weights, rng):
+    """
+    Draws the arrival times and endpoints of an open-loop run.
+
+    Args:
+        rate (float): Average requests per second.
+        duration (float): Seconds during which requests arrive.
+        weights (dict): Weight of each endpoint in the mix.
+        rng (random.Random): Source of randomness.
+
+    Returns:
+        list: (seconds after the start, endpoint) pairs in arrival order.
+    """
+    arrivals = []
+    at = rng.expovariate(rate)
+    endpoints, endpoint_weights = list(weights), list(weights.values())
+    while at < duration:
+        arrivals.append((at, rng.choices(endpoints, endpoint_weights)[0]))
+        at += rng.expovariate(rate)
+    return arrivals
+
+
+def request_body(endpoint, rng, films, users):
+    """Builds a request body for an endpoint, drawing from films and users."""
+    film_url = f"https://letterboxd.com/film/film-{rng.randrange(films)}/"
+    username = f"user{rng.randrange(users)}"
+    if endpoint == "movie_details":
+        return {"film_url": film_url}
+    if endpoint == "roast":
+        return {"username": username}
+    return {"film_url": film_url, "username": username}
+
+
+def post(url, body, timeout):
+    """
+    Sends a JSON POST request.
+
+    Returns:
+        int: The status code, 0 if the request failed without a response.
+    """
+    request = urllib.request.Request(
+        url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as error:
+        return error.code
+    except OSError:
+        return 0
+
+
+def summarize(results, duration):
+    """
+    Computes throughput, latency percentiles and error rate per endpoint and overall.
+
+    Args:
+        results (list): (endpoint, latency in seconds, status code) per request.
+        duration (float): Wall time of the run in seconds.
+
+    Returns:
+        dict: For each endpoint and 'all': requests, throughput (responses per
+            second), p50, p95 and p99 latency in seconds and error_rate.
+    """
+    groups = {"all": results}
+    for endpoint in ENDPOINTS:
+        group = [result for result in results if result[0] == endpoint]
+        if group:
+            groups[endpoint] = group
+    report = {}
+    for name, group in groups.items():
+        latencies = np.array([latency for _, latency, _ in group]) if group else np.zeros(1)
+        errors = sum(1 for _, _, status in group if not 200 <= status < 400)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        report[name] = {
+            "requests": len(group),
+            "throughput": round(len(group) / duration, 3) if duration else 0.0,
+            "p50": round(float(p50), 4),
+            "p95": round(float(p95), 4),
+            "p99": round(float(p99), 4),
+            "error_rate": round(errors / len(group), 4) if group else 0.0,
+        }
+    return report
+
+
+def compare(report, baseline, tolerance=0.1):
+    """
+    Compares a report to a baseline.
+
+    Latency percentiles regress when more than tolerance (relative) slower,
+    throughput when more than tolerance lower, and the error rate when more than
+    tolerance (absolute) higher.
+
+    Args:
+        report (dict): The current report from summarize.
+        baseline (dict): A saved report.
+        tolerance (float, optional): Allowed change. Defaults to 0.1.
+
+    Returns:
+        list: A message per regression, empty if the run meets the baseline.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        current = report.get(name)
+        if current is None:
+            continue
+        for metric in ("p50", "p95", "p99"):
+            if current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric} {current[metric]:.3f}s > baseline {base[metric]:.3f}s")
+        if current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name} throughput {current['throughput']:.2f}/s "
+                               f"< baseline {base['throughput']:.2f}/s")
+        if current["error_rate"] > base["error_rate"] + tolerance:
+            regressions.append(f"{name} error rate {current['error_rate']:.1%} "
+                               f"> baseline {base['error_rate']:.1%}")
+    return regressions
+
+
+def format_report(report):
+    """Formats a report as a table."""
+    lines = [f"{'endpoint':<14}{'requests':>9}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}"
+             f"{'errors':>8}"]
+    for name, row in report.items():
+        lines.append(
+            f"{name:<14}{row['requests']:>9}{row['throughput']:>8.2f}{row['p50']:>8.3f}s"
+            f"{row['p95']:>8.3f}s{row['p99']:>8.3f}s{row['error_rate']:>8.1%}")
+    return "\n".join(lines)
+
+
+def run(base_url, arrivals, options):
+    """
+    Sends the scheduled requests, each at its arrival time.
+
+    Latency is measured from the scheduled arrival, so time spent waiting for a
+    free client thread counts, as it would for a real user.
+
+    Args:
+        base_url (str): The app's URL.
+        arrivals (list): (seconds after the start, endpoint) pairs.
+        options (argparse.Namespace): films, users, seed, timeout and concurrency.
+
+    Returns:
+        tuple: (endpoint, latency, status) per request, and the wall time.
+    """
+    rng = random.Random(options.seed)
+    bodies = [request_body(endpoint, rng, options.films, options.users)
+              for _, endpoint in arrivals]
+    results = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def send(at, endpoint, body):
+        status = post(f"{base_url}/{endpoint}", body, options.timeout)
+        with lock:
+            results.append((endpoint, time.perf_counter() - start - at, status))
+
+    with ThreadPoolExecutor(max_workers=options.concurrency) as executor:
+        for (at, endpoint), body in zip(arrivals, bodies):
+            time.sleep(max(0.0, at - (time.perf_counter() - start)))
+            executor.submit(send, at, endpoint, body)
+    return results, time.perf_counter() - start
+
+
+def parse_args(argv):
+    """Parses the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n", maxsplit=1)[0])
+    parser.add_argument("--rate", type=float, default=2.0, help="requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--mix", default="movie_details=2,taste=1,roast=1")
+    parser.add_argument("--concurrency", type=int, default=256,
+                        help="most requests in flight at once")
+    parser.add_argument("--films", type=int, default=50, help="distinct films requested")
+    parser.add_argument("--users", type=int, default=100, help="distinct users requested")
+    parser.add_argument("--scrape-latency", type=float, default=0.05,
+                        help="seconds per Letterboxd page")
+    parser.add_argument("--film-pages", type=int, default=30,
+                        help="review pages per film with reviews")
+    parser.add_argument("--llm-latency", type=float, default=1.0,
+                        help="seconds per Gemini call")
+    parser.add_argument("--timeout", type=float, default=120.0, help="client timeout")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--save-baseline", help="where to save this run's report")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Runs the load test and prints the report.
+
+    Returns:
+        int: 1 if the run regressed against the baseline, else 0.
+    """
+    options = parse_args(argv)
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(options.llm_latency)
+    # Imported here so the app is configured with the fake provider
+    # pylint: disable=import-outside-toplevel
+    from werkzeug.serving import make_server
+    from src.app import app
+    from src.helpers.fake_letterboxd import FakeLetterboxd
+
+    letterboxd = FakeLetterboxd(latency=options.scrape_latency, film_pages=options.film_pages)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    arrivals = schedule(options.rate, options.duration, parse_mix(options.mix),
+                        random.Random(options.seed))
+    print(f"Sending {len(arrivals)} requests over {options.duration:.0f}s "
+          f"to http://127.0.0.1:{server.port}")
+    try:
+        with letterboxd.installed():
+            results, elapsed = run(f"http://127.0.0.1:{server.port}", arrivals, options)
+    finally:
+        server.shutdown()
+
+    report = summarize(results, elapsed)
+    print(format_report(report))
+    if options.save_baseline:
+        with open(options.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved baseline to {options.save_baseline}")
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), options.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print("Meets the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Startup benchmark: how long `import src.app` takes in a fresh interpreter, measured
+with `python -X importtime`, and which heavy libraries it loads. The Gemini client
+(gRPC, protobuf), BeautifulSoup and numpy are imported on first use, so none of them
+should appear at startup.
+
+Usage:
+    python -m src.startup_benchmark --runs 5
+    python -m src.startup_benchmark --save-baseline startup.json
+    python -m src.startup_benchmark --baseline startup.json   # exits 1 on a regression
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+LAZY_MODULES = ("google.generativeai", "google.ai.generativelanguage", "grpc", "bs4", "numpy")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(output):
+    """
+    Parses the stderr of `python -X importtime`.
+
+    Args:
+        output (str): Lines like 'import time: self [us] | cumulative | imported package',
+            where each module is listed after the modules it imports, indented one
+            level deeper.
+
+    Returns:
+        dict: Cumulative import time in seconds of every module ('modules') and, for
+            each top-level import, the modules it imports directly ('children').
+    """
+    modules = {}
+    children = {}
+    pending = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue
+        seconds = int(cumulative) / 1e6
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules[name.strip()] = seconds
+        if depth == 1:
+            pending[name.strip()] = seconds
+        elif depth == 0:
+            children[name.strip()] = pending
+            pending = {}
+    return {"modules": modules, "children": children}
+
+
+def measure(module="src.app"):
+    """
+    Imports a module in a fresh interpreter.
+
+    Args:
+        module (str, optional): The module to import. Defaults to 'src.app'.
+
+    Returns:
+        tuple: The import time of the module in seconds, its slowest imports
+            (dict of seconds) and the LAZY_MODULES that were loaded (list).
+    """
+    check = (f"import {module}, sys; "
+             f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", check],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+    parsed = parse_importtime(result.stderr)
+    imports = parsed["children"].get(module, {})
+    slowest = dict(sorted(imports.items(), key=lambda item: -item[1])[:10])
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return parsed["modules"][module], slowest, loaded
+
+
+def compare(report, baseline, tolerance=0.2):
+    """
+    Compares a startup report to a baseline.
+
+    Args:
+        report (dict): The current report.
+        baseline (dict): A saved report.
+        tolerance (float, optional): Allowed relative slowdown. Defaults to 0.2.
+
+    Returns:
+        list: A message per regression, empty if startup meets the baseline.
+    """
+    regressions = [f"{name} is imported at startup" for name in report["eager_imports"]]
+    if report["import_seconds"] > baseline["import_seconds"] * (1 + tolerance):
+        regressions.append(f"import time {report['import_seconds']:.3f}s "
+                           f"> baseline {baseline['import_seconds']:.3f}s")
+    return regressions
+
+
+def main(argv=None):
+    """
+    Measures startup and prints the report.
+
+    Returns:
+        int: 1 if a heavy library is imported eagerly or startup regressed, else 0.
+    """
+    parser = argparse.ArgumentParser(description="Measure the import time of src.app")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--baseline", help="report to compare against")
+    parser.add_argument("--save-baseline", help="where to save this run's report")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    options = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(options.runs)]
+    report = {
+        "import_seconds": round(statistics.median(seconds for seconds, _, _ in runs), 4),
+        "slowest_imports": {name: round(seconds, 4) for name, seconds in runs[-1][1].items()},
+        "eager_imports": runs[-1][2],
+    }
+    print(f"import src.app: {report['import_seconds'] * 1000:.0f} ms "
+          f"(median of {options.runs})")
+    for name, seconds in report["slowest_imports"].items():
+        print(f"  {name:<40}{seconds * 1000:>8.1f} ms")
+
+    if options.save_baseline:
+        with open(options.save_baseline, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Saved baseline to {options.save_baseline}")
+    baseline = {"import_seconds": float("inf")}
+    if options.baseline:
+        with open(options.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    regressions = compare(report, baseline, options.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
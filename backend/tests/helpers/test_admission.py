@@ -0,0 +1,68 @@
+"""Test suite for the admission.py per-endpoint concurrency limits"""
+
+import threading
+import unittest
+
+from src.helpers.admission import AdmissionLimit, Overloaded, render_admission
+
+
+class TestAdmissionLimit(unittest.TestCase):
+    """Unit tests for the AdmissionLimit class."""
+
+    def test_sheds_when_queue_is_full(self):
+        """Test requests past the limit and the queue are rejected with a retry hint."""
+        limit = AdmissionLimit("roast", max_concurrent=1, max_waiting=0)
+        with limit.slot():
+            with self.assertRaises(Overloaded) as context:
+                limit.acquire()
+        self.assertGreaterEqual(context.exception.retry_after, 1)
+        self.assertEqual(limit.stats()["rejected"], 1)
+        self.assertEqual(limit.stats()["in_flight"], 0)
+
+    def test_waiting_request_gets_freed_slot(self):
+        """Test a queued request is admitted as soon as a slot is released."""
+        limit = AdmissionLimit("taste", max_concurrent=1, max_waiting=1, max_wait=2)
+        started = limit.acquire()
+        admitted = threading.Event()
+
+        def wait_for_slot():
+            with limit.slot():
+                admitted.set()
+
+        thread = threading.Thread(target=wait_for_slot)
+        thread.start()
+        while limit.stats()["waiting"] == 0:
+            thread.join(0.01)
+        self.assertFalse(admitted.is_set())
+        limit.release(started)
+        thread.join(2)
+        self.assertTrue(admitted.is_set())
+        self.assertEqual(limit.stats()["admitted"], 2)
+
+    def test_wait_times_out(self):
+        """Test a queued request is shed when no slot frees up in time."""
+        limit = AdmissionLimit("movie_details", max_concurrent=1, max_waiting=1, max_wait=0.01)
+        with limit.slot():
+            with self.assertRaises(Overloaded):
+                limit.acquire()
+        self.assertEqual(limit.stats()["waiting"], 0)
+
+    def test_unlimited(self):
+        """Test a limit of 0 admits everything."""
+        limit = AdmissionLimit("roast", max_concurrent=0)
+        slots = [limit.acquire() for _ in range(50)]
+        self.assertEqual(limit.stats()["in_flight"], 50)
+        for started in slots:
+            limit.release(started)
+
+    def test_render(self):
+        """Test the load of each limit is formatted as Prometheus metrics."""
+        limit = AdmissionLimit("roast", max_concurrent=2)
+        with limit.slot():
+            page = render_admission({"roast": limit})
+        self.assertIn('letterboxd_admission_in_flight{endpoint="roast"} 1', page)
+        self.assertIn('letterboxd_admission_rejected_total{endpoint="roast"} 0', page)
+
+
+if __name__ == "__main__":
+    unittest.main()
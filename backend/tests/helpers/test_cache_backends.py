@@ -0,0 +1,130 @@
+"""Test suite for the cache_backends.py shared cache backends"""
+
+import os
+import socket
+import tempfile
+import time
+import unittest
+
+from src.helpers.cache_backends import (
+    CacheError,
+    MemoryCache,
+    RedisCache,
+    SQLiteCache,
+    open_cache,
+)
+from src.helpers.fake_redis import FakeRedis
+
+
+class TestCacheBackends(unittest.TestCase):
+    """Unit tests run against every backend."""
+
+    def setUp(self):
+        """Start a Redis stand-in and a temporary SQLite file."""
+        self.redis = FakeRedis().start()
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.directory.name, "cache.db")
+
+    def tearDown(self):
+        """Stop the stand-in and remove the SQLite file."""
+        self.redis.shutdown()
+        self.redis.server_close()
+        self.directory.cleanup()
+
+    def backends(self):
+        """Returns pairs of clients sharing one backend, as two workers would."""
+        memory = MemoryCache()
+        return {
+            "memory": (memory, memory),
+            "sqlite": (SQLiteCache(self.path), SQLiteCache(self.path)),
+            "redis": (RedisCache(port=self.redis.port), RedisCache(port=self.redis.port)),
+        }
+
+    def test_round_trip_shared(self):
+        """Test a value written by one client is read, replaced and deleted by another."""
+        for name, (writer, reader) in self.backends().items():
+            with self.subTest(backend=name):
+                self.assertIsNone(reader.get("film"))
+                writer.put("film", {"reviews": ["Great"], "rating": 4.5})
+                self.assertEqual(reader.get("film"), {"reviews": ["Great"], "rating": 4.5})
+                reader.put("film", ["Summary", [["Acting", 70, 5]]])
+                self.assertEqual(writer.get("film"), ["Summary", [["Acting", 70, 5]]])
+                writer.delete("film")
+                self.assertIsNone(reader.get("film"))
+
+    def test_ttl(self):
+        """Test values are gone once their TTL has passed."""
+        now = [0.0]
+        memory = MemoryCache(clock=lambda: now[0])
+        sqlite = SQLiteCache(self.path, clock=lambda: now[0])
+        for cache in (memory, sqlite):
+            cache.put("short", 1, ttl=10)
+            cache.put("forever", 2)
+        now[0] = 11
+        for cache in (memory, sqlite):
+            self.assertIsNone(cache.get("short"))
+            self.assertEqual(cache.get("forever"), 2)
+
+        redis = RedisCache(port=self.redis.port)
+        redis.put("short", 1, ttl=0.01)
+        time.sleep(0.05)
+        self.assertIsNone(redis.get("short"))
+
+    def test_memory_bounded(self):
+        """Test the least recently used value is evicted past max_entries."""
+        cache = MemoryCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), (1, None, 3))
+
+    def test_sqlite_prune(self):
+        """Test expired rows are deleted by prune."""
+        now = [0.0]
+        cache = SQLiteCache(self.path, clock=lambda: now[0])
+        cache.put("short", 1, ttl=1)
+        cache.put("forever", 2)
+        now[0] = 2
+        self.assertEqual(cache.prune(), 1)
+
+    def test_redis_prefix_db_and_reconnect(self):
+        """Test keys are prefixed, databases kept apart and dropped connections retried."""
+        cache = RedisCache(port=self.redis.port, db=1)
+        cache.put("film", "x")
+        self.assertEqual(self.redis.databases[1][b"letterboxd:film"][0], b'"x"')
+        self.assertIsNone(RedisCache(port=self.redis.port).get("film"))
+        cache.local.connection[0].shutdown(socket.SHUT_RDWR)
+        self.assertEqual(cache.get("film"), "x")
+
+    def test_sqlite_errors_wrapped(self):
+        """Test a broken cache database raises CacheError, not a sqlite3 error."""
+        cache = SQLiteCache(os.path.join(self.directory.name, "broken.db"))
+        cache.connection().execute("DROP TABLE cache")
+        for call in (lambda: cache.get("film"), lambda: cache.put("film", "x"),
+                     lambda: cache.delete("film"), cache.prune):
+            with self.assertRaises(CacheError):
+                call()
+
+    def test_redis_unreachable(self):
+        """Test an unreachable server raises CacheError."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        with self.assertRaises(CacheError):
+            RedisCache(port=port, timeout=0.1).get("film")
+
+    def test_open_cache(self):
+        """Test backends are chosen by URL scheme."""
+        self.assertIsInstance(open_cache("memory://"), MemoryCache)
+        sqlite = open_cache(f"sqlite:///{self.path}")
+        self.assertIsInstance(sqlite, SQLiteCache)
+        self.assertEqual(sqlite.path, self.path)
+        redis = open_cache("redis://cache.local:6380/2")
+        self.assertEqual((redis.address, redis.db), (("cache.local", 6380), 2))
+        with self.assertRaises(ValueError):
+            open_cache("memcached://localhost")
+
+
+if __name__ == "__main__":
+    unittest.main()
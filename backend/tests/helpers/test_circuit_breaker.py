@@ -0,0 +1,154 @@
+"""Test suite for the circuit_breaker.py helper classes"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.helpers.circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitOpenError,
+    guarded_call,
+)
+from src.helpers.letterboxd_analyzers import LetterboxdReviewAnalyzer
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self):
+        """Start the clock at zero."""
+        self.now = 0.0
+
+    def __call__(self):
+        """Return the current fake time."""
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Unit tests for the CircuitBreaker class."""
+
+    def setUp(self):
+        """Create a breaker that opens after two failures for ten seconds."""
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test the circuit opens once the failure threshold is reached."""
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_failures(self):
+        """Test a success in between failures keeps the circuit closed."""
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_allows_single_probe(self):
+        """Test only one probe goes through once the reset timeout has passed."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 11
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens(self):
+        """Test a failed probe opens the circuit for another reset timeout."""
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 11
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.clock.now = 15
+        self.assertFalse(self.breaker.allow())
+
+
+class TestCircuitBreakerRegistry(unittest.TestCase):
+    """Unit tests for the CircuitBreakerRegistry class and guarded_call."""
+
+    def setUp(self):
+        """Create a registry that opens circuits after two failures."""
+        self.registry = CircuitBreakerRegistry(failure_threshold=2, reset_timeout=30)
+
+    def test_open_key_skipped_without_calling(self):
+        """Test calls on an API key with an open circuit are skipped instantly."""
+        failing = MagicMock(side_effect=RuntimeError("timeout"))
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                self.registry.call("gemini-2.0-flash", "key1", failing)
+
+        func = MagicMock(return_value="ok")
+        with self.assertRaises(CircuitOpenError):
+            self.registry.call("gemini-2.0-flash", "key1", func)
+        func.assert_not_called()
+
+    def test_stream_judged_once_read(self):
+        """Test a stream failing part way trips its circuit and only a full read succeeds."""
+        def failing_stream():
+            yield "Once"
+            raise RuntimeError("stream reset")
+
+        for failures in range(2):
+            chunks = self.registry.call("gemini-2.0-flash", "key1", failing_stream, stream=True)
+            self.assertEqual(self.registry.states()["model:gemini-2.0-flash"]["failures"],
+                             failures)
+            with self.assertRaises(RuntimeError):
+                list(chunks)
+        self.assertEqual(self.registry.states()["model:gemini-2.0-flash"]["state"], "open")
+
+        chunks = self.registry.call("gemini-1.5-pro", "key2", lambda: iter(["a", "b"]),
+                                    stream=True)
+        self.assertEqual(list(chunks), ["a", "b"])
+        self.assertEqual(self.registry.states()["model:gemini-1.5-pro"]["failures"], 0)
+
+    def test_abandoned_stream_frees_probe(self):
+        """Test a half-open probe is given back when its stream is not read to the end."""
+        clock = FakeClock()
+        registry = CircuitBreakerRegistry(failure_threshold=1, reset_timeout=10, clock=clock)
+        with self.assertRaises(RuntimeError):
+            registry.call("model", "key", MagicMock(side_effect=RuntimeError("503")))
+        clock.now = 10
+        chunks = registry.call("model", "key", lambda: iter(["a", "b"]), stream=True)
+        next(chunks)
+        chunks.close()
+        self.assertEqual(list(registry.call("model", "key", lambda: iter(["c"]), stream=True)),
+                         ["c"])
+        self.assertEqual(registry.states()["model:model"]["state"], "closed")
+
+    def test_key_name_hides_key(self):
+        """Test circuit names do not contain the API key."""
+        self.assertNotIn("secret-key", CircuitBreakerRegistry.key_name("secret-key"))
+
+    def test_guarded_call_without_breakers(self):
+        """Test guarded_call calls straight through when there are no breakers."""
+        self.assertEqual(guarded_call(None, "model", "key", lambda: 42), 42)
+
+
+class TestAnalyzerWithBreakers(unittest.TestCase):
+    """Unit tests for LetterboxdReviewAnalyzer with circuit breakers."""
+
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
+    def test_get_summary_fails_fast_when_model_open(self, mock_model):
+        """Test the summary degrades to None without calling Gemini during an outage."""
+        registry = CircuitBreakerRegistry(failure_threshold=3)
+        analyzer = LetterboxdReviewAnalyzer(breakers=registry)
+        mock_model.return_value.generate_content.side_effect = RuntimeError("503")
+
+        self.assertIsNone(analyzer.get_summary("word " * 401, ["1", "2", "3"]))
+        self.assertEqual(mock_model.return_value.generate_content.call_count, 3)
+
+        self.assertIsNone(analyzer.get_summary("word " * 401, ["4", "5", "6"]))
+        self.assertEqual(mock_model.return_value.generate_content.call_count, 3)
+        self.assertEqual(registry.states()["model:gemini-2.0-flash"]["state"], "open")
+
+
+if __name__ == "__main__":
+    unittest.main()
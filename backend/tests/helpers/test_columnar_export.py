@@ -0,0 +1,114 @@
+"""Test suite for the columnar_export.py Parquet exporter"""
+
+import os
+import tempfile
+import unittest
+
+import pyarrow as pa
+
+from src.helpers.columnar_export import (
+    ColumnarExporter,
+    crawl_date,
+    film_slug,
+    read_dataset,
+)
+from src.helpers.review_warehouse import ReviewWarehouse
+
+DAY = 86400
+
+
+class TestColumnarExporter(unittest.TestCase):
+    """Unit tests for the ColumnarExporter class."""
+
+    def setUp(self):
+        """Create a warehouse with two films and a user, crawled on day 1."""
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.now = DAY + 60.0
+        self.warehouse = ReviewWarehouse(
+            os.path.join(self.directory.name, "warehouse.db"), clock=lambda: self.now)
+        for slug in ("heat", "alien"):
+            self.crawl(slug, [f"{slug} review {i}" for i in range(3)])
+        self.warehouse.store_document(
+            "film_details", "https://letterboxd.com/film/heat/", {"movie_name": "Heat"})
+        self.warehouse.store_reviews("user", "bob", [{
+            "movie_url": "https://letterboxd.com/film/heat/", "movie_name": "Heat",
+            "rating": "★★★★", "review_text": "Tense",
+        }], pages=1, prepend=False)
+        self.output = os.path.join(self.directory.name, "export")
+        self.exporter = ColumnarExporter(self.warehouse.path, self.output, batch_size=2)
+
+    def tearDown(self):
+        """Remove the warehouse and the export."""
+        self.directory.cleanup()
+
+    def crawl(self, slug, texts, prepend=False):
+        """Stores a crawl of a film's reviews."""
+        self.warehouse.store_reviews(
+            "film", f"https://letterboxd.com/film/{slug}/",
+            [{"rating": "★★★", "review_text": text} for text in texts], pages=1,
+            prepend=prepend)
+
+    def test_partitioned_and_dictionary_encoded(self):
+        """Test datasets are partitioned by film and date with dictionary columns."""
+        report = self.exporter.export()
+        self.assertEqual(report["film_reviews"]["rows"], 6)
+        self.assertEqual(report["film_reviews"]["files"], 2)
+        self.assertTrue(os.path.isdir(
+            os.path.join(self.output, "film_reviews", "film=heat", "date=1970-01-02")))
+
+        table = read_dataset(os.path.join(self.output, "film_reviews")).to_table()
+        self.assertEqual(table.schema.field("rating").type, pa.dictionary(pa.int32(), pa.string()))
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("film").type))
+        self.assertEqual(sorted(table.column("film").to_pylist()), ["alien"] * 3 + ["heat"] * 3)
+        users = read_dataset(os.path.join(self.output, "user_reviews")).to_table()
+        self.assertEqual(users.column("username").to_pylist(), ["bob"])
+        self.assertEqual(users.column("film").to_pylist(), ["heat"])
+        details = read_dataset(os.path.join(self.output, "movie_details")).to_table()
+        self.assertEqual(details.column("movie_name").to_pylist(), ["Heat"])
+
+    def test_incremental_appends_new_rows(self):
+        """Test an incremental export only appends rows crawled since the last one."""
+        self.exporter.export()
+        self.assertEqual(self.exporter.export()["film_reviews"]["rows"], 0)
+
+        self.now += DAY
+        self.crawl("heat", ["heat review new"], prepend=True)
+        report = self.exporter.export()
+        self.assertEqual(report["film_reviews"]["rows"], 1)
+        self.assertEqual(report["user_reviews"]["rows"], 0)
+        self.assertTrue(os.path.isdir(
+            os.path.join(self.output, "film_reviews", "film=heat", "date=1970-01-03")))
+        self.assertEqual(read_dataset(os.path.join(self.output, "film_reviews")).count_rows(), 7)
+
+        report = ColumnarExporter(self.warehouse.path, self.output).export(incremental=False)
+        self.assertEqual(report["film_reviews"]["rows"], 7)
+        self.assertEqual(read_dataset(os.path.join(self.output, "film_reviews")).count_rows(), 7)
+
+    def test_late_commit_exported(self):
+        """Test a crawl committed after an export is picked up despite an older crawled_at."""
+        self.exporter.export()
+        self.now -= 30
+        self.crawl("alien", ["alien review late"], prepend=True)
+        report = self.exporter.export()
+        self.assertEqual(report["film_reviews"]["rows"], 1)
+        self.assertEqual(read_dataset(os.path.join(self.output, "film_reviews")).count_rows(), 7)
+
+    def test_outdated_state_rewritten(self):
+        """Test an export state of crawl times is dropped for a full rewrite."""
+        self.exporter.export()
+        self.exporter.write_state({"film_reviews": DAY, "user_reviews": DAY})
+        report = self.exporter.export()
+        self.assertEqual(report["film_reviews"]["rows"], 6)
+        self.assertEqual(read_dataset(os.path.join(self.output, "film_reviews")).count_rows(), 6)
+        self.assertEqual(self.exporter.export()["movie_details"]["rows"], 0)
+
+    def test_partition_values(self):
+        """Test slugs and dates are read from URLs and crawl times."""
+        self.assertEqual(film_slug("https://letterboxd.com/film/mickey-17/"), "mickey-17")
+        self.assertEqual(film_slug(None), "unknown")
+        self.assertEqual(crawl_date(DAY - 1), "1970-01-01")
+        self.assertEqual(crawl_date(DAY), "1970-01-02")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Test suite for the deadlines.py request deadlines"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.helpers.deadlines import (
+    Deadline,
+    DeadlineExceeded,
+    check_deadline,
+    current_deadline,
+    deadline_scope,
+    propagate_deadline,
+    time_left,
+)
+from src.helpers.letterboxd_analyzers import LetterboxdReviewAnalyzer
+from src.helpers.scrapers import scrape_reviews
+
+PAGE = '<li class="film-detail"><div class="js-review-body"><p>Fine.</p></div></li>'
+
+
+class TestDeadlines(unittest.TestCase):
+    """Unit tests for the deadline helpers."""
+
+    def test_deadline_expires(self):
+        """Test remaining time counts down to zero."""
+        now = [0.0]
+        deadline = Deadline(5, clock=lambda: now[0])
+        self.assertEqual(deadline.remaining(), 5)
+        now[0] = 6
+        self.assertEqual(deadline.remaining(), 0)
+        self.assertTrue(deadline.expired())
+
+    def test_scope(self):
+        """Test the deadline only applies inside its scope, and 0 means none."""
+        with deadline_scope(0) as deadline:
+            self.assertIsNone(deadline)
+            self.assertEqual(time_left(10), 10)
+        with deadline_scope(2):
+            self.assertLessEqual(time_left(10), 2)
+        self.assertIsNone(current_deadline())
+
+    def test_check_deadline(self):
+        """Test check_deadline raises once the time is up."""
+        with deadline_scope(0.01):
+            check_deadline("scraping")
+            time.sleep(0.02)
+            with self.assertRaises(DeadlineExceeded):
+                check_deadline("scraping")
+
+    def test_propagate_to_thread(self):
+        """Test a wrapped function sees the deadline in another thread."""
+        seen = []
+        with deadline_scope(5) as deadline:
+            worker = threading.Thread(target=propagate_deadline(
+                lambda: seen.append(current_deadline())
+            ))
+        worker.start()
+        worker.join()
+        self.assertIs(seen[0], deadline)
+
+    @patch("src.helpers.scrapers.fetch_html_content")
+    def test_scrape_reviews_partial(self, mock_fetch):
+        """Test scraping stops at the deadline and keeps the pages fetched so far."""
+        def slow_fetch(_url, _headers):
+            time.sleep(0.03)
+            return PAGE
+
+        mock_fetch.side_effect = slow_fetch
+        with deadline_scope(0.05):
+            reviews = scrape_reviews("https://letterboxd.com/film/some-movie/", n=30)
+        self.assertEqual(len(reviews), 2)
+
+    @patch.object(LetterboxdReviewAnalyzer, "generate_aspects")
+    @patch.object(LetterboxdReviewAnalyzer, "generate_summary")
+    def test_get_results_partial(self, mock_summary, mock_aspects):
+        """Test the summary is kept when the deadline runs out before the aspects."""
+        def slow_summary(*_args, **_kwargs):
+            time.sleep(0.05)
+            return "Summary"
+
+        mock_summary.side_effect = slow_summary
+        with deadline_scope(0.02):
+            summary, aspects = LetterboxdReviewAnalyzer().get_results(
+                "word " * 401, ["1", "2", "3"], ["4", "5", "6"]
+            )
+        self.assertEqual((summary, aspects), ("Summary", None))
+        mock_aspects.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
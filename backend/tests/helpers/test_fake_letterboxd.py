@@ -0,0 +1,48 @@
+"""Test suite for the fake_letterboxd.py Letterboxd stand-in"""
+
+import unittest
+
+import requests
+
+from src.helpers.fake_letterboxd import FakeLetterboxd
+from src.helpers.scrapers import movie_details_scraper, scrape_reviews
+from src.helpers.scrapers_roast import scrape_user_profile
+
+
+class TestFakeLetterboxd(unittest.TestCase):
+    """Unit tests for the FakeLetterboxd class."""
+
+    def setUp(self):
+        """Create a stand-in without latency."""
+        self.letterboxd = FakeLetterboxd(latency=0, film_pages=2, user_pages=2)
+
+    def test_scrapers_read_fake_pages(self):
+        """Test the scrapers parse the generated film and user pages."""
+        with self.letterboxd.installed():
+            details = movie_details_scraper("https://letterboxd.com/film/heat/")
+            reviews = scrape_reviews("https://letterboxd.com/film/heat/", n=3)
+            user_reviews, stats = scrape_user_profile("bob")
+
+        self.assertEqual(details["movie_name"], "Heat")
+        self.assertEqual(details["backdrop_image_url"], "https://img.local/heat.jpg")
+        self.assertEqual(len(reviews), 24)
+        self.assertEqual(len({review["review_text"] for review in reviews}), 24)
+        self.assertEqual(len(user_reviews), 24)
+        self.assertEqual(stats["total_hours_watched"], "812")
+        self.assertIsNot(requests.get, self.letterboxd.get)
+
+    def test_pages_deterministic(self):
+        """Test a URL always gets the same page."""
+        url = "https://letterboxd.com/film/heat/reviews/by/activity/page/1/"
+        self.assertEqual(self.letterboxd.page(url).text, FakeLetterboxd().page(url).text)
+        self.assertEqual(self.letterboxd.page("https://example.com/").status_code, 404)
+
+    def test_timeout(self):
+        """Test pages slower than the timeout raise like requests does."""
+        letterboxd = FakeLetterboxd(latency=0.05)
+        with self.assertRaises(requests.exceptions.Timeout):
+            letterboxd.get("https://letterboxd.com/film/heat/", timeout=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Test suite for the hedging.py helper classes"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from src.helpers.hedging import LatencyTracker, HedgedCaller, HedgeError
+from src.helpers.letterboxd_analyzers import LetterboxdReviewAnalyzer
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Unit tests for the LatencyTracker class."""
+
+    def test_percentile(self):
+        """Test percentile picks the matching recorded latency."""
+        tracker = LatencyTracker()
+        for seconds in range(1, 101):
+            tracker.record(seconds)
+        self.assertEqual(tracker.percentile(50), 51)
+        self.assertEqual(tracker.percentile(100), 100)
+
+    def test_percentile_empty(self):
+        """Test percentile returns None when nothing was recorded."""
+        self.assertIsNone(LatencyTracker().percentile(95))
+
+
+class TestHedgedCaller(unittest.TestCase):
+    """Unit tests for the HedgedCaller class."""
+
+    def setUp(self):
+        """Create a caller that hedges after 50 ms."""
+        self.caller = HedgedCaller(default_delay=0.05)
+
+    def test_fast_call_not_hedged(self):
+        """Test a call that returns quickly only uses the first key."""
+        used = []
+
+        def func(key, _cancelled):
+            used.append(key)
+            return f"result-{key}"
+
+        self.assertEqual(self.caller.call("summary", func, ["1", "2"]), "result-1")
+        self.assertEqual(used, ["1"])
+        self.assertEqual(self.caller.stats()["summary"]["hedged"], 0)
+
+    def test_slow_call_hedged_and_cancelled(self):
+        """Test a slow call is duplicated, the hedge wins and the slow one is cancelled."""
+        slow_cancelled = threading.Event()
+
+        def func(key, cancelled):
+            if key == "slow":
+                cancelled.wait(2)
+                if cancelled.is_set():
+                    slow_cancelled.set()
+                return "slow result"
+            return "fast result"
+
+        self.assertEqual(self.caller.call("summary", func, ["slow", "fast"]), "fast result")
+        self.assertTrue(slow_cancelled.wait(1))
+        stats = self.caller.stats()["summary"]
+        self.assertEqual((stats["calls"], stats["hedged"], stats["hedge_wins"]), (1, 1, 1))
+        self.assertEqual(stats["hedge_rate"], 1.0)
+
+    def test_failure_moves_to_next_key(self):
+        """Test a failed attempt is retried on the next key without hedging."""
+        def func(key, _cancelled):
+            if key == "bad":
+                raise ValueError("quota exceeded")
+            return key
+
+        self.assertEqual(self.caller.call("aspects", func, ["bad", "good"]), "good")
+        self.assertEqual(self.caller.stats()["aspects"]["hedged"], 0)
+
+    def test_all_attempts_fail(self):
+        """Test HedgeError is raised when every key fails."""
+        def func(_key, _cancelled):
+            raise ValueError("quota exceeded")
+
+        with self.assertRaises(HedgeError):
+            self.caller.call("aspects", func, ["1", "2", "3"])
+
+    def test_hedge_delay_uses_percentile(self):
+        """Test the hedge delay follows the tracked percentile once warmed up."""
+        caller = HedgedCaller(percentile=50, default_delay=9.0, min_samples=3)
+        self.assertEqual(caller.hedge_delay("summary"), 9.0)
+        for seconds in (0.1, 0.2, 0.3):
+            caller.trackers["summary"].record(seconds)
+        self.assertEqual(caller.hedge_delay("summary"), 0.2)
+
+
+class TestHedgedAnalyzer(unittest.TestCase):
+    """Unit tests for LetterboxdReviewAnalyzer with hedging enabled."""
+
+    @patch.object(LetterboxdReviewAnalyzer, "stream_summary")
+    def test_get_summary_hedged(self, mock_stream_summary):
+        """Test get_summary keeps the summary of the attempt that answers first."""
+        def fake_stream(_reviews, key, safety="off"):  # pylint: disable=unused-argument
+            if key == "slow":
+                time.sleep(0.5)
+            yield f"Summary from {key}"
+
+        mock_stream_summary.side_effect = fake_stream
+        analyzer = LetterboxdReviewAnalyzer(hedger=HedgedCaller(default_delay=0.05))
+
+        summary = analyzer.get_summary("word " * 401, ["slow", "fast", "spare"])
+
+        self.assertEqual(summary, "Summary from fast")
+
+    @patch.object(LetterboxdReviewAnalyzer, "generate_aspects")
+    def test_get_aspects_hedged_all_fail(self, mock_generate_aspects):
+        """Test get_aspects degrades to None when every hedged attempt fails."""
+        mock_generate_aspects.side_effect = ValueError("API error")
+        analyzer = LetterboxdReviewAnalyzer(hedger=HedgedCaller(default_delay=0.05))
+
+        self.assertIsNone(analyzer.get_aspects("word " * 401, ["1", "2", "3"]))
+        self.assertEqual(mock_generate_aspects.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""Test suite for the incremental_refresh.py film refresh"""
+
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.helpers.incremental_refresh import IncrementalRefresher
+from src.helpers.letterboxd_analyzers import (
+    LetterboxdReviewAnalyzer,
+    counts_from_percentages,
+    percentages_from_counts,
+)
+from src.helpers.scrapers import review_key
+from src.helpers.state_store import JsonStateStore
+
+FILM_URL = "https://letterboxd.com/film/some-movie/"
+
+
+def crawl(reviews, complete=True):
+    """Builds a scraper mock side effect returning reviews and reporting its progress."""
+    def scrape(*_args, progress=None, **_kwargs):
+        progress["complete"] = complete
+        return reviews
+    return scrape
+
+
+class TestIncrementalRefresh(unittest.TestCase):
+    """Unit tests for the IncrementalRefresher class."""
+
+    def setUp(self):
+        """Create a refresher over a temporary state directory."""
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.analyzer = LetterboxdReviewAnalyzer(provider=MagicMock())
+        self.reviews = MagicMock()
+        self.refresher = IncrementalRefresher(self.analyzer, JsonStateStore(self.directory.name),
+                                              reviews=self.reviews)
+        self.old_reviews = [
+            {"rating": "4", "review_text": f"old review {i}, the acting was great"}
+            for i in range(10)
+        ]
+
+    def tearDown(self):
+        """Remove the temporary state directory."""
+        self.directory.cleanup()
+
+    def test_count_conversions(self):
+        """Test percentages and counts convert both ways."""
+        counts = counts_from_percentages([["Acting", 80, 10], ["Plot", 20, 30]], 10)
+        self.assertEqual(counts, {"Acting": [8, 1], "Plot": [2, 3]})
+        self.assertEqual(
+            percentages_from_counts(counts, 10), [["Acting", 80, 10], ["Plot", 20, 30]]
+        )
+
+    @patch.object(LetterboxdReviewAnalyzer, "get_aspects")
+    @patch.object(LetterboxdReviewAnalyzer, "get_summary", return_value="Summary")
+    def test_first_refresh_analyzes_everything(self, _mock_get_summary, mock_get_aspects):
+        """Test the first refresh summarizes everything and scores the aspects locally."""
+        reviews = [{"rating": "4", "review_text": review["review_text"] + " and so on" * 15}
+                   for review in self.old_reviews]
+        self.reviews.side_effect = crawl(reviews)
+
+        summary, aspects, analyzed = self.refresher.refresh(FILM_URL, ["1"], ["2"])
+
+        self.assertEqual((summary, aspects, analyzed), ("Summary", [["Acting", 100, 0]], 10))
+        mock_get_aspects.assert_not_called()
+        state = self.refresher.store.get(FILM_URL)
+        self.assertEqual(state["aspect_counts"], {"Acting": [10, 0]})
+        self.assertEqual(state["review_keys"][0], review_key(reviews[0]))
+
+    @patch.object(LetterboxdReviewAnalyzer, "update_summary")
+    @patch.object(LetterboxdReviewAnalyzer, "get_results_stages")
+    def test_outdated_state_analyzes_everything(self, mock_stages, mock_update_summary):
+        """Test states without a summary or aspects, or from an older version, are redone."""
+        self.reviews.side_effect = crawl(self.old_reviews)
+        mock_stages.side_effect = lambda *_args: iter([("summary", "Summary")])
+        outdated = {"review_keys": [], "n_reviews": 10, "aspect_counts": {"Acting": [8, 1]},
+                    "summary": "Summary", "aspects": [["Acting", 80, 10]]}
+        for state in ({**outdated, "version": 1}, {**outdated, "aspects": None}):
+            self.refresher.store.put(FILM_URL, state)
+            self.assertEqual(self.refresher.refresh(FILM_URL, ["1"], ["2"])[2], 10)
+        mock_update_summary.assert_not_called()
+        self.assertEqual(self.refresher.store.get(FILM_URL)["aspect_counts"], {"Acting": [10, 0]})
+
+    @patch.object(LetterboxdReviewAnalyzer, "update_summary")
+    def test_refresh_merges_new_reviews(self, mock_update_summary):
+        """Test only reviews with unseen keys are scored and merged into the stored counts."""
+        self.refresher.save(FILM_URL, {
+            "review_keys": [review_key(review) for review in self.old_reviews],
+            "n_reviews": 10,
+            "aspect_counts": {"Acting": [10, 0]},
+            "summary": "Summary",
+            "aspects": [["Acting", 100, 0]],
+        })
+        listing = [
+            {"rating": "1", "review_text": "The acting was terrible."},
+            *self.old_reviews[:5],
+            {"rating": "2", "review_text": "Awful acting " + "and much more to say " * 12},
+            *self.old_reviews[5:],
+        ]
+        self.reviews.side_effect = crawl(listing)
+        mock_update_summary.return_value = "Updated summary"
+
+        summary, aspects, analyzed = self.refresher.refresh(FILM_URL, ["1"], ["2"])
+
+        self.assertEqual((summary, analyzed), ("Updated summary", 2))
+        self.assertEqual(aspects, [["Acting", 83, 17]])
+        state = self.refresher.store.get(FILM_URL)
+        self.assertEqual(state["n_reviews"], 12)
+        self.assertEqual(set(state["review_keys"]), {review_key(review) for review in listing})
+
+    def test_refresh_without_new_reviews(self):
+        """Test the stored results are returned when nothing new was posted."""
+        self.refresher.save(FILM_URL, {
+            "review_keys": [review_key(review) for review in self.old_reviews],
+            "n_reviews": 10, "aspect_counts": {},
+            "summary": "Summary", "aspects": [["Acting", 80, 10]],
+        })
+        self.reviews.side_effect = crawl(self.old_reviews[:4])
+        self.assertEqual(
+            self.refresher.refresh(FILM_URL, ["1"], ["2"]), ("Summary", [["Acting", 80, 10]], 0)
+        )
+
+    @patch.object(LetterboxdReviewAnalyzer, "get_results_stages")
+    def test_partial_crawl_not_saved(self, mock_stages):
+        """Test a crawl that skipped pages or hit the deadline does not move the state."""
+        self.reviews.side_effect = crawl(self.old_reviews, complete=False)
+        mock_stages.side_effect = lambda *_args: iter([("summary", "Summary")])
+        self.assertEqual(self.refresher.refresh(FILM_URL, ["1"], ["2"])[0], "Summary")
+        self.assertIsNone(self.refresher.store.get(FILM_URL))
+
+        self.reviews.side_effect = crawl(self.old_reviews)
+        self.refresher.refresh(FILM_URL, ["1"], ["2"])
+        self.reviews.side_effect = crawl(
+            [{"rating": "1", "review_text": "The acting was terrible."}], complete=False)
+        self.assertEqual(self.refresher.refresh(FILM_URL, ["1"], ["2"])[2], 1)
+        state = self.refresher.store.get(FILM_URL)
+        self.assertEqual(state["n_reviews"], 10)
+        self.assertEqual(len(state["review_keys"]), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
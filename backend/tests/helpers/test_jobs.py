@@ -0,0 +1,87 @@
+"""Test suite for the jobs.py background job queue"""
+
+import threading
+import unittest
+
+from src.helpers.jobs import JobQueue, JobQueueFull
+
+
+class TestJobQueue(unittest.TestCase):
+    """Unit tests for the JobQueue class."""
+
+    def setUp(self):
+        """Create a queue with two workers."""
+        self.jobs = JobQueue(workers=2, max_pending=2)
+
+    def test_job_runs_in_background(self):
+        """Test a submitted job returns an id at once and finishes in a worker."""
+        job_id = self.jobs.submit("roast", lambda: ({"roast": "Ouch"}, 200))
+        job = self.jobs.get(job_id, wait=2)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"], {"roast": "Ouch"})
+        self.assertEqual(job["status_code"], 200)
+        self.assertIsNotNone(job["finished_at"])
+
+    def test_failed_jobs(self):
+        """Test error statuses and exceptions mark the job failed."""
+        def crash():
+            raise RuntimeError("boom")
+
+        bad_request = self.jobs.submit("roast", lambda: ({"error": "username is required"}, 400))
+        crashed = self.jobs.submit("roast", crash)
+        self.assertEqual(self.jobs.get(bad_request, wait=2)["status"], "failed")
+        job = self.jobs.get(crashed, wait=2)
+        self.assertEqual((job["status"], job["status_code"]), ("failed", 500))
+        self.assertEqual(job["result"], {"error": "boom"})
+
+    def test_unknown_job(self):
+        """Test an unknown id returns None."""
+        self.assertIsNone(self.jobs.get("missing"))
+
+    def test_queue_full(self):
+        """Test submissions are refused once max_pending jobs are waiting."""
+        jobs = JobQueue(workers=1, max_pending=2)
+        started, release = threading.Event(), threading.Event()
+
+        def blocked():
+            started.set()
+            release.wait(2)
+            return {}, 200
+
+        try:
+            jobs.submit("taste", blocked)
+            started.wait(2)
+            jobs.submit("taste", blocked)
+            jobs.submit("taste", blocked)
+            with self.assertRaises(JobQueueFull):
+                jobs.submit("taste", blocked)
+            self.assertEqual(jobs.stats()["pending"], 2)
+        finally:
+            release.set()
+
+    def test_changes(self):
+        """Test following a job yields each status up to the result."""
+        release = threading.Event()
+        job_id = self.jobs.submit("roast", lambda: (release.wait(2), 200))
+        changes = self.jobs.changes(job_id, timeout=2)
+        first = next(changes)
+        release.set()
+        statuses = [first["status"]] + [job["status"] for job in changes]
+        self.assertEqual(statuses[-1], "done")
+        self.assertTrue(set(statuses) <= {"queued", "running", "done"})
+
+    def test_finished_jobs_pruned(self):
+        """Test the oldest finished jobs are forgotten past max_jobs."""
+        jobs = JobQueue(workers=1, max_jobs=2)
+        first = jobs.submit("roast", lambda: ({}, 200))
+        jobs.get(first, wait=2)
+        second = jobs.submit("roast", lambda: ({}, 200))
+        jobs.get(second, wait=2)
+        third = jobs.submit("roast", lambda: ({}, 200))
+        jobs.get(third, wait=2)
+        self.assertIsNone(jobs.get(first))
+        self.assertEqual(jobs.stats()["jobs"]["done"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""Test suite for the keyed_locks.py per-key locks"""
+
+import threading
+import time
+import unittest
+
+from src.helpers.keyed_locks import KeyedLocks
+
+
+class TestKeyedLocks(unittest.TestCase):
+    """Unit tests for the KeyedLocks class."""
+
+    def setUp(self):
+        """Create an empty set of locks."""
+        self.locks = KeyedLocks()
+
+    def test_same_key_serialized(self):
+        """Test threads holding one key run one at a time, other keys do not wait."""
+        active = []
+        overlaps = []
+
+        def work(key):
+            with self.locks.hold(key):
+                active.append(key)
+                overlaps.append(active.count(key))
+                time.sleep(0.02)
+                active.remove(key)
+
+        threads = [threading.Thread(target=work, args=(key,)) for key in ("a", "a", "a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(max(overlaps), 1)
+        self.assertEqual(len(self.locks), 0)
+
+    def test_released_on_error(self):
+        """Test a lock is dropped when its block raises."""
+        with self.assertRaises(ValueError):
+            with self.locks.hold("user"):
+                self.assertEqual(len(self.locks), 1)
+                raise ValueError("Invalid user")
+        self.assertEqual(len(self.locks), 0)
+        with self.locks.hold("user"):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
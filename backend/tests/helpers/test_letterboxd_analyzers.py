@@ -1,11 +1,14 @@
 """Testing suite for the class LetterboxdAnalyzer"""
 
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 from src.helpers.letterboxd_analyzers import (
     LetterboxdReviewAnalyzer,
     AspectFormatError,
     SummaryError,
+    merge_counts,
 )
 
 
@@ -138,7 +141,7 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
         with self.assertRaises(AspectFormatError):
             self.analyzer.aspect_processor("invalid string")
 
-    @patch("src.helpers.letterboxd_analyzers.genai.GenerativeModel.generate_content")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel.generate_content")
     def test_generate_summary_success(self, mock_generate_content):
         """Test successful summary generation"""
 
@@ -153,7 +156,7 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
 
         self.assertEqual(result, mock_response.text)
 
-    @patch("src.helpers.letterboxd_analyzers.genai.GenerativeModel")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
     def test_generate_summary_too_long(self, mock_model):
         """Test generate_summary when the generated summary exceeds the word limit."""
 
@@ -175,7 +178,7 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
         # Ensure the method was actually called
         mock_model_instance.generate_content.assert_called_once()
 
-    @patch("src.helpers.letterboxd_analyzers.genai.GenerativeModel")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
     def test_generate_summary_exception(self, mock_model):
         """Test generate_summary when an exception occurs during API call."""
 
@@ -193,7 +196,7 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
         # Ensure the method was actually called
         mock_model_instance.generate_content.assert_called_once()
 
-    @patch("src.helpers.letterboxd_analyzers.genai.GenerativeModel")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
     def test_generate_aspects_exception(self, mock_model):
         """Test generate_aspects when exception is raised"""
 
@@ -208,7 +211,7 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, "Error generating aspects: API error"):
             self.analyzer.generate_aspects(review_text, "dummy_key")
 
-    @patch("src.helpers.letterboxd_analyzers.genai.GenerativeModel.generate_content")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel.generate_content")
     def test_generate_taste_match_movie(self, mock_generate_content):
         """Test successful summary generation"""
 
@@ -226,7 +229,7 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
 
         self.assertEqual(result, mock_response.text)
 
-    @patch("src.helpers.letterboxd_analyzers.genai.GenerativeModel")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
     def test_generate_taste_match_exception(self, mock_model):
         """Test unsuccessful summary generation"""
 
@@ -248,7 +251,7 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
         # Ensure the method was actually called
         mock_model_instance.generate_content.assert_called_once()
 
-    @patch("src.helpers.letterboxd_analyzers.genai.GenerativeModel")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
     def test_generate_taste_match_too_long(self, mock_model):
         """Test generate_summary when the generated summary exceeds the word limit."""
 
@@ -272,6 +275,47 @@ class TestLetterboxdReviewAnalyzer(unittest.TestCase):
         # Ensure the method was actually called
         mock_model_instance.generate_content.assert_called_once()
 
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
+    def test_stream_summary(self, mock_model):
+        """Test stream_summary yields the text of each streamed chunk."""
+        chunks = [MagicMock(text="A witty "), MagicMock(text="summary.")]
+        mock_model.return_value.generate_content.return_value = chunks
+
+        result = list(self.analyzer.stream_summary("word " * 401, "dummy_key"))
+
+        self.assertEqual(result, ["A witty ", "summary."])
+        _, kwargs = mock_model.return_value.generate_content.call_args
+        self.assertTrue(kwargs["stream"])
+
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
+    def test_stream_taste_match_exception(self, mock_model):
+        """Test stream_taste_match wraps errors raised when starting the stream."""
+        mock_model.return_value.generate_content.side_effect = Exception("API error")
+
+        with self.assertRaisesRegex(ValueError, "Error streaming taste match: API error"):
+            list(self.analyzer.stream_taste_match("word " * 101, "word " * 401, "Her", "k"))
+
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
+    def test_generate_summary_stream_generation_aborts(self, mock_model):
+        """Test stream_generation abandons a summary once it passes the word limit."""
+        analyzer = LetterboxdReviewAnalyzer(stream_generation=True)
+        chunks = [MagicMock(text="word " * 50) for _ in range(10)]
+        mock_model.return_value.generate_content.return_value = chunks
+
+        with self.assertRaisesRegex(ValueError, "Summary over 200 words"):
+            analyzer.generate_summary("word " * 401, "dummy_key")
+
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
+    def test_generate_taste_match_stream_generation(self, mock_model):
+        """Test stream_generation joins the streamed taste match."""
+        analyzer = LetterboxdReviewAnalyzer(stream_generation=True)
+        chunks = [MagicMock(text="You will "), MagicMock(text="love it.")]
+        mock_model.return_value.generate_content.return_value = chunks
+
+        result = analyzer.generate_taste_match("word " * 101, "word " * 401, "Her", "k")
+
+        self.assertEqual(result, "You will love it.")
+
 
 class TestLetterboxdReviewAnalyzerResults(unittest.TestCase):
     """Unit tests for the LetterboxdReviewAnalyzer get_results and get_taste_match_results class."""
@@ -386,6 +430,19 @@ class TestLetterboxdReviewAnalyzerResults(unittest.TestCase):
         self.assertEqual(mock_generate_summary.call_count, 3)
         self.assertEqual(mock_generate_aspects.call_count, 3)
 
+    @patch("src.helpers.letterboxd_analyzers.LetterboxdReviewAnalyzer.get_aspects")
+    @patch("src.helpers.letterboxd_analyzers.LetterboxdReviewAnalyzer.get_summary")
+    def test_get_results_stages(self, mock_get_summary, mock_get_aspects):
+        """Test the summary is yielded before the aspects are generated."""
+        mock_get_summary.return_value = "Summary"
+        mock_get_aspects.return_value = [["Acting", 70, 5]]
+
+        stages = self.analyzer.get_results_stages("word " * 400, self.api_key1, self.api_key2)
+
+        self.assertEqual(next(stages), ("summary", "Summary"))
+        mock_get_aspects.assert_not_called()
+        self.assertEqual(list(stages), [("aspects", [["Acting", 70, 5]])])
+
     @patch(
         "src.helpers.letterboxd_analyzers.LetterboxdReviewAnalyzer.generate_taste_match"
     )
@@ -413,6 +470,18 @@ class TestLetterboxdReviewAnalyzerResults(unittest.TestCase):
                 user_reviews, movie_reviews, movie_name, ["1", "2", "3"]
             )
 
+    @patch(
+        "src.helpers.letterboxd_analyzers.LetterboxdReviewAnalyzer.generate_taste_match"
+    )
+    def test_get_taste_match_result_short_profile(self, mock_generate_taste_match):
+        "Test a terse taste profile is matched without the user reviews length check"
+        mock_generate_taste_match.return_value = "You will love it"
+        result = self.analyzer.get_taste_match_result(
+            "Loves slow horror, hates musicals.", "word " * 401, "Talk to Me",
+            ["1", "2", "3"], profile=True
+        )
+        self.assertEqual(result, "You will love it")
+
     def test_get_taste_match_result_less_movie_reviews(self):
         "Test a get_tast_match_result with not enough movie reviews"
         movie_reviews = "word " * 50
@@ -449,6 +518,109 @@ class TestLetterboxdReviewAnalyzerResults(unittest.TestCase):
 
         self.assertEqual(mock_generate_taste_match.call_count, 3)
 
+    @patch("src.helpers.letterboxd_analyzers.LetterboxdReviewAnalyzer.stream_summary")
+    def test_get_summary_stream_falls_back(self, mock_stream_summary):
+        """Test get_summary_stream moves to the next key if a stream cannot start."""
+        def fake_stream(_reviews, key, safety="off"):  # pylint: disable=unused-argument
+            if key == "1":
+                raise ValueError("quota exceeded")
+            yield "Streamed "
+            yield "summary"
+
+        mock_stream_summary.side_effect = fake_stream
+        review_text = "word " * 401
+
+        result = list(self.analyzer.get_summary_stream(review_text, self.api_key1))
+
+        self.assertEqual(result, ["Streamed ", "summary"])
+        self.assertEqual(mock_stream_summary.call_count, 2)
+
+    def test_get_summary_stream_not_enough_reviews(self):
+        """Test get_summary_stream validates the review count before streaming."""
+        with self.assertRaisesRegex(ValueError, "Not enough reviews found"):
+            self.analyzer.get_summary_stream("word " * 10, self.api_key1)
+
+
+class TestMapReduce(unittest.TestCase):
+    """Unit tests for the map-reduce mode of LetterboxdReviewAnalyzer."""
+
+    def setUp(self):
+        """Create a map-reduce analyzer with small chunks."""
+        self.analyzer = LetterboxdReviewAnalyzer(map_reduce=True)
+        self.analyzer.MAP_CHUNK_WORDS = 500
+        # 8 reviews of 200 words, so 4 chunks of 2 reviews
+        self.reviews = " >>>".join("word " * 199 + f"review{i}" for i in range(8))
+
+    def test_chunk_reviews(self):
+        """Test chunks hold whole reviews and stay under the chunk size."""
+        chunks = self.analyzer.chunk_reviews(self.reviews)
+        self.assertEqual([n_reviews for _, n_reviews in chunks], [2, 2, 2, 2])
+        self.assertEqual(" >>>".join(chunk for chunk, _ in chunks), self.reviews)
+
+    def test_merge_counts(self):
+        """Test counts are summed with aspect names matched case-insensitively."""
+        total = merge_counts({"Acting": [1, 2]}, {"acting": [3, 4], "Plot": [1, 0]})
+        self.assertEqual(total, {"Acting": [4, 6], "Plot": [1, 0]})
+
+    @patch.object(LetterboxdReviewAnalyzer, "generate_with_keys", return_value="Combined")
+    @patch.object(LetterboxdReviewAnalyzer, "generate_aspects")
+    @patch.object(LetterboxdReviewAnalyzer, "generate_summary")
+    def test_map_reduce_in_parallel(self, mock_summary, mock_aspects, mock_reduce):
+        """Test chunks are analyzed in parallel over all keys and the counts merged."""
+        in_flight, peak, lock = [0], [0], threading.Lock()
+
+        def slow(result):
+            def call(*_args, **_kwargs):
+                with lock:
+                    in_flight[0] += 1
+                    peak[0] = max(peak[0], in_flight[0])
+                time.sleep(0.05)
+                with lock:
+                    in_flight[0] -= 1
+                return result
+            return call
+
+        mock_summary.side_effect = slow("Chunk summary")
+        mock_aspects.side_effect = slow("{'acting': [50, 50], 'plot': [100, 0]}")
+
+        summary, aspects = self.analyzer.get_results(self.reviews, ["1", "2"], ["3", "4"])
+
+        self.assertEqual(summary, "Combined")
+        self.assertEqual(aspects, [["Acting", 50, 50], ["Plot", 100, 0]])
+        self.assertEqual(peak[0], 8)
+        calls = mock_summary.call_args_list + mock_aspects.call_args_list
+        self.assertEqual({call.args[1] for call in calls}, {"1", "2", "3", "4"})
+        self.assertEqual(mock_reduce.call_args.args[1].count("Chunk summary"), 4)
+
+    @patch.object(LetterboxdReviewAnalyzer, "generate_with_keys")
+    @patch.object(LetterboxdReviewAnalyzer, "generate_aspects")
+    @patch.object(LetterboxdReviewAnalyzer, "generate_summary")
+    def test_failed_chunks_are_skipped(self, mock_summary, mock_aspects, mock_reduce):
+        """Test chunks that fail on every key are left out of the reduce step."""
+        def summary(chunk, *_args, **_kwargs):
+            if "review0" not in chunk:
+                raise ValueError("API error")
+            return "Only summary"
+
+        mock_summary.side_effect = summary
+        mock_aspects.side_effect = lambda chunk, *_args, **_kwargs: (
+            "{'acting': [100, 0]}" if "review0" in chunk else "not aspects"
+        )
+
+        summary, aspects = self.analyzer.get_results(self.reviews, ["1"], ["2"])
+
+        self.assertEqual(summary, "Only summary")
+        self.assertEqual(aspects, [["Acting", 100, 0]])
+        mock_reduce.assert_not_called()
+
+    def test_short_reviews_not_chunked(self):
+        """Test reviews under the chunk size take the usual single call path."""
+        with patch.object(LetterboxdReviewAnalyzer, "get_results_map_reduce") as mock_map_reduce, \
+                patch.object(LetterboxdReviewAnalyzer, "get_summary", return_value="S"), \
+                patch.object(LetterboxdReviewAnalyzer, "get_aspects", return_value=[]):
+            self.assertEqual(self.analyzer.get_results("word " * 450, ["1"], ["2"]), ("S", []))
+        mock_map_reduce.assert_not_called()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,84 @@
+"""Test suite for the llm_providers.py provider classes"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.helpers.llm_providers import (
+    LLMProvider,
+    GeminiProvider,
+    FakeLLMProvider,
+    ProviderError,
+)
+from src.helpers.letterboxd_analyzers import LetterboxdReviewAnalyzer
+from src.helpers.roast_generator import LetterboxdRoastAnalyzer
+
+
+class TestGeminiProvider(unittest.TestCase):
+    """Unit tests for the GeminiProvider class."""
+
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
+    def test_generate_passes_safety_settings(self, mock_model):
+        """Test generate forwards the prompt and safety settings to Gemini."""
+        mock_model.return_value.generate_content.return_value = MagicMock(text="Hi")
+        result = GeminiProvider().generate("gemini-2.0-flash", "prompt", "key", ["s"])
+        self.assertEqual(result, "Hi")
+        mock_model.return_value.generate_content.assert_called_once_with(
+            "prompt", safety_settings=["s"]
+        )
+
+    def test_one_client_per_key(self):
+        """Test models for the same key share a client and other keys do not."""
+        provider = GeminiProvider()
+        # pylint: disable=protected-access
+        first = provider.model("gemini-2.0-flash", "key1")._client
+        self.assertIs(provider.model("gemini-1.5-pro", "key1")._client, first)
+        self.assertIsNot(provider.model("gemini-2.0-flash", "key2")._client, first)
+
+    def test_interface_not_implemented(self):
+        """Test the base provider cannot be used directly."""
+        with self.assertRaises(NotImplementedError):
+            LLMProvider().generate("model", "prompt", "key")
+
+
+class TestFakeLLMProvider(unittest.TestCase):
+    """Unit tests for the FakeLLMProvider class."""
+
+    def test_deterministic_output(self):
+        """Test the same prompt and seed always give the same words."""
+        first = FakeLLMProvider(words=50).generate("model", "Summarize this", "key")
+        second = FakeLLMProvider(words=50).generate("model", "Summarize this", "key")
+        self.assertEqual(first, second)
+        self.assertEqual(len(first.split()), 50)
+
+    def test_failure_rate(self):
+        """Test every call fails with a failure rate of one."""
+        provider = FakeLLMProvider(failure_rate=1.0)
+        with self.assertRaises(ProviderError):
+            provider.generate("model", "prompt", "key")
+        with self.assertRaises(ProviderError):
+            provider.stream("model", "prompt", "key")
+
+    def test_stream_joins_to_generate(self):
+        """Test streaming yields the same text as a complete generation."""
+        provider = FakeLLMProvider(words=20)
+        streamed = "".join(provider.stream("model", "prompt", "key"))
+        self.assertEqual(streamed.strip(), provider.generate("model", "prompt", "key"))
+
+    def test_pipeline_offline(self):
+        """Test the analyzers run end to end on the fake provider."""
+        provider = FakeLLMProvider(words=100, aspects=4)
+        analyzer = LetterboxdReviewAnalyzer(provider=provider)
+
+        summary, aspects = analyzer.get_results("word " * 401, ["1", "2", "3"], ["4", "5", "6"])
+
+        self.assertEqual(len(summary.split()), 100)
+        self.assertEqual(len(aspects), 4)
+        self.assertTrue(all(len(aspect) == 3 for aspect in aspects))
+
+        roaster = LetterboxdRoastAnalyzer(provider=provider)
+        roast = roaster.get_results([{"review_text": "Fine."}], {}, ["1"])
+        self.assertEqual(len(roast.split()), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""Test suite for the local_aspects.py aspect analyzer"""
+
+import time
+import unittest
+from unittest.mock import patch
+
+from src.helpers.local_aspects import LocalAspectAnalyzer
+from src.helpers.letterboxd_analyzers import LetterboxdReviewAnalyzer
+
+
+class TestLocalAspectAnalyzer(unittest.TestCase):
+    """Unit tests for the LocalAspectAnalyzer class."""
+
+    def setUp(self):
+        """Create the analyzer."""
+        self.analyzer = LocalAspectAnalyzer()
+
+    def test_analyze_shape_and_percentages(self):
+        """Test aspects come back as [aspect, pos %, neg %] over all reviews."""
+        reviews = [
+            "The acting is brilliant and the score is stunning.",
+            "Great performances all around, but the plot is a boring mess.",
+            "Boring plot. Nothing else to say.",
+            "I watched it on a plane.",
+        ]
+        aspects = self.analyzer.analyze(reviews)
+        self.assertEqual(aspects[0], ["Acting", 50, 0])
+        self.assertIn(["Plot", 0, 50], aspects)
+        self.assertIn(["Music", 25, 0], aspects)
+        self.assertTrue(all(len(aspect) == 3 for aspect in aspects))
+
+    def test_negation_flips_sentiment(self):
+        """Test a negated sentiment word counts the other way."""
+        aspects = self.analyzer.analyze(["The script is not good at all."])
+        self.assertEqual(aspects, [["Writing", 0, 100]])
+
+    def test_joined_reviews_and_empty_input(self):
+        """Test the ' >>>' joined review text is accepted and empty input gives []."""
+        joined = "Gorgeous cinematography. >>>Awful cinematography."
+        self.assertEqual(self.analyzer.analyze(joined), [["Cinematography", 50, 50]])
+        self.assertEqual(self.analyzer.analyze([]), [])
+        self.assertEqual(self.analyzer.analyze("no aspects here"), [])
+
+    def test_analyze_is_fast(self):
+        """Test a full 30 page scrape is scored in well under a second."""
+        reviews = [
+            f"review {i}: the acting was great but the pacing dragged and the ending was weak "
+            * 10 for i in range(360)
+        ]
+        start = time.perf_counter()
+        self.analyzer.analyze(reviews)
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+
+class TestAspectModes(unittest.TestCase):
+    """Unit tests for the aspect modes of LetterboxdReviewAnalyzer."""
+
+    @patch.object(LetterboxdReviewAnalyzer, "get_llm_aspects")
+    def test_local_mode_skips_llm(self, mock_get_llm_aspects):
+        """Test local mode never calls the model."""
+        analyzer = LetterboxdReviewAnalyzer(aspect_mode="local")
+        aspects = analyzer.get_aspects("Brilliant acting.", ["1", "2", "3"])
+        self.assertEqual(aspects, [["Acting", 100, 0]])
+        mock_get_llm_aspects.assert_not_called()
+
+    @patch.object(LetterboxdReviewAnalyzer, "get_llm_aspects", return_value=None)
+    def test_fallback_mode(self, _mock_get_llm_aspects):
+        """Test fallback mode scores aspects locally when the model fails."""
+        analyzer = LetterboxdReviewAnalyzer(aspect_mode="fallback")
+        aspects = analyzer.get_aspects("Brilliant acting.", ["1", "2", "3"])
+        self.assertEqual(aspects, [["Acting", 100, 0]])
+
+    @patch.object(LetterboxdReviewAnalyzer, "get_llm_aspects", return_value=None)
+    def test_llm_mode_returns_none(self, _mock_get_llm_aspects):
+        """Test llm mode still degrades to None when the model fails."""
+        self.assertIsNone(LetterboxdReviewAnalyzer().get_aspects("Brilliant acting.", ["1"]))
+
+    def test_unknown_mode(self):
+        """Test an unknown aspect mode is rejected."""
+        with self.assertRaises(ValueError):
+            LetterboxdReviewAnalyzer(aspect_mode="magic")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Test suite for the metrics.py latency metrics"""
+
+import unittest
+from unittest.mock import patch
+
+from src.helpers.deadlines import propagate_deadline
+from src.helpers.metrics import (
+    LatencyHistogram,
+    MetricsRegistry,
+    RequestTimings,
+    instrument,
+    start_request_timings,
+    timed_stage,
+)
+from src.helpers.stages import run_stages
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Unit tests for the LatencyHistogram class."""
+
+    def test_observe(self):
+        """Test latencies are counted in every bucket they fit."""
+        histogram = LatencyHistogram(buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+        self.assertEqual(histogram.counts, [1, 2])
+        self.assertEqual((histogram.count, histogram.sum), (3, 5.55))
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Unit tests for the MetricsRegistry class."""
+
+    def test_render(self):
+        """Test stages, errors, endpoints and statuses are exposed for Prometheus."""
+        registry = MetricsRegistry(buckets=(1.0,))
+        registry.observe_stage("http_fetch", 0.5)
+        registry.observe_stage("http_fetch", 2.0, error=True)
+        registry.observe_endpoint("/roast", 200, 3.0)
+
+        page = registry.render()
+
+        self.assertIn('letterboxd_stage_seconds_bucket{stage="http_fetch",le="1.0"} 1', page)
+        self.assertIn('letterboxd_stage_seconds_bucket{stage="http_fetch",le="+Inf"} 2', page)
+        self.assertIn('letterboxd_stage_seconds_sum{stage="http_fetch"} 2.500000', page)
+        self.assertIn('letterboxd_stage_errors_total{stage="http_fetch"} 1', page)
+        self.assertIn('letterboxd_endpoint_seconds_count{endpoint="/roast"} 1', page)
+        self.assertIn('letterboxd_responses_total{endpoint="/roast",status="200"} 1', page)
+
+
+class TestTimedStage(unittest.TestCase):
+    """Unit tests for timed_stage, instrument and the request timings."""
+
+    @patch("src.helpers.metrics.registry")
+    def test_request_timings_across_threads(self, mock_registry):
+        """Test stages run in worker threads add to the request that started them."""
+        timings = start_request_timings()
+
+        @instrument("html_parse")
+        def parse():
+            return "soup"
+
+        run_stages({"a": parse, "b": propagate_deadline(parse)})
+
+        self.assertEqual(set(timings.totals), {"html_parse"})
+        self.assertEqual(mock_registry.observe_stage.call_count, 2)
+
+    @patch("src.helpers.metrics.registry")
+    def test_errors_counted(self, mock_registry):
+        """Test a stage that raises is recorded as an error and the error kept."""
+        with self.assertRaises(ValueError):
+            with timed_stage("llm"):
+                raise ValueError("Model error")
+        self.assertTrue(mock_registry.observe_stage.call_args.kwargs["error"])
+
+    def test_server_timing(self):
+        """Test stage totals are formatted in milliseconds for Server-Timing."""
+        timings = RequestTimings()
+        timings.add("http_fetch", 0.25)
+        timings.add("http_fetch", 0.25)
+        self.assertEqual(timings.server_timing(total=1.0),
+                         "http_fetch;dur=500.0, total;dur=1000.0")
+
+
+if __name__ == "__main__":
+    unittest.main()
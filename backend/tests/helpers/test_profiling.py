@@ -0,0 +1,66 @@
+"""Test suite for the profiling.py request profiler"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.helpers.profiling import RequestProfiler
+
+
+def slow_handler():
+    """A handler doing enough work to show up in a profile."""
+    return sum(i * i for i in range(10000))
+
+
+class TestRequestProfiler(unittest.TestCase):
+    """Unit tests for the RequestProfiler class."""
+
+    def setUp(self):
+        """Create a profiler saving to a temporary directory."""
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.profiler = RequestProfiler(self.directory.name, token="secret", max_profiles=2)
+
+    def tearDown(self):
+        """Remove the saved profiles."""
+        self.directory.cleanup()
+
+    def test_wanted(self):
+        """Test requests are profiled with the admin token or when sampled."""
+        self.assertTrue(self.profiler.wanted("secret"))
+        self.assertFalse(self.profiler.wanted("guess"))
+        self.assertFalse(self.profiler.wanted(None))
+        self.profiler.sample_rate = 1.0
+        self.assertTrue(self.profiler.wanted(None))
+        self.assertFalse(RequestProfiler(self.directory.name).wanted(None))
+
+    def test_run_saves_profile_and_report(self):
+        """Test the handler result is returned and both files are saved."""
+        result, profile_id = self.profiler.run("/movie_details", slow_handler)
+
+        self.assertEqual(result, slow_handler())
+        self.assertIn("movie_details", profile_id)
+        path = os.path.join(self.directory.name, profile_id)
+        self.assertTrue(os.path.exists(f"{path}.prof"))
+        with open(f"{path}.txt", encoding="utf-8") as file:
+            report = file.read()
+        self.assertIn("/movie_details took", report)
+        self.assertIn("slow_handler", report)
+
+    def test_concurrent_request_not_profiled(self):
+        """Test a request arriving while another is profiled runs unprofiled."""
+        with self.profiler.lock:
+            self.assertEqual(self.profiler.run("/roast", lambda: "roast"), ("roast", None))
+
+    @patch("src.helpers.profiling.print")
+    def test_prune(self, _mock_print):
+        """Test only the newest max_profiles profiles are kept."""
+        for _ in range(3):
+            self.profiler.run("/taste", slow_handler)
+        files = os.listdir(self.directory.name)
+        self.assertEqual(len([name for name in files if name.endswith(".prof")]), 2)
+        self.assertEqual(len(files), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
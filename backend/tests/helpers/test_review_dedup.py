@@ -0,0 +1,65 @@
+"""Test suite for the review_dedup.py helper functions"""
+
+import time
+import unittest
+
+from src.helpers.review_dedup import (
+    normalize_review,
+    minhash_signature,
+    similarity,
+    dedupe_reviews,
+)
+
+
+class TestReviewDedup(unittest.TestCase):
+    """Unit tests for near-duplicate review elimination."""
+
+    def test_normalize_review(self):
+        """Test normalization ignores case, punctuation and spacing."""
+        self.assertEqual(normalize_review("  LOL!!  this   rules... "), "lol this rules")
+
+    def test_similarity_of_near_duplicates(self):
+        """Test near-identical reviews have a high estimated similarity."""
+        base = ("the cinematography in this film is breathtaking and every frame looks "
+                "like a painting but the script never quite lands its emotional beats")
+        near = base + " at all"
+        other = "a loud dumb blockbuster that i enjoyed far more than i should have"
+        signature = minhash_signature(normalize_review(base))
+        self.assertGreaterEqual(similarity(signature, minhash_signature(near)), 0.8)
+        self.assertLess(similarity(signature, minhash_signature(other)), 0.3)
+
+    def test_dedupe_reviews(self):
+        """Test empty, exact and near duplicates are dropped and the first kept."""
+        meme = ("me watching this movie for the fifth time this week and crying at "
+                "the exact same scene every single time because it is perfect")
+        reviews = [
+            {"review_text": meme, "rating": "5"},
+            {"review_text": "", "rating": "4"},
+            {"review_text": meme.upper() + "!!!", "rating": "5"},
+            {"review_text": meme + " lol", "rating": "5"},
+            {"review_text": "Too long, and the third act falls apart.", "rating": "2"},
+        ]
+        kept, report = dedupe_reviews(reviews)
+        self.assertEqual(kept, [reviews[0], reviews[4]])
+        self.assertEqual(report["empty"], 1)
+        self.assertEqual(report["exact_duplicates"], 1)
+        self.assertEqual(report["near_duplicates"], 1)
+        self.assertEqual(report["reviews_kept"], 2)
+        self.assertGreater(report["tokens_saved"], 0)
+        self.assertEqual(
+            report["tokens_saved"], report["tokens_before"] - report["tokens_after"]
+        )
+
+    def test_dedupe_reviews_is_fast(self):
+        """Test a full 30 page scrape is deduplicated well under a second."""
+        reviews = [
+            {"review_text": f"review number {i} " + "with a fairly long body of text " * 20}
+            for i in range(360)
+        ]
+        start = time.perf_counter()
+        dedupe_reviews(reviews)
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+"""Test suite for the review_warehouse.py persistent review store"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.helpers.fake_letterboxd import FakeLetterboxd
+from src.helpers.review_warehouse import ReviewWarehouse
+
+FILM_URL = "https://letterboxd.com/film/heat/"
+
+
+def film_review(i):
+    """Builds a scraped film review."""
+    return {"review_id": f"viewing:{i}", "rating": "★★★", "review_text": f"Review {i}"}
+
+
+def crawl(reviews, complete=True):
+    """Builds a scraper mock side effect returning reviews and reporting its progress."""
+    def scrape(*_args, progress=None, **_kwargs):
+        progress["complete"] = complete
+        return reviews
+    return scrape
+
+
+class TestReviewWarehouse(unittest.TestCase):
+    """Unit tests for the ReviewWarehouse class."""
+
+    def setUp(self):
+        """Create a warehouse in a temporary file with a fake clock."""
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.now = 1000.0
+        self.warehouse = ReviewWarehouse(
+            os.path.join(self.directory.name, "warehouse.db"), max_age=60,
+            clock=lambda: self.now)
+
+    def tearDown(self):
+        """Remove the database."""
+        self.directory.cleanup()
+
+    @patch("src.helpers.review_warehouse.scrape_new_reviews")
+    @patch("src.helpers.review_warehouse.scrape_reviews")
+    def test_film_crawled_incrementally(self, mock_scrape, mock_scrape_new):
+        """Test a film is crawled in full once, read from the store while fresh, then
+        only crawled for the reviews above the stored ones."""
+        scraped = [film_review(i) for i in range(3)]
+        mock_scrape.side_effect = crawl(scraped)
+        self.assertEqual(self.warehouse.film_reviews(FILM_URL, pages=1), scraped)
+        self.now += 30
+        self.assertEqual(self.warehouse.film_reviews(FILM_URL, pages=1), scraped)
+        mock_scrape.assert_called_once()
+        mock_scrape_new.assert_not_called()
+
+        self.now += 60
+        mock_scrape_new.side_effect = crawl([film_review(4), film_review(3)])
+        reviews = self.warehouse.film_reviews(FILM_URL, pages=1)
+        self.assertEqual([review["review_text"] for review in reviews],
+                         ["Review 4", "Review 3", "Review 0", "Review 1", "Review 2"])
+        self.assertEqual(len(mock_scrape_new.call_args.args[1]), 3)
+        self.assertEqual(self.warehouse.watermark("film", FILM_URL),
+                         {"crawled_at": self.now, "pages": 1})
+        self.assertEqual(self.warehouse.stats()["film_reviews"], 5)
+
+    @patch("src.helpers.review_warehouse.scrape_reviews")
+    def test_more_pages_recrawled_in_full(self, mock_scrape):
+        """Test asking for more pages than the last crawl covered crawls in full."""
+        mock_scrape.side_effect = crawl([film_review(i) for i in range(30)])
+        self.assertEqual(len(self.warehouse.film_reviews(FILM_URL, pages=1)), 12)
+        self.assertEqual(len(self.warehouse.film_reviews(FILM_URL, pages=3)), 30)
+        self.assertEqual(len(self.warehouse.film_reviews(FILM_URL, pages=2)), 24)
+        self.assertEqual(mock_scrape.call_count, 2)
+
+    @patch("src.helpers.review_warehouse.scrape_new_reviews")
+    @patch("src.helpers.review_warehouse.scrape_reviews")
+    def test_partial_crawl_not_stored(self, mock_scrape, mock_scrape_new):
+        """Test a crawl that skipped a page or hit the deadline is returned but not
+        stored, and does not move the watermark."""
+        mock_scrape.side_effect = crawl([film_review(0)], complete=False)
+        self.assertEqual(self.warehouse.film_reviews(FILM_URL), [film_review(0)])
+        self.assertIsNone(self.warehouse.watermark("film", FILM_URL))
+        mock_scrape.side_effect = crawl([film_review(0)])
+        self.warehouse.film_reviews(FILM_URL)
+        self.assertEqual(mock_scrape.call_count, 2)
+
+        watermark = self.warehouse.watermark("film", FILM_URL)
+        self.now += 61
+        mock_scrape_new.side_effect = crawl([film_review(1)], complete=False)
+        self.assertEqual(len(self.warehouse.film_reviews(FILM_URL)), 2)
+        self.assertEqual(self.warehouse.watermark("film", FILM_URL), watermark)
+        self.assertEqual(self.warehouse.stats()["film_reviews"], 1)
+
+    @patch("src.helpers.review_warehouse.scrape_reviews")
+    def test_identical_reviews_kept(self, mock_scrape):
+        """Test reviews with the same rating and text are all stored."""
+        empty = [{"review_id": None, "rating": "★★★★", "review_text": ""}] * 6
+        mock_scrape.side_effect = crawl(empty)
+        self.warehouse.film_reviews(FILM_URL, pages=1)
+        self.assertEqual(self.warehouse.stats()["film_reviews"], 6)
+        self.assertEqual(len(self.warehouse.film_reviews(FILM_URL, pages=1)), 6)
+        self.assertEqual(len(self.warehouse.locks), 0)
+
+    def test_legacy_schema_migrated(self):
+        """Test a warehouse written before reviews were keyed by position is re-crawled."""
+        path = os.path.join(self.directory.name, "legacy.db")
+        with sqlite3.connect(path) as connection:
+            connection.executescript(
+                "CREATE TABLE film_reviews (film_url TEXT, review_key TEXT, position INTEGER, "
+                "rating TEXT, review_text TEXT, crawled_at REAL, "
+                "PRIMARY KEY (film_url, review_key));"
+                "CREATE TABLE watermarks (kind TEXT, key TEXT, crawled_at REAL, "
+                "pages INTEGER, PRIMARY KEY (kind, key));"
+                f"INSERT INTO watermarks VALUES ('film', '{FILM_URL}', 0, 1);"
+                f"INSERT INTO watermarks VALUES ('film_details', '{FILM_URL}', 0, 1);")
+        connection.close()
+        warehouse = ReviewWarehouse(path)
+        self.assertIsNone(warehouse.watermark("film", FILM_URL))
+        self.assertIsNotNone(warehouse.watermark("film_details", FILM_URL))
+        self.assertEqual(ReviewWarehouse(path).stats()["film_reviews"], 0)
+
+    def test_sequence_column_added(self):
+        """Test tables written before writes were numbered get a seq column."""
+        path = os.path.join(self.directory.name, "unnumbered.db")
+        with sqlite3.connect(path) as connection:
+            connection.executescript(
+                "CREATE TABLE films (film_url TEXT PRIMARY KEY, details TEXT NOT NULL, "
+                "crawled_at REAL NOT NULL);"
+                f"INSERT INTO films VALUES ('{FILM_URL}', '{{}}', 0);"
+                "PRAGMA user_version = 2;")
+        connection.close()
+        warehouse = ReviewWarehouse(path)
+        warehouse.store_document("film_details", "https://letterboxd.com/film/alien/", {})
+        rows = warehouse.connection().execute(
+            "SELECT film_url, seq FROM films ORDER BY seq").fetchall()
+        self.assertEqual(rows, [(FILM_URL, 0), ("https://letterboxd.com/film/alien/", 1)])
+
+    @patch("src.helpers.review_warehouse.movie_details_scraper",
+           return_value={"movie_name": "Heat"})
+    def test_film_details(self, mock_details):
+        """Test film details are kept until they are older than max_age."""
+        self.warehouse.film_details(FILM_URL)
+        self.assertEqual(self.warehouse.film_details(FILM_URL), {"movie_name": "Heat"})
+        self.now += 61
+        self.warehouse.film_details(FILM_URL)
+        self.assertEqual(mock_details.call_count, 2)
+
+    def test_user_profile_against_fake_letterboxd(self):
+        """Test a user is scraped in full once, then crawled from the top of the listing."""
+        letterboxd = FakeLetterboxd(latency=0, user_pages=2)
+        with letterboxd.installed():
+            reviews, stats = self.warehouse.user_profile("bob", n_pages=2)
+            requests_made = letterboxd.requests
+            self.assertEqual(self.warehouse.user_profile("bob", n_pages=2), (reviews, stats))
+            self.assertEqual(letterboxd.requests, requests_made)
+
+            self.now += 61
+            self.assertEqual(self.warehouse.user_reviews("bob", n_pages=2), reviews)
+            # Only the first page is read, its first review is already stored
+            self.assertEqual(letterboxd.requests, requests_made + 1)
+        self.assertEqual(len(reviews), 24)
+        self.assertEqual(stats["num_years"], "4")
+        self.assertEqual(self.warehouse.stats()["users"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,11 +9,23 @@ from src.helpers.scrapers import (
     validate_letterboxd_film_url,
     fetch_html_content,
     scrape_reviews,
+    scrape_new_reviews,
+    review_key,
     movie_details_scraper,
     ScraperError,
 )
 
 
+def reviews_page(*reviews):
+    """Builds a film reviews page from (viewing id, rating, text) tuples."""
+    items = "".join(
+        f'<li class="film-detail"><div class="js-review-body" '
+        f'data-full-text-url="/s/full-text/viewing:{viewing}/"><p>{text}</p></div>'
+        f'<span class="rating">{rating}</span></li>'
+        for viewing, rating, text in reviews)
+    return f"<html><body><ul>{items}</ul></body></html>"
+
+
 # Test suite for testing the Letterboxd scraper functionality
 class TestLetterboxdScraper(unittest.TestCase):
     """Unit tests for the Letterboxd scraper functions."""
@@ -212,6 +224,43 @@ class TestLetterboxdScraper(unittest.TestCase):
         with self.assertRaises(ValueError):
             movie_details_scraper("https://letterboxd.com/INVALID")
 
+    @patch("src.helpers.scrapers.fetch_html_content")
+    def test_reviews_identified_by_viewing_id(self, mock_fetch):
+        """Test identical reviews get distinct keys from their Letterboxd viewing ids."""
+        mock_fetch.return_value = (
+            reviews_page((11, "★★★★★", "10/10"), (12, "★★★★★", "10/10"))
+            .replace("</ul>", '<li class="film-detail"><a class="context" '
+                              'href="/bob/film/some-movie/">Review by bob</a></li></ul>'))
+        reviews = scrape_reviews("https://letterboxd.com/film/some-movie/", n=1)
+        self.assertEqual([review["review_id"] for review in reviews],
+                         ["viewing:11", "viewing:12", "/bob/film/some-movie/"])
+        self.assertEqual(len({review_key(review) for review in reviews}), 3)
+
+    @patch("src.helpers.scrapers.fetch_html_content")
+    def test_new_reviews_not_stopped_by_identical_text(self, mock_fetch):
+        """Test a new review matching a known one's rating and text is still collected."""
+        mock_fetch.side_effect = [
+            reviews_page((3, "★★★★★", "10/10"), (2, "★★", "Meh"), (1, "★★★★★", "10/10")),
+        ]
+        known_keys = {review_key({"review_id": "viewing:1", "rating": "★★★★★",
+                                  "review_text": "10/10"})}
+        progress = {}
+        reviews = scrape_new_reviews("https://letterboxd.com/film/some-movie/", known_keys,
+                                     n=2, progress=progress)
+        self.assertEqual([review["review_id"] for review in reviews],
+                         ["viewing:3", "viewing:2"])
+        self.assertTrue(progress["complete"])
+
+    @patch("src.helpers.scrapers.fetch_html_content")
+    def test_skipped_page_reported(self, mock_fetch):
+        """Test a page that failed to load marks the crawl as incomplete."""
+        mock_fetch.side_effect = [ScraperError("503"), reviews_page((1, "★★★", "Fine"))]
+        progress = {}
+        reviews = scrape_reviews("https://letterboxd.com/film/some-movie/", n=2,
+                                 progress=progress)
+        self.assertEqual(len(reviews), 1)
+        self.assertFalse(progress["complete"])
+
 
 # Running the tests
 if __name__ == "__main__":
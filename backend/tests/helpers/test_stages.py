@@ -0,0 +1,58 @@
+"""Test suite for the stages.py concurrent stage runner"""
+
+import threading
+import unittest
+
+from src.helpers.deadlines import current_deadline, deadline_scope
+from src.helpers.stages import format_timings, run_stages
+
+
+class TestRunStages(unittest.TestCase):
+    """Unit tests for run_stages."""
+
+    def test_stages_run_concurrently(self):
+        """Test every stage is running at the same time, and each is timed."""
+        all_started = threading.Barrier(3, timeout=2)
+
+        def stage(value):
+            all_started.wait()
+            return value
+
+        results, timings = run_stages({
+            "film_reviews": lambda: stage("reviews"),
+            "movie_details": lambda: stage({"movie_name": "Heat"}),
+            "user_reviews": lambda: stage("user"),
+        })
+
+        self.assertEqual(results["film_reviews"], "reviews")
+        self.assertEqual(results["movie_details"], {"movie_name": "Heat"})
+        self.assertEqual(
+            set(timings), {"film_reviews", "movie_details", "user_reviews", "total"})
+        self.assertGreaterEqual(timings["total"], max(timings["film_reviews"],
+                                                      timings["user_reviews"]))
+
+    def test_stage_error_raised(self):
+        """Test a failing stage raises its error once the others have finished."""
+        finished = []
+
+        def fail():
+            raise ValueError("Invalid URL")
+
+        with self.assertRaisesRegex(ValueError, "Invalid URL"):
+            run_stages({"movie_details": fail, "user_reviews": lambda: finished.append(1)})
+        self.assertEqual(finished, [1])
+
+    def test_deadline_propagated(self):
+        """Test stages run under the caller's request deadline."""
+        with deadline_scope(10) as deadline:
+            results, _ = run_stages({"stage": current_deadline})
+        self.assertIs(results["stage"], deadline)
+
+    def test_format_timings(self):
+        """Test timings are formatted in seconds for the log."""
+        self.assertEqual(format_timings({"scrape": 1.2, "total": 1.214}),
+                         "scrape=1.20s total=1.21s")
+
+
+if __name__ == "__main__":
+    unittest.main()
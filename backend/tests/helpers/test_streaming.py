@@ -0,0 +1,114 @@
+"""Test suite for the streaming.py helper functions"""
+
+import unittest
+from unittest.mock import MagicMock
+
+from src.helpers.streaming import (
+    chunk_text,
+    cancel_stream,
+    iter_stream_text,
+    first_available_stream,
+    collect_stream,
+    limit_words,
+    StreamError,
+)
+
+
+class FakeChunk:
+    """A streamed chunk whose text property may raise, like the Gemini one."""
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, text):
+        """Store the chunk text (None means the chunk has no text part)."""
+        self._text = text
+
+    @property
+    def text(self):
+        """Return the text or raise ValueError when there is none."""
+        if self._text is None:
+            raise ValueError("No text in chunk")
+        return self._text
+
+
+class TestStreaming(unittest.TestCase):
+    """Unit tests for the streaming helpers."""
+
+    def test_chunk_text_missing(self):
+        """Test chunk_text returns an empty string for chunks without text."""
+        self.assertEqual(chunk_text(FakeChunk(None)), "")
+        self.assertEqual(chunk_text(FakeChunk("Hello")), "Hello")
+
+    def test_cancel_stream(self):
+        """Test cancel_stream cancels the wrapped iterator."""
+        response = MagicMock()
+        cancel_stream(response)
+        response._iterator.cancel.assert_called_once()  # pylint: disable=protected-access
+
+    def test_iter_stream_text_skips_empty(self):
+        """Test iter_stream_text only yields non-empty text pieces."""
+        response = [FakeChunk("Hello "), FakeChunk(None), FakeChunk("world")]
+        self.assertEqual(list(iter_stream_text(response)), ["Hello ", "world"])
+
+    def test_iter_stream_text_error(self):
+        """Test iter_stream_text wraps errors raised midway."""
+        def broken():
+            yield FakeChunk("Hello")
+            raise RuntimeError("connection reset")
+
+        with self.assertRaisesRegex(ValueError, "connection reset"):
+            list(iter_stream_text(broken()))
+
+    def test_first_available_stream_falls_back(self):
+        """Test first_available_stream moves on when a key fails before output."""
+        def make_stream(key):
+            if key == "bad":
+                raise ValueError("quota exceeded")
+            yield f"{key}-1"
+            yield f"{key}-2"
+
+        result = list(first_available_stream(make_stream, ["bad", "good", "unused"]))
+        self.assertEqual(result, ["good-1", "good-2"])
+
+    def test_first_available_stream_all_fail(self):
+        """Test first_available_stream raises StreamError if no key works."""
+        def empty(_key):
+            yield from []
+
+        with self.assertRaises(StreamError):
+            list(first_available_stream(empty, ["1", "2"]))
+
+    def test_collect_stream_counts_split_words(self):
+        """Test collect_stream counts a word split across chunks only once."""
+        chunks = iter(["Hel", "lo wor", "ld, ", "again"])
+        self.assertEqual(
+            collect_stream(chunks, 3, ValueError, "too long"), "Hello world, again"
+        )
+
+    def test_collect_stream_aborts_early(self):
+        """Test collect_stream stops reading and closes the stream over the limit."""
+        consumed = []
+
+        def chunks():
+            try:
+                for i in range(100):
+                    consumed.append(i)
+                    yield "word "
+            finally:
+                consumed.append("closed")
+
+        with self.assertRaisesRegex(ValueError, "too long"):
+            collect_stream(chunks(), 5, ValueError, "too long")
+        self.assertEqual(consumed, [0, 1, 2, 3, 4, 5, "closed"])
+
+    def test_limit_words_passes_pieces_within_limit(self):
+        """Test limit_words yields the pieces up to the limit, then raises."""
+        passed = []
+        with self.assertRaisesRegex(ValueError, "too long"):
+            for piece in limit_words(iter(["Hel", "lo wor", "ld, ", "", "again"]), 2,
+                                     ValueError, "too long"):
+                passed.append(piece)
+        self.assertEqual(passed, ["Hel", "lo wor", "ld, "])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Test suite for the taste_profiles.py profile cache"""
+
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from src.helpers.letterboxd_analyzers import LetterboxdReviewAnalyzer
+from src.helpers.state_store import JsonStateStore
+from src.helpers.taste_profiles import TasteProfiles, own_review
+
+
+def user_reviews(count, offset=0):
+    """Builds scraped user reviews, newest first."""
+    return [
+        {"movie_name": f"Movie {i}", "movie_url": f"https://letterboxd.com/film/movie-{i}/",
+         "rating": "★★★★", "review_text": "a long enough review of this film " * 3}
+        for i in range(offset, offset + count)
+    ]
+
+
+@patch.object(LetterboxdReviewAnalyzer, "get_taste_profile", return_value="Loves slow cinema.")
+class TestTasteProfiles(unittest.TestCase):
+    """Unit tests for the TasteProfiles class."""
+
+    def setUp(self):
+        """Create a profile cache over a temporary directory and a fake clock."""
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.now = 1000.0
+        clock = patch("src.helpers.taste_profiles.time.time", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.mock_scrape = MagicMock()
+        self.profiles = TasteProfiles(
+            LetterboxdReviewAnalyzer(provider=MagicMock()),
+            JsonStateStore(self.directory.name),
+            ttl=60,
+            fetch_reviews=self.mock_scrape,
+        )
+
+    def tearDown(self):
+        """Remove the temporary directory."""
+        self.directory.cleanup()
+
+    def test_profile_built_once(self, mock_get_taste_profile):
+        """Test the profile is reused while nothing new was posted."""
+        self.mock_scrape.side_effect = lambda _username, n_pages: user_reviews(n_pages * 12)
+
+        text, reviewed = self.profiles.get("user", ["1"])
+        self.assertTrue(text.startswith("Loves slow cinema.\nMovies already reviewed: movie 0"))
+        self.assertEqual(self.profiles.get("user", ["1"]), (text, reviewed))
+
+        self.assertEqual(mock_get_taste_profile.call_count, 1)
+        pages = [call.kwargs["n_pages"] for call in self.mock_scrape.call_args_list]
+        self.assertEqual(pages, [10, 1])
+
+    def test_profile_rebuilt_on_new_review(self, mock_get_taste_profile):
+        """Test a new review on the first page triggers a rebuild."""
+        self.mock_scrape.return_value = user_reviews(12)
+        self.profiles.get("user", ["1"])
+        self.mock_scrape.return_value = user_reviews(12, offset=1)
+        self.profiles.get("user", ["1"])
+        self.assertEqual(mock_get_taste_profile.call_count, 2)
+
+    def test_profile_rebuilt_after_ttl(self, mock_get_taste_profile):
+        """Test the profile is rebuilt once the TTL has passed."""
+        self.mock_scrape.return_value = user_reviews(12)
+        self.profiles.get("user", ["1"])
+        self.now += 61
+        self.profiles.get("user", ["1"])
+        self.assertEqual(mock_get_taste_profile.call_count, 2)
+
+    def test_profile_failure_uses_reviews(self, mock_get_taste_profile):
+        """Test the raw reviews are used, and nothing stored, if no profile is written."""
+        self.mock_scrape.return_value = user_reviews(12)
+        mock_get_taste_profile.return_value = None
+        text, _ = self.profiles.get("user", ["1"])
+        self.assertIn("Movie 0, ★★★★: a long enough review", text)
+        self.assertIsNone(self.profiles.store.get("user"))
+
+    def test_own_review(self, _mock_get_taste_profile):
+        """Test the user's own review is found by movie name."""
+        self.mock_scrape.return_value = user_reviews(12)
+        _, reviewed = self.profiles.get("user", ["1"])
+        self.assertEqual(own_review(reviewed, "MOVIE 3"), user_reviews(1)[0]["review_text"])
+        self.assertIsNone(own_review(reviewed, "Another Movie"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Test suite for the user_review_store.py shared store"""
+
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.helpers.cache_backends import MemoryCache
+from src.helpers.user_review_store import UserReviewStore
+
+
+@patch("src.helpers.user_review_store.scrape_user_stats", return_value={"num_years": "3"})
+@patch("src.helpers.user_review_store.scrape_user_reviews", return_value=[{"review_text": "Hi"}])
+class TestUserReviewStore(unittest.TestCase):
+    """Unit tests for the UserReviewStore class."""
+
+    def setUp(self):
+        """Create a store with a fake clock."""
+        self.now = 0.0
+        self.store = UserReviewStore(max_users=2, ttl=60, clock=lambda: self.now)
+
+    def test_reviews_scraped_once(self, mock_reviews, _mock_stats):
+        """Test a second request for the same user is served from the store."""
+        self.assertEqual(self.store.reviews("user"), [{"review_text": "Hi"}])
+        self.assertEqual(self.store.reviews("user"), [{"review_text": "Hi"}])
+        self.assertEqual(self.store.reviews("user", n_pages=1), [{"review_text": "Hi"}])
+        mock_reviews.assert_called_once_with("user", n_pages=10)
+        self.assertEqual(self.store.metrics()["reviews"],
+                         {"hits": 2, "shared_hits": 0, "misses": 1, "hit_rate": 0.667})
+
+    def test_more_pages_and_expiry_rescrape(self, mock_reviews, _mock_stats):
+        """Test a request for more pages, or after the TTL, scrapes again."""
+        self.store.reviews("user", n_pages=1)
+        self.store.reviews("user", n_pages=10)
+        self.now = 61
+        self.store.reviews("user", n_pages=10)
+        self.assertEqual(mock_reviews.call_count, 3)
+
+    def test_stats_and_freshness(self, _mock_reviews, mock_stats):
+        """Test stats are cached and their age is reported."""
+        self.store.stats("user")
+        self.now = 5
+        self.store.stats("user")
+        mock_stats.assert_called_once_with("user")
+        self.assertEqual(self.store.freshness("user"), {"reviews": None, "stats": 5})
+
+    def test_shared_backend(self, mock_reviews, _mock_stats):
+        """Test a scrape by one worker is reused by another through the backend."""
+        backend = MemoryCache()
+        UserReviewStore(backend=backend).reviews("user", n_pages=5)
+        other = UserReviewStore(backend=backend)
+        self.assertEqual(other.reviews("user", n_pages=5), [{"review_text": "Hi"}])
+        self.assertEqual(other.metrics()["reviews"]["shared_hits"], 1)
+        other.reviews("user", n_pages=10)
+        self.assertEqual(mock_reviews.call_count, 2)
+
+    def test_bounded(self, mock_reviews, _mock_stats):
+        """Test the least recently used user is evicted past max_users."""
+        for username in ("a", "b", "a", "c"):
+            self.store.reviews(username)
+        self.store.reviews("a")
+        metrics = self.store.metrics()
+        self.assertEqual((metrics["users"], metrics["evictions"]), (2, 1))
+        self.assertEqual(mock_reviews.call_count, 3)
+
+    def test_concurrent_requests_share_a_scrape(self, mock_reviews, _mock_stats):
+        """Test concurrent misses for one user wait for a single scrape."""
+        def slow_scrape(_username, n_pages):  # pylint: disable=unused-argument
+            time.sleep(0.1)
+            return []
+
+        mock_reviews.side_effect = slow_scrape
+        threads = [threading.Thread(target=self.store.reviews, args=("user",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(mock_reviews.call_count, 1)
+
+    def test_failed_scrapes_leave_no_lock(self, mock_reviews, _mock_stats):
+        """Test users whose scrape fails are not remembered, lock included."""
+        mock_reviews.side_effect = ValueError("Invalid or non-existent user profile")
+        for username in ("ghost1", "ghost2", "ghost3"):
+            with self.assertRaises(ValueError):
+                self.store.reviews(username)
+        self.assertEqual(len(self.store.user_locks), 0)
+        self.assertEqual(self.store.metrics()["users"], 0)
+
+
+@patch("src.helpers.user_review_store.scrape_user_profile",
+       return_value=([{"review_text": "Hi"}], {"num_years": "3"}))
+class TestUserReviewStoreProfile(unittest.TestCase):
+    """Unit tests for UserReviewStore.profile."""
+
+    def setUp(self):
+        """Create a store with a fake clock."""
+        self.now = 0.0
+        self.store = UserReviewStore(ttl=60, clock=lambda: self.now)
+
+    def test_profile_scraped_together_once(self, mock_profile):
+        """Test reviews and stats are scraped together, then served from the store."""
+        expected = ([{"review_text": "Hi"}], {"num_years": "3"})
+        self.assertEqual(self.store.profile("user"), expected)
+        self.assertEqual(self.store.profile("user"), expected)
+        self.assertEqual(self.store.reviews("user"), [{"review_text": "Hi"}])
+        mock_profile.assert_called_once_with("user", n_pages=10)
+
+    @patch("src.helpers.user_review_store.scrape_user_stats", return_value={})
+    def test_only_missing_kind_scraped(self, mock_stats, mock_profile):
+        """Test only the stats are scraped when the reviews are already cached."""
+        self.store.save("user", "reviews", [], n_pages=10)
+        self.assertEqual(self.store.profile("user"), ([], {}))
+        mock_stats.assert_called_once_with("user")
+        mock_profile.assert_not_called()
+
+    def test_warehouse_read_on_miss(self, mock_profile):
+        """Test misses are read from the warehouse instead of scraped."""
+        warehouse = MagicMock()
+        warehouse.user_profile.return_value = ([], {"num_years": "5"})
+        warehouse.user_stats.return_value = {"num_years": "5"}
+        store = UserReviewStore(warehouse=warehouse)
+        self.assertEqual(store.profile("user", n_pages=3), ([], {"num_years": "5"}))
+        self.assertEqual(store.stats("other"), {"num_years": "5"})
+        warehouse.user_profile.assert_called_once_with("user", n_pages=3)
+        mock_profile.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,32 @@
 Unit tests for the Flask application.
 """
 
+import io
+import json
+import os
+import tempfile
+import time
 import unittest
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
 from unittest.mock import patch
 import requests
-from src.app import app
+from src.app import (
+    REQUEST_DEADLINE_SECONDS,
+    analyze,
+    app,
+    deadline_seconds,
+    dedupe_film_reviews,
+    film_reviews,
+)
+from src.helpers.deadlines import DeadlineExceeded, current_deadline
+from src.helpers.admission import AdmissionLimit
+from src.helpers.cache_backends import MemoryCache, SQLiteCache
+from src.helpers.incremental_refresh import IncrementalRefresher
+from src.helpers.profiling import RequestProfiler
+from src.helpers.review_warehouse import ReviewWarehouse
+from src.helpers.state_store import JsonStateStore
 
 
 class TestFlaskApp(unittest.TestCase):
@@ -159,5 +181,350 @@ class TestFlaskApp(unittest.TestCase):
         data = response.get_json()
         self.assertIn("error", data)
 
+    @patch("src.app.analyze.get_aspects")
+    @patch("src.app.analyze.get_summary_stream")
+    @patch("src.app.analyze.read_reviews")
+    @patch("src.app.scrape_reviews")
+    def test_stream_movie_details_success(
+        self, _mock_scrape_reviews, _mock_read_reviews, mock_summary_stream, mock_get_aspects
+    ):
+        """Test the summary is forwarded token by token as server-sent events."""
+        mock_summary_stream.return_value = iter(["A tense ", "thriller."])
+        mock_get_aspects.return_value = [["Acting", 70, 5]]
+
+        response = self.client.post(
+            "/movie_details/stream", json={"film_url": "https://letterboxd.com/film/mickey-17/"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        body = response.get_data(as_text=True)
+        self.assertIn('event: token\ndata: {"text": "A tense "}', body)
+        self.assertIn('"summary": "A tense thriller."', body)
+        self.assertIn('event: aspects', body)
+        self.assertTrue(body.endswith("event: done\ndata: {}\n\n"))
+
+    def test_stream_movie_details_invalid_url(self):
+        """Test the stream endpoint rejects invalid URLs before streaming."""
+        response = self.client.post("/movie_details/stream", json={"film_url": "invalid_url"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.get_json())
+
+    @patch("src.app.user_store.profile")
+    def test_stream_roast_error_event(self, mock_scrape_user_reviews):
+        """Test errors raised mid-stream are sent as an error event."""
+        mock_scrape_user_reviews.side_effect = ValueError("Invalid user")
+        response = self.client.post("/roast/stream", json={"username": "test_user"})
+        body = response.get_data(as_text=True)
+        self.assertIn('event: error\ndata: {"error": "Value error: Invalid user"}', body)
+
+    @patch("src.app.analyze.generate_aspects")
+    @patch("src.app.analyze.get_summary")
+    @patch("src.app.scrape_reviews")
+    @patch("src.app.movie_details_scraper")
+    def test_movie_details_partial_at_deadline(
+        self, mock_details, mock_scrape_reviews, mock_get_summary, mock_generate_aspects
+    ):
+        """Test details and summary are returned without aspects when the deadline runs out."""
+        def slow_summary(*_args, **_kwargs):
+            time.sleep(0.05)
+            return "Summary"
+
+        mock_details.return_value = {"movie_name": "Mickey 17"}
+        mock_scrape_reviews.return_value = [{"review_text": "word " * 401, "rating": "4"}]
+        mock_get_summary.side_effect = slow_summary
+
+        response = self.client.post(
+            "/movie_details", json={"film_url": "https://letterboxd.com/film/mickey-17/"},
+            headers={"X-Request-Deadline": "0.02"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["summary"], "Summary")
+        self.assertIsNone(response.get_json()["aspects"])
+        self.assertTrue(response.get_json()["partial"])
+        mock_generate_aspects.assert_not_called()
+
+    @patch("src.app.user_store.profile")
+    def test_roast_deadline_exceeded(self, mock_reviews):
+        """Test a request that runs out of time before any result answers 504."""
+        mock_reviews.side_effect = DeadlineExceeded("Request deadline exceeded")
+        response = self.client.post("/roast", json={"username": "test_user"})
+        self.assertEqual(response.status_code, 504)
+        self.assertIn("Deadline exceeded", response.get_json()["error"])
+
+    @patch("src.app.roaster.get_results", return_value="What a roast.")
+    @patch("src.app.user_store.profile", return_value=([], {}))
+    def test_roast_job(self, _mock_profile, _mock_get_results):
+        """Test a roast job is queued, run in the background and polled to completion."""
+        response = self.client.post("/jobs/roast", json={"username": "test_user"})
+        self.assertEqual(response.status_code, 202)
+        job_id = response.get_json()["job_id"]
+
+        job = self.client.get(f"/jobs/{job_id}?wait=5").get_json()
+
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"], {"roast": "What a roast."})
+
+    def test_job_errors(self):
+        """Test unknown job types and ids are rejected, and endpoint errors kept."""
+        self.assertEqual(self.client.post("/jobs/unknown", json={}).status_code, 404)
+        self.assertEqual(self.client.get("/jobs/missing").status_code, 404)
+        job_id = self.client.post("/jobs/roast", json={}).get_json()["job_id"]
+        job = self.client.get(f"/jobs/{job_id}?wait=5").get_json()
+        self.assertEqual((job["status"], job["status_code"]), ("failed", 400))
+        self.assertEqual(job["result"], {"error": "username is required"})
+
+    @patch("src.app.analyze.get_aspects", return_value=[["Acting", 70, 5]])
+    @patch("src.app.analyze.get_summary", return_value="Summary")
+    @patch("src.app.scrape_reviews")
+    @patch("src.app.movie_details_scraper", return_value={"movie_name": "Mickey 17"})
+    def test_progressive_movie_details(self, _mock_details, mock_scrape_reviews, *_mocks):
+        """Test details, summary and aspects are sent as separate JSON lines in order."""
+        mock_scrape_reviews.return_value = [{"review_text": "word " * 401, "rating": "4"}]
+        response = self.client.post(
+            "/movie_details/progressive",
+            json={"film_url": "https://letterboxd.com/film/mickey-17/"},
+        )
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(lines, [
+            {"movie_details": {"movie_name": "Mickey 17"}},
+            {"summary": "Summary"},
+            {"aspects": [["Acting", 70, 5]]},
+            {"done": True, "partial": False},
+        ])
+
+    @patch("src.app.scrape_reviews", return_value=[])
+    @patch("src.app.movie_details_scraper")
+    def test_progressive_movie_details_error(self, mock_details, _mock_scrape_reviews):
+        """Test errors are sent as a final JSON line with the usual message."""
+        mock_details.return_value = {"movie_name": "Mickey 17"}
+        response = self.client.post(
+            "/movie_details/progressive",
+            json={"film_url": "https://letterboxd.com/film/mickey-17/"},
+        )
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(json.loads(lines[0]), {"movie_details": {"movie_name": "Mickey 17"}})
+        self.assertIn("Value error", json.loads(lines[-1])["error"])
+
+    @patch("src.app.analyze.get_taste_match_result", return_value="You might like this movie!")
+    @patch("src.app.user_store.reviews", return_value=[{"review_text": "Loved it"}])
+    @patch("src.app.movie_details_scraper", return_value={"movie_name": "Mickey 17"})
+    @patch("src.app.scrape_reviews", return_value=[{"review_text": "Great", "rating": "4"}])
+    def test_taste_stages(self, _mock_scrape, _mock_details, _mock_reviews, mock_taste):
+        """Test /taste gathers the film reviews, details and user reviews for the match."""
+        response = self.client.post("/taste", json={
+            "film_url": "https://letterboxd.com/film/mickey-17/", "username": "test_user"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {"taste": "You might like this movie!"})
+        self.assertEqual(mock_taste.call_args.args[2], "Mickey 17")
+        self.assertFalse(mock_taste.call_args.kwargs["profile"])
+
+
+class TestDeadlineHeader(unittest.TestCase):
+    """Test cases for the X-Request-Deadline header."""
+
+    def setUp(self):
+        """Set up the test client."""
+        app.testing = True
+        self.client = app.test_client()
+
+    def test_deadline_header_cannot_lift_server_deadline(self):
+        """Test 0, negative, nan and inf header values fall back to the server deadline."""
+        for header in ("0", "-3", "nan", "inf", "soon", None):
+            self.assertEqual(deadline_seconds(header), REQUEST_DEADLINE_SECONDS, header)
+        self.assertEqual(deadline_seconds("0.5"), 0.5)
+        self.assertEqual(deadline_seconds("1e9"), REQUEST_DEADLINE_SECONDS)
+
+        deadlines = []
+
+        def profile(*_args, **_kwargs):
+            deadlines.append(current_deadline())
+            raise DeadlineExceeded("Request deadline exceeded")
+
+        with patch("src.app.user_store.profile", side_effect=profile):
+            for header in ("0", "-3", "nan"):
+                self.client.post("/roast", json={"username": "test_user"},
+                                 headers={"X-Request-Deadline": header})
+        self.assertEqual(len(deadlines), 3)
+        self.assertTrue(all(deadline is not None for deadline in deadlines))
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test cases for request metrics, profiling, admission control and caching."""
+
+    def setUp(self):
+        """Set up the test client."""
+        app.testing = True
+        self.client = app.test_client()
+
+    def test_metrics_and_server_timing(self):
+        """Test responses carry Server-Timing and endpoints show up in /metrics."""
+        response = self.client.post("/roast", json={})
+        self.assertIn("total;dur=", response.headers["Server-Timing"])
+        page = self.client.get("/metrics").get_data(as_text=True)
+        self.assertIn('letterboxd_responses_total{endpoint="/roast",status="400"}', page)
+
+    def test_dedup_reports_bounded_under_concurrency(self):
+        """Test dedup reports recorded from many threads stay bounded and readable."""
+        reviews = [{"review_text": "Great film", "rating": "4"}]
+
+        def record(worker):
+            for film in range(200):
+                dedupe_film_reviews(f"https://letterboxd.com/film/{worker}-{film}/", reviews)
+
+        with patch("src.app.DEDUP_REPORTS_MAX", 50), \
+                patch("src.app.dedup_reports", OrderedDict()) as reports, \
+                redirect_stdout(io.StringIO()):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(record, range(8)))
+                films = self.client.get("/stats/dedup").get_json()["films"]
+            self.assertEqual(len(reports), 50)
+            self.assertLessEqual(len(films), 50)
+
+    def test_profiled_request(self):
+        """Test a request with the admin header is profiled and its profile named."""
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = RequestProfiler(directory, token="secret")
+            with patch("src.app.profiler", profiler):
+                response = self.client.post("/roast", json={}, headers={"X-Profile": "secret"})
+                unprofiled = self.client.post("/roast", json={})
+            self.assertEqual(response.status_code, 400)
+            profile_id = response.headers["X-Profile-Id"]
+            self.assertTrue(os.path.exists(os.path.join(directory, f"{profile_id}.txt")))
+            self.assertNotIn("X-Profile-Id", unprofiled.headers)
+
+    def test_load_shedding(self):
+        """Test a full endpoint answers 503 with Retry-After while others still serve."""
+        limit = AdmissionLimit("roast", max_concurrent=1)
+        with patch.dict("src.app.admission", {"roast": limit}):
+            with limit.slot():
+                response = self.client.post("/roast", json={"username": "u"})
+                streamed = self.client.post("/roast/stream", json={"username": "u"})
+                other = self.client.post("/taste", json={})
+            self.assertEqual(response.status_code, 503)
+            self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+            self.assertEqual(streamed.status_code, 503)
+            self.assertEqual(other.status_code, 400)
+            self.assertEqual(self.client.post("/roast", json={}).status_code, 400)
+            self.assertEqual(limit.stats()["in_flight"], 0)
+
+    @patch("src.app.user_store.profile", return_value=([], {}))
+    @patch("src.app.roaster.get_results_stream", return_value=iter(["Ouch"]))
+    def test_stream_holds_slot(self, *_mocks):
+        """Test a streamed response keeps its slot until it is closed."""
+        limit = AdmissionLimit("roast", max_concurrent=1)
+        with patch.dict("src.app.admission", {"roast": limit}):
+            response = self.client.post("/roast/stream", json={"username": "u"},
+                                        buffered=False)
+            self.assertEqual(limit.stats()["in_flight"], 1)
+            self.assertIn("Ouch", response.get_data(as_text=True))
+            response.close()
+            self.assertEqual(limit.stats()["in_flight"], 0)
+
+    @patch("src.app.analyze.get_results", return_value=("Summary", [["Acting", 70, 5]]))
+    @patch("src.app.scrape_reviews", return_value=[{"review_text": "Great", "rating": "4"}])
+    @patch("src.app.movie_details_scraper", return_value={"movie_name": "Mickey 17"})
+    def test_shared_cache(self, mock_details, mock_scrape_reviews, mock_get_results):
+        """Test a second request is served from the shared cache without scraping."""
+        body = {"film_url": "https://letterboxd.com/film/mickey-17/"}
+        with patch("src.app.shared_cache", MemoryCache()), patch("src.app.refresher", None):
+            first = self.client.post("/movie_details", json=body).get_json()
+            second = self.client.post("/movie_details", json=body).get_json()
+        self.assertEqual(first, second)
+        self.assertEqual(second["summary"], "Summary")
+        for mock in (mock_details, mock_scrape_reviews, mock_get_results):
+            mock.assert_called_once()
+
+    @patch("src.app.analyze.get_results", return_value=("Summary", [["Acting", 70, 5]]))
+    @patch("src.app.scrape_reviews", return_value=[{"review_text": "Great", "rating": "4"}])
+    @patch("src.app.movie_details_scraper", return_value={"movie_name": "Mickey 17"})
+    def test_broken_sqlite_cache(self, *_mocks):
+        """Test requests still run when the SQLite cache file cannot be used."""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = SQLiteCache(os.path.join(directory, "cache.db"))
+            cache.connection().execute("DROP TABLE cache")
+            with patch("src.app.shared_cache", cache), patch("src.app.refresher", None), \
+                    redirect_stdout(io.StringIO()):
+                response = self.client.post(
+                    "/movie_details", json={"film_url": "https://letterboxd.com/film/mickey-17/"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()["summary"], "Summary")
+
+    @patch("src.app.analyze.get_summary", return_value="Summary")
+    @patch("src.helpers.review_warehouse.movie_details_scraper",
+           return_value={"movie_name": "Mickey 17"})
+    @patch("src.helpers.review_warehouse.scrape_reviews")
+    def test_refresher_reads_warehouse(self, mock_scrape_reviews, *_mocks):
+        """Test the incremental refresher gets its reviews through the cache and warehouse."""
+        film_url = "https://letterboxd.com/film/mickey-17/"
+        reviews = [{"rating": "4", "review_text": f"Review {i}, great acting" + " and so on" * 15}
+                   for i in range(10)]
+
+        def scrape(*_args, progress=None, **_kwargs):
+            progress["complete"] = True
+            return reviews
+
+        mock_scrape_reviews.side_effect = scrape
+        with tempfile.TemporaryDirectory() as directory:
+            warehouse = ReviewWarehouse(os.path.join(directory, "warehouse.db"))
+            refresher = IncrementalRefresher(analyze, JsonStateStore(directory),
+                                             reviews=film_reviews)
+            with patch("src.app.warehouse", warehouse), patch("src.app.refresher", refresher), \
+                    patch("src.app.shared_cache", MemoryCache()):
+                first = self.client.post("/movie_details", json={"film_url": film_url})
+                second = self.client.post("/movie_details", json={"film_url": film_url})
+            self.assertEqual(first.get_json()["aspects"], [["Acting", 100, 0]])
+            self.assertEqual(second.get_json(), first.get_json())
+            self.assertEqual(len(warehouse.stored_reviews("film", film_url)), 10)
+            self.assertEqual(refresher.store.get(film_url)["n_reviews"], 10)
+        mock_scrape_reviews.assert_called_once()
+
+
+class TestStreamWordLimit(unittest.TestCase):
+    """Test cases for the word limits of the server-sent event routes."""
+
+    def setUp(self):
+        """Set up the test client."""
+        app.testing = True
+        self.client = app.test_client()
+
+    @patch("src.app.analyze.get_aspects", return_value=[["Acting", 70, 5]])
+    @patch("src.app.analyze.read_reviews")
+    @patch("src.app.scrape_reviews", return_value=[{"review_text": "Great", "rating": "4"}])
+    def test_stream_summary_truncated(self, *_mocks):
+        """Test an overlong streamed summary is cut at the limit and its stream closed."""
+        consumed = []
+
+        def tokens():
+            try:
+                for i in range(1000):
+                    consumed.append(i)
+                    yield "word "
+            finally:
+                consumed.append("closed")
+
+        with patch("src.app.analyze.get_summary_stream", return_value=tokens()), \
+                redirect_stdout(io.StringIO()):
+            body = self.client.post(
+                "/movie_details/stream",
+                json={"film_url": "https://letterboxd.com/film/mickey-17/"},
+            ).get_data(as_text=True)
+        self.assertEqual(body.count("event: token"), 210)
+        self.assertEqual(consumed[-2:], [210, "closed"])
+        summary = json.loads(body.split("event: summary\ndata: ")[1].split("\n")[0])
+        self.assertEqual(summary["summary"], "word " * 210)
+        self.assertIn("event: aspects", body)
+
+    @patch("src.app.user_store.profile", return_value=([], {}))
+    @patch("src.app.roaster.get_results_stream", return_value=iter(["word "] * 1000))
+    def test_stream_roast_too_long(self, *_mocks):
+        """Test an overlong streamed roast ends with an error event."""
+        body = self.client.post("/roast/stream", json={"username": "u"}).get_data(as_text=True)
+        self.assertEqual(body.count("event: token"), 710)
+        self.assertIn('event: error\ndata: {"error": "Response over 710 words"}', body)
+        self.assertNotIn("event: done", body)
+
+
 if __name__ == "__main__":
     unittest.main()
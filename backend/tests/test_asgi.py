@@ -0,0 +1,105 @@
+"""
+Unit tests for the ASGI entry point.
+"""
+
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+from src.asgi import application
+from src.helpers.admission import AdmissionLimit
+from src.helpers.deadlines import DeadlineExceeded
+
+
+def call(path, payload, method="POST", headers=None):
+    """Sends one request through the ASGI app, returning its status and JSON body."""
+    body = json.dumps(payload).encode()
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": headers or []}
+    asyncio.run(application(scope, receive, send))
+    body = sent[1]["body"]
+    return sent[0]["status"], json.loads(body) if body else None
+
+
+class TestASGIApp(unittest.TestCase):
+    """Test cases for the ASGI application."""
+
+    @patch("src.asgi.roaster.get_results", return_value="What a roast.")
+    @patch("src.asgi.user_store.profile", return_value=([], {}))
+    def test_roast(self, mock_profile, _mock_get_results):
+        """Test the roast is made from the user's reviews and stats."""
+        status, data = call("/roast", {"username": "test_user"})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(data, {"roast": "What a roast."})
+        mock_profile.assert_called_once_with("test_user", 10)
+
+    @patch("src.app.analyze.get_results", return_value=("Summary", [["Acting", 70, 5]]))
+    @patch("src.app.scrape_reviews", return_value=[{"review_text": "Great", "rating": "4"}])
+    @patch("src.app.movie_details_scraper", return_value={"movie_name": "Mickey 17"})
+    def test_movie_details(self, _mock_details, _mock_scrape_reviews, _mock_get_results):
+        """Test movie details keep the JSON contract of the Flask endpoint."""
+        status, data = call("/movie_details", {"film_url": "https://letterboxd.com/film/x/"})
+        self.assertEqual(status, 200)
+        self.assertEqual(data, {
+            "movie_details": {"movie_name": "Mickey 17"},
+            "summary": "Summary",
+            "aspects": [["Acting", 70, 5]],
+        })
+
+    @patch("src.app.movie_details_scraper")
+    def test_error_mapping(self, mock_details):
+        """Test errors map to the same statuses and messages as the Flask endpoints."""
+        self.assertEqual(call("/movie_details", {}),
+                         (400, {"error": "film_url is required"}))
+        mock_details.side_effect = ValueError("Invalid URL")
+        with patch("src.app.scrape_reviews", return_value=[{"review_text": "Great"}]):
+            self.assertEqual(call("/taste", {"username": "u", "film_url": "x"}),
+                             (400, {"error": "Value error: Invalid URL"}))
+        self.assertEqual(call("/missing", {})[0], 404)
+        self.assertEqual(call("/roast", {}, method="GET")[0], 405)
+
+    @patch("src.asgi.user_store.profile")
+    def test_deadline_header(self, mock_profile):
+        """Test the X-Request-Deadline header bounds the request like in Flask."""
+        def slow(*_args):
+            time.sleep(0.05)
+            raise DeadlineExceeded("Request deadline exceeded")
+
+        mock_profile.side_effect = slow
+        status, data = call("/roast", {"username": "u"},
+                            headers=[(b"x-request-deadline", b"0.01")])
+        self.assertEqual(status, 504)
+        self.assertIn("Deadline exceeded", data["error"])
+
+    def test_load_shedding(self):
+        """Test a full endpoint answers 503 with Retry-After."""
+        limit = AdmissionLimit("roast", max_concurrent=1)
+        sent = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"{}", "more_body": False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/roast", "headers": []}
+        with patch.dict("src.asgi.admission", {"roast": limit}), limit.slot():
+            asyncio.run(application(scope, receive, send))
+        self.assertEqual(sent[0]["status"], 503)
+        self.assertIn((b"retry-after", b"1"), sent[0]["headers"])
+        self.assertEqual(limit.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
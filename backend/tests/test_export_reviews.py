@@ -0,0 +1,40 @@
+"""
+Unit tests for the review export command.
+"""
+
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from src.export_reviews import fill_warehouse, main
+from src.helpers.review_warehouse import ReviewWarehouse
+
+
+class TestExportReviews(unittest.TestCase):
+    """Test cases for the review export command."""
+
+    def test_export_warehouse(self):
+        """Test a warehouse is exported and appended to, with a throughput report."""
+        with tempfile.TemporaryDirectory() as directory:
+            warehouse = ReviewWarehouse(os.path.join(directory, "warehouse.db"))
+            fill_warehouse(warehouse, reviews=40, films=4)
+            output = io.StringIO()
+            with redirect_stdout(output):
+                args = ["--warehouse", warehouse.path, "--out", os.path.join(directory, "out")]
+                self.assertEqual(main(args), 0)
+                self.assertEqual(main(args), 0)
+            lines = output.getvalue().splitlines()
+            self.assertIn("rows/s", lines[0])
+            self.assertEqual(lines[1].split()[:3], ["film_reviews", "40", "4"])
+            self.assertEqual(lines[5].split()[:2], ["film_reviews", "0"])
+
+    def test_missing_warehouse(self):
+        """Test the command fails without a warehouse."""
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["--warehouse", "/nonexistent/warehouse.db"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
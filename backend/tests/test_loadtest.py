@@ -0,0 +1,57 @@
+"""
+Unit tests for the load test report and baseline comparison.
+"""
+
+import random
+import unittest
+
+from src.loadtest import compare, parse_mix, schedule, summarize
+
+
+class TestLoadTest(unittest.TestCase):
+    """Test cases for the load test helpers."""
+
+    def test_parse_mix(self):
+        """Test request mixes are parsed and unknown endpoints rejected."""
+        self.assertEqual(parse_mix("movie_details=2,roast"), {"movie_details": 2.0, "roast": 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix("search=1")
+        with self.assertRaises(ValueError):
+            parse_mix("roast=0")
+
+    def test_schedule(self):
+        """Test arrivals follow the rate and the mix."""
+        arrivals = schedule(50, 20, {"roast": 1}, random.Random(0))
+        self.assertAlmostEqual(len(arrivals) / 20, 50, delta=5)
+        self.assertTrue(all(at < 20 for at, _ in arrivals))
+        self.assertEqual({endpoint for _, endpoint in arrivals}, {"roast"})
+
+    def test_summarize(self):
+        """Test percentiles, throughput and error rate per endpoint."""
+        results = [("roast", latency / 100, 200) for latency in range(1, 101)]
+        results.append(("taste", 2.0, 500))
+
+        report = summarize(results, duration=10)
+
+        self.assertEqual(report["roast"]["requests"], 100)
+        self.assertEqual(report["roast"]["throughput"], 10.0)
+        self.assertAlmostEqual(report["roast"]["p50"], 0.505, places=3)
+        self.assertAlmostEqual(report["roast"]["p99"], 0.99, places=2)
+        self.assertEqual(report["taste"]["error_rate"], 1.0)
+        self.assertEqual(report["all"]["requests"], 101)
+        self.assertNotIn("movie_details", report)
+
+    def test_compare(self):
+        """Test slower percentiles, lower throughput and more errors are regressions."""
+        baseline = {"all": {"p50": 1.0, "p95": 2.0, "p99": 3.0,
+                            "throughput": 5.0, "error_rate": 0.0}}
+        same = {"all": {"p50": 1.05, "p95": 2.0, "p99": 3.0,
+                        "throughput": 4.8, "error_rate": 0.05}}
+        worse = {"all": {"p50": 1.0, "p95": 2.5, "p99": 3.0,
+                         "throughput": 3.0, "error_rate": 0.2}}
+        self.assertEqual(compare(same, baseline), [])
+        self.assertEqual(len(compare(worse, baseline)), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -48,8 +48,8 @@ class TestLetterboxdRoastAnalyzer(unittest.TestCase):
         self.assertIn("No statistics available.", result)
 
     # Tests for generate_roast
-    @patch("src.helpers.roast_generator.genai.GenerativeModel")
-    @patch("src.helpers.roast_generator.genai.configure")
+    @patch("src.helpers.llm_providers.genai.GenerativeModel")
+    @patch("src.helpers.llm_providers.genai.configure")
     def test_generate_roast_too_long(self, _mock_configure, mock_model_class):
         """Test generate_roast raises RoastGenerationError if the roast is too long."""
         fake_response = MagicMock()
@@ -62,6 +62,14 @@ class TestLetterboxdRoastAnalyzer(unittest.TestCase):
         with self.assertRaises(RoastGenerationError):
             self.analyzer.generate_roast(user_data, "fake-api-key")
 
+    @patch.object(LetterboxdRoastAnalyzer, "stream_roast")
+    def test_generate_roast_stream_generation_too_long(self, mock_stream_roast):
+        """Test stream_generation raises RoastGenerationError once the roast is too long."""
+        analyzer = LetterboxdRoastAnalyzer(stream_generation=True)
+        mock_stream_roast.return_value = iter(["word " * 100] * 10)
+        with self.assertRaises(RoastGenerationError):
+            analyzer.generate_roast("User Reviews: Test", "fake-api-key")
+
     # Tests for get_results
     @patch.object(LetterboxdRoastAnalyzer, "generate_roast")
     def test_get_results_success(self, mock_generate_roast):
@@ -92,6 +100,15 @@ class TestLetterboxdRoastAnalyzer(unittest.TestCase):
         with self.assertRaises(RoastGenerationError):
             self.analyzer.get_results(reviews, stats, api_keys)
 
+    @patch.object(LetterboxdRoastAnalyzer, "stream_roast")
+    def test_get_results_stream(self, mock_stream_roast):
+        """Test get_results_stream forwards the roast pieces from the first working key."""
+        mock_stream_roast.return_value = iter(["Your taste ", "is tragic."])
+        reviews = [{"review_text": "Great movie!"}]
+        result = self.analyzer.get_results_stream(reviews, {}, ["key1", "key2"])
+        self.assertEqual("".join(result), "Your taste is tragic.")
+        mock_stream_roast.assert_called_once()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -11,8 +11,12 @@ from src.helpers.scrapers_roast import (
     parse_review_element,
     scrape_user_reviews,
     scrape_user_stats,
+    scrape_user_profile,
+    scrape_new_user_reviews,
+    user_review_key,
     ScraperError,
 )
+from src.helpers.fake_letterboxd import FakeLetterboxd
 
 
 class FakeResponse:
@@ -89,6 +93,7 @@ class TestScrapersRoast(unittest.TestCase):
         element = soup.find("div", class_="film-detail-content")
         result = parse_review_element(element)
         expected = {
+            "review_id": None,
             "movie_name": "Test Movie",
             "movie_url": "https://letterboxd.com/film/movie-slug/",
             "movie_year": "2022",
@@ -124,6 +129,7 @@ class TestScrapersRoast(unittest.TestCase):
             reviews = scrape_user_reviews("testuser", n_pages=1)
             self.assertEqual(len(reviews), 1)
             expected = {
+                "review_id": None,
                 "movie_name": "Test Movie",
                 "movie_url": "https://letterboxd.com/film/test-movie/",
                 "movie_year": "2021",
@@ -140,6 +146,41 @@ class TestScrapersRoast(unittest.TestCase):
             with self.assertRaises(ValueError):
                 scrape_user_reviews("nonexistentuser", n_pages=1)
 
+    def test_scrape_user_profile(self):
+        """Test scrape_user_profile validates once and keeps the pages in order."""
+        def review_page(movie, pagination=""):
+            return FakeResponse(
+                "<html><body>" + pagination +
+                '<div class="film-detail-content">'
+                f'<h2 class="headline-2 prettify"><a href="/film/{movie}/">{movie}</a></h2>'
+                '<div class="js-review-body">Review</div></div></body></html>', 200)
+
+        pages = {
+            "https://letterboxd.com/testuser/": FakeResponse("<html><h1>Welcome</h1></html>", 200),
+            "https://letterboxd.com/testuser/stats": FakeResponse(
+                '<html><h4 class="yir-member-statistic statistic">3 years</h4></html>', 200),
+            "https://letterboxd.com/testuser/films/reviews/page/1/": review_page(
+                "first", '<li class="paginate-page">1</li><li class="paginate-page">2</li>'),
+            "https://letterboxd.com/testuser/films/reviews/page/2/": review_page("second"),
+        }
+
+        with patch("src.helpers.scrapers_roast.requests.get") as mock_get:
+            mock_get.side_effect = lambda url, **_kwargs: pages.get(url, FakeResponse("", 404))
+            reviews, stats = scrape_user_profile("testuser", n_pages=5)
+
+        self.assertEqual([review["movie_name"] for review in reviews], ["first", "second"])
+        self.assertEqual(stats["num_years"], "3")
+        requested = [call.args[0] for call in mock_get.call_args_list]
+        self.assertEqual(requested.count("https://letterboxd.com/testuser/"), 1)
+        self.assertEqual(len(requested), 4)
+
+    def test_scrape_user_profile_invalid_user(self):
+        """Test scrape_user_profile raises ValueError for an invalid user."""
+        with patch("src.helpers.scrapers_roast.requests.get") as mock_get:
+            mock_get.return_value = FakeResponse("Not Found", 404)
+            with self.assertRaises(ValueError):
+                scrape_user_profile("nonexistentuser")
+
     def test_scrape_user_stats_valid(self):
         """Test scrape_user_stats returns correct stats for a valid user."""
         def side_effect(url, **_kwargs):
@@ -199,6 +240,31 @@ class TestScrapersRoast(unittest.TestCase):
             with self.assertRaises(ValueError):
                 scrape_user_stats("nonexistentuser")
 
+    def test_scrape_new_user_reviews(self):
+        """Test only the reviews above the first known one are scraped."""
+        letterboxd = FakeLetterboxd(latency=0, user_pages=2)
+        with letterboxd.installed():
+            reviews = scrape_user_reviews("testuser", n_pages=2)
+            known = {user_review_key(review) for review in reviews[15:]}
+            new_reviews = scrape_new_user_reviews("testuser", known, n_pages=2)
+            everything = scrape_new_user_reviews("testuser", set(), n_pages=5)
+        self.assertEqual(new_reviews, reviews[:15])
+        self.assertEqual(everything, reviews)
+
+    def test_scrape_new_user_reviews_failed_page(self):
+        """Test a review page that could not be fetched marks the crawl incomplete."""
+        progress = {}
+        with patch("src.helpers.scrapers_roast.fetch_review_page", return_value=None):
+            self.assertEqual(scrape_new_user_reviews("testuser", set(), progress=progress), [])
+        self.assertFalse(progress["complete"])
+
+    def test_user_review_key_uses_review_id(self):
+        """Test identical user reviews are told apart by their Letterboxd id."""
+        review = {"movie_url": "https://letterboxd.com/film/heat/", "watched_date": None,
+                  "rating": "★★★★", "review_text": ""}
+        self.assertNotEqual(user_review_key({**review, "review_id": "viewing:1"}),
+                            user_review_key({**review, "review_id": "viewing:2"}))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,51 @@
+"""
+Unit tests for the startup benchmark.
+"""
+
+import unittest
+
+from src.startup_benchmark import LAZY_MODULES, compare, measure, parse_importtime
+
+IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        300 | site
+import time:      2000 |       2000 |       urllib3
+import time:      1000 |       3000 |     requests
+import time:       500 |        500 |     flask
+import time:       100 |       3600 |   src.app
+import time:        50 |       3650 | src
+"""
+
+
+class TestStartupBenchmark(unittest.TestCase):
+    """Test cases for the startup benchmark."""
+
+    def test_parse_importtime(self):
+        """Test cumulative times are read and direct imports grouped under their importer."""
+        parsed = parse_importtime(IMPORTTIME)
+
+        self.assertEqual(parsed["modules"]["src.app"], 0.0036)
+        self.assertEqual(parsed["modules"]["urllib3"], 0.002)
+        self.assertEqual(parsed["children"]["site"], {"_io": 0.00012})
+        self.assertEqual(parsed["children"]["src"], {"src.app": 0.0036})
+
+    def test_compare(self):
+        """Test eager heavy imports and slow startups are regressions."""
+        baseline = {"import_seconds": 0.3}
+
+        self.assertEqual(compare({"import_seconds": 0.33, "eager_imports": []}, baseline), [])
+        self.assertEqual(len(compare({"import_seconds": 0.4, "eager_imports": []}, baseline)), 1)
+        self.assertEqual(compare({"import_seconds": 0.3, "eager_imports": ["bs4"]}, baseline),
+                         ["bs4 is imported at startup"])
+
+    def test_app_imports_lazily(self):
+        """Test importing the app loads none of the heavy libraries."""
+        seconds, slowest, loaded = measure("src.app")
+
+        self.assertGreater(seconds, 0)
+        self.assertIn("flask", slowest)
+        self.assertEqual(loaded, [], f"Imported at startup, expected lazily: {LAZY_MODULES}")
+
+
+if __name__ == "__main__":
+    unittest.main()